@@ -0,0 +1,566 @@
+"""
+Módulo de estadísticas en línea para simulaciones de colas
+
+Este módulo proporciona acumuladores que se actualizan en O(1) por evento
+y ocupan memoria acotada independientemente del horizonte simulado,
+para que las simulaciones largas no tengan que guardar cada observación:
+- Sketch de cuantiles combinable (percentiles p95/p99 de W y Wq)
+- Histograma de bins fijos con reagrupamiento automático
+- Ventanas temporales consecutivas y con decaimiento exponencial
+- Detector de deriva lineal (divergencia de sistemas inestables)
+- Estimador regenerativo por ciclos con intervalos de confianza
+"""
+
+import math
+from collections import deque, namedtuple
+from statistics import NormalDist
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class QuantileSketch:
+    """
+    Sketch de cuantiles con error relativo acotado y combinable
+
+    Las observaciones positivas se agrupan en cubetas logarítmicas de
+    razón γ = (1+α)/(1−α), de modo que cualquier cuantil se estima con
+    error relativo ≤ α (estilo DDSketch). Dos sketches con la misma α se
+    combinan sumando cubetas, lo que permite unir réplicas paralelas.
+    Si se supera max_bins se fusionan las cubetas más bajas, sacrificando
+    precisión en los cuantiles inferiores y preservando la cola superior.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, max_bins: int = 2048,
+                 zero_threshold: float = 1e-12):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(f"relative_accuracy debe estar en (0, 1), recibido: {relative_accuracy}")
+        if max_bins < 2:
+            raise ValueError(f"max_bins debe ser al menos 2, recibido: {max_bins}")
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.zero_threshold = zero_threshold
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.bins: Dict[int, int] = {}
+        # Los tiempos de espera en cola son exactamente 0 con frecuencia
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x: float):
+        """Agregar una observación (no negativa)"""
+        self.count += 1
+        self.total += x
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+        if x <= self.zero_threshold:
+            self.zero_count += 1
+            return
+        key = math.ceil(math.log(x) / self._log_gamma)
+        self.bins[key] = self.bins.get(key, 0) + 1
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def _collapse(self):
+        """Fusionar las cubetas más bajas hasta respetar max_bins"""
+        keys = sorted(self.bins)
+        excess = len(keys) - self.max_bins + 1
+        target = keys[excess]
+        moved = sum(self.bins.pop(k) for k in keys[:excess])
+        self.bins[target] += moved
+
+    def merge(self, other: 'QuantileSketch'):
+        """Combinar otro sketch con la misma precisión en este"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Solo se pueden combinar sketches con la misma relative_accuracy")
+        for key, n in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + n
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        while len(self.bins) > self.max_bins:
+            self._collapse()
+
+    @classmethod
+    def merged(cls, sketches: Iterable['QuantileSketch']) -> 'QuantileSketch':
+        """Crear un sketch nuevo que combine varios (p. ej. de réplicas)"""
+        sketches = list(sketches)
+        if not sketches:
+            return cls()
+        result = cls(sketches[0].relative_accuracy, sketches[0].max_bins,
+                     sketches[0].zero_threshold)
+        for sk in sketches:
+            result.merge(sk)
+        return result
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimar el cuantil q ∈ [0, 1]
+
+        Retorna 0.0 si el sketch está vacío.
+        """
+        if not 0 <= q <= 1:
+            raise ValueError(f"q debe estar en [0, 1], recibido: {q}")
+        if self.count == 0:
+            return 0.0
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        seen = self.zero_count
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                value = 2.0 * self._gamma ** key / (self._gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def quantiles(self, qs: Sequence[float]) -> Dict[float, float]:
+        """Estimar varios cuantiles a la vez"""
+        return {q: self.quantile(q) for q in qs}
+
+    def mean(self) -> float:
+        """Media exacta de las observaciones"""
+        return self.total / self.count if self.count > 0 else 0.0
+
+    def clear(self):
+        """Descartar todas las observaciones"""
+        self.bins.clear()
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+
+class OnlineHistogram:
+    """
+    Histograma de bins fijos que se actualiza en O(1) por observación
+
+    Los bins pueden ser lineales sobre [lo, hi) o logarítmicos (lo > 0).
+    Las observaciones fuera del rango se cuentan en underflow/overflow; con
+    auto_rebin=True, una observación por encima de hi duplica el rango
+    fusionando bins adyacentes de a pares, de modo que el número de bins
+    (y la memoria) se mantiene constante sin conocer el rango de antemano.
+    """
+
+    def __init__(self, lo: float = 0.0, hi: float = 1.0, bins: int = 64,
+                 scale: str = 'linear', auto_rebin: bool = True):
+        if scale not in ('linear', 'log'):
+            raise ValueError(f"Escala no soportada: {scale} (use 'linear' o 'log')")
+        if hi <= lo:
+            raise ValueError(f"hi ({hi}) debe ser mayor que lo ({lo})")
+        if scale == 'log' and lo <= 0:
+            raise ValueError(f"La escala logarítmica requiere lo > 0, recibido: {lo}")
+        if bins < 2 or bins % 2:
+            raise ValueError(f"bins debe ser par y al menos 2, recibido: {bins}")
+        self.lo = lo
+        self.hi = hi
+        self.nbins = bins
+        self.scale = scale
+        self.auto_rebin = auto_rebin
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+        self.count = 0
+        self.total = 0.0
+        self._update_transform()
+
+    def _update_transform(self):
+        """Precalcular la transformación valor → índice del rango actual"""
+        if self.scale == 'linear':
+            self._offset = self.lo
+            self._factor = self.nbins / (self.hi - self.lo)
+        else:
+            self._offset = math.log(self.lo)
+            self._factor = self.nbins / (math.log(self.hi) - self._offset)
+
+    def _rebin(self):
+        """Duplicar el rango (lineal o en décadas) fusionando bins de a pares"""
+        merged = self.counts[0::2] + self.counts[1::2]
+        self.counts[:self.nbins // 2] = merged
+        self.counts[self.nbins // 2:] = 0
+        if self.scale == 'linear':
+            self.hi = self.lo + 2 * (self.hi - self.lo)
+        else:
+            self.hi = self.lo * (self.hi / self.lo) ** 2
+        self._update_transform()
+
+    def add(self, x: float):
+        """Agregar una observación"""
+        self.count += 1
+        self.total += x
+        if x < self.lo:
+            self.underflow += 1
+            return
+        if x >= self.hi:
+            if not self.auto_rebin:
+                self.overflow += 1
+                return
+            while x >= self.hi:
+                self._rebin()
+        v = math.log(x) if self.scale == 'log' else x
+        idx = int((v - self._offset) * self._factor)
+        self.counts[min(idx, self.nbins - 1)] += 1
+
+    def _edge_values(self, idx: np.ndarray) -> np.ndarray:
+        """Borde izquierdo del bin idx (admite índices más allá de nbins)"""
+        v = self._offset + idx / self._factor
+        return np.exp(v) if self.scale == 'log' else v
+
+    def edges(self) -> np.ndarray:
+        """Bordes de los bins (nbins + 1 valores)"""
+        return self._edge_values(np.arange(self.nbins + 1))
+
+    def coarsen(self, bins: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Agrupar bins adyacentes para obtener a lo sumo `bins` bins
+
+        Los bins vacíos del extremo superior se recortan antes de agrupar.
+
+        Retorna:
+            (conteos, bordes) listos para ax.stairs
+        """
+        nonzero = np.nonzero(self.counts)[0]
+        used = int(nonzero[-1]) + 1 if len(nonzero) else self.nbins
+        group = max(1, math.ceil(used / bins))
+        n_groups = math.ceil(used / group)
+        padded = np.zeros(n_groups * group, dtype=np.int64)
+        padded[:used] = self.counts[:used]
+        counts = padded.reshape(n_groups, group).sum(axis=1)
+        return counts, self._edge_values(np.arange(n_groups + 1) * group)
+
+    def mean(self) -> float:
+        """Media exacta de las observaciones (incluye las fuera de rango)"""
+        return self.total / self.count if self.count > 0 else 0.0
+
+    def clear(self):
+        """Descartar todas las observaciones (conserva el rango actual)"""
+        self.counts[:] = 0
+        self.underflow = 0
+        self.overflow = 0
+        self.count = 0
+        self.total = 0.0
+
+
+Window = namedtuple('Window', ['t_start', 't_end', 'mean', 'count', 'weight'])
+
+
+class TumblingWindow:
+    """
+    Promedios sobre ventanas consecutivas de ancho fijo
+
+    Admite dos usos: observaciones puntuales con add(x, t) (p. ej. W al
+    salir cada cliente) o valores constantes por tramos con
+    add_interval(v, t0, t1) (p. ej. L entre dos eventos, ponderado por
+    tiempo). Cada actualización es O(1) amortizado y solo se conservan las
+    últimas `keep` ventanas cerradas.
+    """
+
+    def __init__(self, width: float, start: float = 0.0, keep: int = 256):
+        if width <= 0:
+            raise ValueError(f"El ancho de ventana debe ser positivo, recibido: {width}")
+        if keep < 1:
+            raise ValueError(f"keep debe ser al menos 1, recibido: {keep}")
+        self.width = width
+        self.history: deque = deque(maxlen=keep)
+        self.clear(start)
+
+    def clear(self, start: float = 0.0):
+        """Descartar todas las ventanas y comenzar de nuevo en start"""
+        self.history.clear()
+        self._start = start
+        self._total = 0.0
+        self._weight = 0.0
+        self._count = 0
+
+    @property
+    def t_start(self) -> float:
+        """Inicio de la ventana en curso"""
+        return self._start
+
+    def _close(self):
+        end = self._start + self.width
+        mean = self._total / self._weight if self._weight > 0 else 0.0
+        self.history.append(Window(self._start, end, mean, self._count, self._weight))
+        self._start = end
+        self._total = 0.0
+        self._weight = 0.0
+        self._count = 0
+
+    def roll(self, t: float):
+        """Cerrar las ventanas que terminan en o antes de t"""
+        end = self._start + self.width
+        if t < end:
+            return
+        # Si el salto supera el historial, las ventanas intermedias serían
+        # descartadas de todos modos: se saltan de una vez
+        skipped = int((t - end) // self.width) - self.history.maxlen
+        if skipped > 0:
+            self._close()
+            self._start += skipped * self.width
+        while t >= self._start + self.width:
+            self._close()
+
+    def add(self, x: float, t: float):
+        """Agregar una observación puntual ocurrida en t"""
+        self.roll(t)
+        self._total += x
+        self._weight += 1.0
+        self._count += 1
+
+    def add_interval(self, value: float, t0: float, t1: float):
+        """Agregar un valor constante durante [t0, t1], ponderado por tiempo"""
+        self.roll(t0)
+        while t1 >= self._start + self.width:
+            end = self._start + self.width
+            if end > t0:
+                self._total += value * (end - t0)
+                self._weight += end - t0
+                t0 = end
+            self._close()
+        if t1 > t0:
+            self._total += value * (t1 - t0)
+            self._weight += t1 - t0
+        self._count += 1
+
+    def current(self) -> Window:
+        """Ventana en curso (parcial)"""
+        mean = self._total / self._weight if self._weight > 0 else 0.0
+        return Window(self._start, self._start + self.width, mean, self._count, self._weight)
+
+    def last(self) -> Optional[Window]:
+        """Última ventana cerrada (None si todavía no se cerró ninguna)"""
+        return self.history[-1] if self.history else None
+
+    def completed(self) -> List[Window]:
+        """Ventanas cerradas conservadas, de la más antigua a la más reciente"""
+        return list(self.history)
+
+
+class DecayingWindow:
+    """
+    Promedio con decaimiento exponencial de constante de tiempo tau
+
+    Cada observación (add) o tramo constante (add_interval) pesa
+    e^(-(t_actual - t)/tau), de modo que el promedio sigue cambios de
+    régimen sin guardar historial. Los tramos se integran de forma exacta
+    con el núcleo exponencial, no por muestreo. rate() estima la tasa de
+    observaciones por unidad de tiempo con la misma ponderación.
+    """
+
+    def __init__(self, tau: float, start: float = 0.0):
+        if tau <= 0:
+            raise ValueError(f"tau debe ser positiva, recibido: {tau}")
+        self.tau = tau
+        self.clear(start)
+
+    def clear(self, start: float = 0.0):
+        """Descartar lo acumulado y comenzar de nuevo en start"""
+        self._origin = start
+        self._t = start
+        self._total = 0.0
+        self._weight = 0.0
+
+    def _decay_to(self, t: float):
+        if t > self._t:
+            f = math.exp(-(t - self._t) / self.tau)
+            self._total *= f
+            self._weight *= f
+            self._t = t
+
+    def add(self, x: float, t: float):
+        """Agregar una observación puntual ocurrida en t"""
+        self._decay_to(t)
+        self._total += x
+        self._weight += 1.0
+
+    def add_interval(self, value: float, t0: float, t1: float):
+        """Agregar un valor constante durante [t0, t1]"""
+        self._decay_to(t0)
+        dt = t1 - self._t
+        if dt <= 0:
+            return
+        mass = self.tau * -math.expm1(-dt / self.tau)
+        f = math.exp(-dt / self.tau)
+        self._total = self._total * f + value * mass
+        self._weight = self._weight * f + mass
+        self._t = t1
+
+    def mean(self) -> float:
+        """Promedio ponderado actual (0.0 si no hay datos)"""
+        return self._total / self._weight if self._weight > 0 else 0.0
+
+    def rate(self, t: Optional[float] = None) -> float:
+        """
+        Tasa de observaciones por unidad de tiempo hasta t
+
+        Se normaliza por la masa del núcleo desde el origen, para que la
+        estimación no esté sesgada al principio de la corrida.
+        """
+        t = self._t if t is None else max(t, self._t)
+        elapsed = t - self._origin
+        if elapsed <= 0:
+            return 0.0
+        weight = self._weight * math.exp(-(t - self._t) / self.tau)
+        return weight / (self.tau * -math.expm1(-elapsed / self.tau))
+
+
+class DriftDetector:
+    """
+    Detector de crecimiento lineal sostenido de una magnitud ponderada por tiempo
+
+    Se promedia la magnitud (p. ej. el número en sistema) en lotes de
+    duración fija y se ajusta una recta por mínimos cuadrados a los lotes;
+    la deriva se declara cuando el estadístico t de la pendiente supera
+    t_crit en `patience` cierres de lote consecutivos. Cuando se acumulan
+    2·window lotes se fusionan de a pares y el ancho se duplica, de modo
+    que los lotes crecen con la corrida: la autocorrelación entre lotes de
+    un sistema estable se diluye, mientras que la tendencia de uno
+    inestable se vuelve cada vez más significativa. El costo es O(1)
+    amortizado por actualización.
+    """
+
+    def __init__(self, batch: float, window: int = 10, t_crit: float = 8.0,
+                 patience: int = 3, start: float = 0.0):
+        if batch <= 0:
+            raise ValueError(f"El ancho de lote debe ser positivo, recibido: {batch}")
+        if window < 3:
+            raise ValueError(f"window debe ser al menos 3, recibido: {window}")
+        self.batch = batch
+        self.window = window
+        self.t_crit = t_crit
+        self.patience = patience
+        self.means: List[float] = []
+        self.slope = 0.0
+        self.t_stat = 0.0
+        self.diverging = False
+        self._hits = 0
+        self._t = start
+        self._batch_start = start
+        self._acc = 0.0
+
+    def update(self, value: float, t: float) -> bool:
+        """
+        Registrar que la magnitud valió `value` desde la última
+        actualización hasta t
+
+        Retorna:
+            True si ya se detectó deriva
+        """
+        while t >= self._batch_start + self.batch:
+            end = self._batch_start + self.batch
+            self._acc += value * (end - self._t)
+            self._t = end
+            self._close_batch()
+        if t > self._t:
+            self._acc += value * (t - self._t)
+            self._t = t
+        return self.diverging
+
+    def _close_batch(self):
+        self.means.append(self._acc / self.batch)
+        self._acc = 0.0
+        self._batch_start += self.batch
+        if len(self.means) == 2 * self.window:
+            self.means = [(a + b) / 2 for a, b in zip(self.means[0::2], self.means[1::2])]
+            self.batch *= 2
+        if len(self.means) >= self.window:
+            self._test()
+
+    def _test(self):
+        """Pendiente por mínimos cuadrados y su estadístico t"""
+        m = len(self.means)
+        x_mean = (m - 1) / 2
+        y_mean = sum(self.means) / m
+        sxx = sum((i - x_mean) ** 2 for i in range(m))
+        b = sum((i - x_mean) * (y - y_mean) for i, y in enumerate(self.means)) / sxx
+        resid = sum((y - y_mean - b * (i - x_mean)) ** 2 for i, y in enumerate(self.means))
+        se = math.sqrt(resid / ((m - 2) * sxx))
+        self.slope = b / self.batch
+        self.t_stat = b / se if se > 0 else (math.inf if b > 0 else 0.0)
+        self._hits = self._hits + 1 if self.t_stat > self.t_crit else 0
+        if self._hits >= self.patience:
+            self.diverging = True
+
+
+class RegenerativeEstimator:
+    """
+    Estimador de razón sobre ciclos regenerativos i.i.d.
+
+    Cada ciclo aporta un vector de sumas (p. ej. área bajo L, suma de
+    esperas, duración, clientes). Una métrica de estado estacionario es
+    una razón E[Y]/E[X] entre dos de esas sumas, y su intervalo de
+    confianza sale del TLC para (Y - r·X): solo se guardan sumas, sumas de
+    cuadrados y productos cruzados, así que cerrar un ciclo es O(1) y
+    estimadores de corridas independientes se combinan con merge().
+    """
+
+    def __init__(self, fields: Sequence[str]):
+        if len(set(fields)) != len(fields) or not fields:
+            raise ValueError(f"Los campos deben ser no vacíos y distintos, recibido: {fields}")
+        self.fields: Tuple[str, ...] = tuple(fields)
+        self.clear()
+
+    def clear(self):
+        """Descartar todos los ciclos"""
+        k = len(self.fields)
+        self.cycles = 0
+        self._sum = np.zeros(k)
+        self._cross = np.zeros((k, k))
+
+    def add_cycle(self, values: Dict[str, float]):
+        """Agregar las sumas de un ciclo completo"""
+        v = np.array([values[f] for f in self.fields], dtype=float)
+        self.cycles += 1
+        self._sum += v
+        self._cross += np.outer(v, v)
+
+    def merge(self, other: 'RegenerativeEstimator'):
+        """Combinar los ciclos de otro estimador con los mismos campos"""
+        if other.fields != self.fields:
+            raise ValueError("Solo se pueden combinar estimadores con los mismos campos")
+        self.cycles += other.cycles
+        self._sum += other._sum
+        self._cross += other._cross
+
+    @classmethod
+    def merged(cls, estimators: Iterable['RegenerativeEstimator']) -> 'RegenerativeEstimator':
+        """Crear un estimador nuevo con los ciclos de varios (p. ej. réplicas paralelas)"""
+        estimators = list(estimators)
+        if not estimators:
+            raise ValueError("Se requiere al menos un estimador")
+        result = cls(estimators[0].fields)
+        for est in estimators:
+            result.merge(est)
+        return result
+
+    def ratio(self, num: str, den: str, confidence: float = 0.95) -> Tuple[float, float]:
+        """
+        Estimar E[num]/E[den] con su semiancho de confianza
+
+        Retorna:
+            (estimación, semiancho); semiancho = inf con menos de 2 ciclos
+        """
+        if not 0 < confidence < 1:
+            raise ValueError(f"confidence debe estar en (0, 1), recibido: {confidence}")
+        i, j = self.fields.index(num), self.fields.index(den)
+        n = self.cycles
+        if n == 0 or self._sum[j] == 0:
+            return 0.0, math.inf
+        r = self._sum[i] / self._sum[j]
+        if n < 2:
+            return float(r), math.inf
+        mean_i, mean_j = self._sum[i] / n, self._sum[j] / n
+        var_i = (self._cross[i, i] - n * mean_i ** 2) / (n - 1)
+        var_j = (self._cross[j, j] - n * mean_j ** 2) / (n - 1)
+        cov = (self._cross[i, j] - n * mean_i * mean_j) / (n - 1)
+        var = max(0.0, var_i - 2 * r * cov + r * r * var_j)
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        return float(r), float(z * math.sqrt(var / n) / mean_j)
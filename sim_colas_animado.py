@@ -3,49 +3,318 @@ import random
 import itertools
 import warnings
 import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Tuple
+from typing import Callable, List, Optional, Dict, Tuple, Sequence, Union
 
+import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
-from matplotlib.patches import Circle
+from matplotlib.patches import Circle, Rectangle, FancyBboxPatch
+from matplotlib.collections import LineCollection, PatchCollection
 from matplotlib.lines import Line2D
 
+from teoria_colas import stationary_probability_mmc
+from estadisticas_online import (QuantileSketch, OnlineHistogram, TumblingWindow,
+                                  DecayingWindow, DriftDetector, RegenerativeEstimator)
+from submuestreo import downsample_for_axes
+
 # -----------------------------
 # Utilidades de distribución
 # -----------------------------
 
-def expovariate(rate: float) -> float:
+def expovariate(rate: float, rng=random) -> float:
     if rate <= 0:
         return float('inf')
-    u = random.random()
+    u = rng.random()
     while u <= 0.0:
-        u = random.random()
+        u = rng.random()
     return -math.log(u) / rate
 
 # -----------------------------
 # Entidades de simulación
 # -----------------------------
 
-@dataclass
 class Job:
-    id: int
-    t_arrival: float
-    service_time: float
-    t_service_start: Optional[float] = None
-    t_departure: Optional[float] = None
+    """Cliente en el sistema (con __slots__: sin __dict__ por instancia)"""
+    __slots__ = ('id', 't_arrival', 'service_time', 't_service_start', 't_departure')
+
+    def __init__(self, id: int, t_arrival: float, service_time: float,
+                 t_service_start: Optional[float] = None, t_departure: Optional[float] = None):
+        self.id = id
+        self.t_arrival = t_arrival
+        self.service_time = service_time
+        self.t_service_start = t_service_start
+        self.t_departure = t_departure
+
+    def __repr__(self) -> str:
+        return (f"Job(id={self.id}, t_arrival={self.t_arrival}, service_time={self.service_time}, "
+                f"t_service_start={self.t_service_start}, t_departure={self.t_departure})")
 
-@dataclass
 class Server:
-    busy_until: float = 0.0
-    current_job: Optional[Job] = None
+    """Servidor (con __slots__), con tiempo ocupado y servicios completados"""
+    __slots__ = ('busy_until', 'current_job', 'busy_since', 'busy_time', 'completions', 'index', 'retiring')
+
+    def __init__(self, busy_until: float = 0.0, current_job: Optional[Job] = None, index: int = 0):
+        self.busy_until = busy_until
+        self.current_job = current_job
+        # Posición en server_list (la reportan los eventos start/depart)
+        self.index = index
+        # Sobra tras una reconfiguración: termina su servicio y se retira
+        self.retiring = False
+        # Tiempo ocupado (después del warmup) y servicios completados
+        self.busy_since = 0.0
+        self.busy_time = 0.0
+        self.completions = 0
+
+    def __repr__(self) -> str:
+        return (f"Server(busy_until={self.busy_until}, current_job={self.current_job}, "
+                f"busy_time={self.busy_time}, completions={self.completions})")
+
+class JobHistory:
+    """
+    Historial compacto de clientes completados (estructura de arreglos)
+
+    En lugar de conservar un objeto Job por cliente, cada salida agrega una
+    columna a un arreglo NumPy de 5 filas (id, llegada, servicio, inicio de
+    servicio, salida) que crece por duplicación. Las propiedades devuelven
+    vistas sin copia de la parte usada; indexar devuelve un Job
+    reconstruido, para compatibilidad con la antigua lista de Job.
+    """
+    __slots__ = ('_data', '_size')
+    FIELDS = ('id', 't_arrival', 'service_time', 't_service_start', 't_departure')
+
+    def __init__(self, capacity: int = 1024):
+        self._data = np.empty((len(self.FIELDS), max(1, capacity)))
+        self._size = 0
+
+    def append(self, job: Job):
+        if self._size == self._data.shape[1]:
+            grown = np.empty((len(self.FIELDS), 2 * self._size))
+            grown[:, :self._size] = self._data
+            self._data = grown
+        self._data[:, self._size] = (job.id, job.t_arrival, job.service_time,
+                                     job.t_service_start, job.t_departure)
+        self._size += 1
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, i: int) -> Job:
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError(f"Índice fuera de rango: {i}")
+        col = self._data[:, i]
+        return Job(int(col[0]), float(col[1]), float(col[2]), float(col[3]), float(col[4]))
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield self[i]
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._data[0, :self._size].astype(np.int64)
+
+    @property
+    def t_arrival(self) -> np.ndarray:
+        return self._data[1, :self._size]
+
+    @property
+    def service_time(self) -> np.ndarray:
+        return self._data[2, :self._size]
+
+    @property
+    def t_service_start(self) -> np.ndarray:
+        return self._data[3, :self._size]
+
+    @property
+    def t_departure(self) -> np.ndarray:
+        return self._data[4, :self._size]
+
+class EventTrace:
+    """
+    Traza compacta de los eventos de clientes de una simulación
+
+    Cada evento enqueue/start/depart (ver EventSim.subscribe) ocupa una
+    entrada de cuatro arreglos (instante, tipo, id de job, índice de cola o
+    servidor) que crecen por duplicación. Con la traza se puede reproducir
+    la simulación a cualquier velocidad, y en cualquier sentido, sin volver
+    a simular.
+    """
+    __slots__ = ('_time', '_kind', '_job_id', '_index', '_size', '_sim')
+    KINDS = ('enqueue', 'start', 'depart')
+
+    def __init__(self, capacity: int = 1024):
+        capacity = max(1, capacity)
+        self._time = np.empty(capacity)
+        self._kind = np.empty(capacity, dtype=np.int8)
+        self._job_id = np.empty(capacity, dtype=np.int64)
+        self._index = np.empty(capacity, dtype=np.int32)
+        self._size = 0
+        self._sim = None
+
+    def attach(self, sim: 'EventSim'):
+        """
+        Grabar los eventos de sim a partir de ahora
+
+        Los clientes que ya están en el sistema se registran como eventos
+        sintéticos en el instante actual, para que la traza sea autocontenida.
+        """
+        self._sim = sim
+        queues = sim._waiting_queues()
+        in_service = sorted((s.current_job.id, s.index) for s in sim.server_list if s.current_job)
+        for jid, si in in_service:
+            self.append(sim.time, 'enqueue', jid, 0)
+            self.append(sim.time, 'start', jid, si)
+        for qi, q in enumerate(queues):
+            for job in q:
+                self.append(sim.time, 'enqueue', job.id, qi)
+        sim.subscribe(self._on_event)
+
+    def _on_event(self, kind: str, job_id: int, index: int):
+        self.append(self._sim.time, kind, job_id, index)
+
+    def append(self, t: float, kind: str, job_id: int, index: int):
+        if self._size == len(self._time):
+            n = 2 * self._size
+            self._time = np.concatenate([self._time, np.empty(n - self._size)])
+            self._kind = np.concatenate([self._kind, np.empty(n - self._size, dtype=np.int8)])
+            self._job_id = np.concatenate([self._job_id, np.empty(n - self._size, dtype=np.int64)])
+            self._index = np.concatenate([self._index, np.empty(n - self._size, dtype=np.int32)])
+        i = self._size
+        self._time[i] = t
+        self._kind[i] = self.KINDS.index(kind)
+        self._job_id[i] = job_id
+        self._index[i] = index
+        self._size += 1
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def time(self) -> np.ndarray:
+        return self._time[:self._size]
+
+    @property
+    def kind(self) -> np.ndarray:
+        return self._kind[:self._size]
+
+    @property
+    def job_id(self) -> np.ndarray:
+        return self._job_id[:self._size]
+
+    @property
+    def index(self) -> np.ndarray:
+        return self._index[:self._size]
+
+    def replay(self, start: int, stop: int, callback: Callable[[str, int, int], None]):
+        """Entregar los eventos [start, stop) a callback(kind, job_id, index)"""
+        kinds = self.KINDS
+        for k, jid, idx in zip(self._kind[start:stop].tolist(), self._job_id[start:stop].tolist(),
+                               self._index[start:stop].tolist()):
+            callback(kinds[k], jid, idx)
+
+    def wait_means(self) -> np.ndarray:
+        """Wq promedio acumulado tras cada evento (nan antes del primer inicio de servicio)"""
+        t, kind, jid = self.time, self.kind, self.job_id
+        enqueued = kind == 0
+        t_enqueue = np.full(int(jid.max(initial=0)) + 1, np.nan)
+        t_enqueue[jid[enqueued]] = t[enqueued]
+        started = kind == 1
+        waits = np.where(started, t - t_enqueue[jid], 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.cumsum(waits) / np.cumsum(started)
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {'time': self.time, 'kind': self.kind, 'job_id': self.job_id, 'index': self.index}
+
+    @classmethod
+    def from_arrays(cls, time: np.ndarray, kind: np.ndarray, job_id: np.ndarray,
+                    index: np.ndarray) -> 'EventTrace':
+        trace = cls(len(time))
+        n = len(time)
+        trace._time[:n] = time
+        trace._kind[:n] = kind
+        trace._job_id[:n] = job_id
+        trace._index[:n] = index
+        trace._size = n
+        return trace
 
 # -----------------------------
 # Base de simulación por eventos
 # -----------------------------
 
+class DivergenceError(RuntimeError):
+    """
+    La simulación diverge (divergence_policy='raise')
+
+    El atributo partial contiene state() en el instante de la detección.
+    """
+    def __init__(self, message: str, partial: Dict):
+        super().__init__(message)
+        self.partial = partial
+
 class EventSim:
-    def __init__(self, lam: float, mu: float, horizon: float, warmup: float = 0.0):
+    """
+    Base de simulación por eventos discretos
+
+    Opciones comunes (las aceptan también MM1, MMC, MMK1 y MMKC):
+        percentiles: Percentiles (0-100) de W y Wq que reporta state(),
+                     estimados con sketches de memoria acotada
+        store_waits: Si False, no se guardan las listas wait_times,
+                     wait_times_q y departure_times ni el historial
+                     completed (los histogramas hist_w/hist_wq y el
+                     contador served se actualizan igualmente)
+        window:      Ancho de las ventanas consecutivas de L, Lq, W, Wq y
+                     throughput (None: sin ventanas; cuestan varias
+                     actualizaciones por evento)
+        decay_tau:   Constante de tiempo de los promedios con decaimiento
+                     exponencial (None: igual a window; sin ninguno de los
+                     dos no se calculan)
+        report_times: Instantes (en (warmup, horizon]) en los que se guarda
+                     una instantánea de state() en checkpoints, para obtener
+                     métricas a varios horizontes con una sola corrida
+        divergence_policy: Qué hacer si el número en sistema crece
+                     linealmente con significancia estadística: 'warn'
+                     (advertir y seguir), 'stop' (advertir y terminar la
+                     corrida en ese instante), 'raise' (DivergenceError) o
+                     None (sin detección, por defecto). En todos los casos
+                     state() reporta 'unstable'. Es opcional porque con
+                     ρ cerca de 1 el tiempo de relajación (~1/(μ(1−√ρ)²))
+                     se acerca al horizonte y una corrida estable puede
+                     verse como una tendencia lineal
+        divergence_batch: Ancho inicial de los lotes del detector
+                     (None: 50 tiempos medios de servicio)
+        initial_state: Población inicial en t=0: None (sistema vacío),
+                     'stationary' (muestreada de la distribución
+                     estacionaria analítica; solo MM1 y MMC) o un arreglo
+                     P(n), p. ej. state_distribution() de una corrida
+                     previa. Partiendo del estado estacionario no hace
+                     falta warmup
+        seed:        Semilla del generador propio de la simulación (None:
+                     se toma del generador global de random, de modo que
+                     random.seed() antes de construir sigue siendo
+                     reproducible y cada simulación tiene su propio flujo)
+        regenerative_precision: Si se indica, la corrida termina cuando el
+                     semiancho relativo (95%) de L y W por el estimador
+                     regenerativo es menor que este valor (mínimo 30 ciclos)
+    """
+    REGEN_FIELDS = ('area', 'area_q', 'wait', 'wait_q', 'customers', 'length')
+    REGEN_MIN_CYCLES = 30
+
+    def __init__(self, lam: float, mu: float, horizon: float, warmup: float = 0.0,
+                 percentiles: Sequence[float] = (50, 95, 99), store_waits: bool = True,
+                 window: Optional[float] = None, decay_tau: Optional[float] = None,
+                 report_times: Sequence[float] = (),
+                 divergence_policy: Optional[str] = None,
+                 divergence_batch: Optional[float] = None,
+                 initial_state: Union[None, str, Sequence[float]] = None,
+                 seed: Optional[int] = None,
+                 regenerative_precision: Optional[float] = None):
         # Validación de parámetros
         if lam <= 0:
             raise ValueError(f"λ (tasa de llegadas) debe ser positiva, recibido: {lam}")
@@ -57,16 +326,48 @@ class EventSim:
             raise ValueError(f"Periodo de warmup no puede ser negativo, recibido: {warmup}")
         if warmup >= horizon:
             raise ValueError(f"Periodo de warmup ({warmup}) debe ser menor que horizonte ({horizon})")
+        if any(not 0 <= p <= 100 for p in percentiles):
+            raise ValueError(f"Percentiles deben estar entre 0 y 100, recibido: {percentiles}")
+        if window is not None and window <= 0:
+            raise ValueError(f"Ancho de ventana debe ser positivo, recibido: {window}")
+        if decay_tau is not None and decay_tau <= 0:
+            raise ValueError(f"decay_tau debe ser positiva, recibido: {decay_tau}")
+        if divergence_policy not in (None, 'warn', 'stop', 'raise'):
+            raise ValueError(
+                f"Política de divergencia no soportada: {divergence_policy} "
+                f"(use 'warn', 'stop', 'raise' o None)"
+            )
+        if divergence_batch is not None and divergence_batch <= 0:
+            raise ValueError(f"divergence_batch debe ser positivo, recibido: {divergence_batch}")
+        if isinstance(initial_state, str):
+            if initial_state != 'stationary':
+                raise ValueError(f"Estado inicial no soportado: {initial_state} (use 'stationary' o un arreglo P(n))")
+        elif initial_state is not None:
+            probs = np.asarray(initial_state, dtype=float)
+            if probs.ndim != 1 or len(probs) == 0 or np.any(probs < 0) or probs.sum() <= 0:
+                raise ValueError("initial_state debe ser un arreglo P(n) no negativo con suma positiva")
+        if regenerative_precision is not None and regenerative_precision <= 0:
+            raise ValueError(f"regenerative_precision debe ser positiva, recibido: {regenerative_precision}")
+        if any(not warmup < r <= horizon for r in report_times):
+            raise ValueError(
+                f"Instantes de reporte deben estar en (warmup, horizon] = ({warmup}, {horizon}], "
+                f"recibido: {report_times}"
+            )
         
         self.lam = lam
         self.mu = mu
         self.horizon = horizon
         self.warmup = warmup  # Periodo de calentamiento
         self.time = 0.0
-        self.next_arrival = expovariate(self.lam)
+        # Generador propio: réplicas independientes y reproducibles
+        self.rng = random.Random(seed if seed is not None else random.getrandbits(64))
+        self.next_arrival = expovariate(self.lam, self.rng)
         self.jobs_created = 0
         self.jobs: List[Job] = []
-        self.completed: List[Job] = []
+        self.completed = JobHistory()
+        self.served: int = 0
+        # Suscriptores a los eventos de clientes (ver subscribe)
+        self._listeners: List[Callable[[str, int, int], None]] = []
         # Acumuladores para tiempo de espera en cola (Wq) y en sistema (W)
         self.total_wait_q: float = 0.0
         self.count_wait_q: int = 0
@@ -78,6 +379,11 @@ class EventSim:
         self.last_event_time: float = 0.0
         self.last_n_system: int = 0
         self.last_n_queue: int = 0
+        # Tiempo acumulado en cada estado n (para P(n)) y con todos los servidores ocupados
+        self.n_servers: int = 1
+        self.server_list: List[Server] = []
+        self.time_in_state = np.zeros(16)
+        self.time_all_busy: float = 0.0
         # Series temporales para gráficos
         self.time_series: List[float] = []
         self.system_series: List[int] = []
@@ -86,51 +392,528 @@ class EventSim:
         self.wait_times: List[float] = []
         self.wait_times_q: List[float] = []
         self.departure_times: List[float] = []
+        # Sketches de cuantiles de W y Wq (memoria acotada, combinables)
+        self.percentiles: Tuple[float, ...] = tuple(percentiles)
+        self.sketch_w = QuantileSketch()
+        self.sketch_wq = QuantileSketch()
+        # Histogramas en línea de W y Wq (rango inicial ~4 tiempos de servicio)
+        self.store_waits = store_waits
+        self.hist_w = OnlineHistogram(0.0, 4.0 / mu)
+        self.hist_wq = OnlineHistogram(0.0, 4.0 / mu)
+        # Ventanas temporales para monitorear métricas no estacionarias
+        # (opcionales: diccionarios vacíos si no se pidieron)
+        self.window = window
+        self.decay_tau = decay_tau if decay_tau is not None else window
+        self.windows: Dict[str, TumblingWindow] = {}
+        if self.window is not None:
+            self.windows = {key: TumblingWindow(self.window, start=warmup) for key in ('L', 'Lq', 'W', 'Wq')}
+        self.decayed: Dict[str, DecayingWindow] = {}
+        if self.decay_tau is not None:
+            self.decayed = {key: DecayingWindow(self.decay_tau, start=warmup) for key in ('L', 'Lq', 'W', 'Wq')}
+        # Instantáneas de métricas en los instantes de reporte
+        self.report_times: List[float] = sorted(report_times)
+        self._next_report: int = 0
+        self.checkpoints: List[Dict] = []
+        # Población inicial: los clientes con id <= initial_jobs se excluyen
+        # de las estadísticas de espera (no se conoce su llegada real)
+        self.initial_state = initial_state
+        self.initial_jobs: int = 0
+        # Ciclos regenerativos: el sistema se regenera cada vez que se vacía.
+        # Si parte vacío, t=0 ya es un punto de regeneración
+        self.regenerative = RegenerativeEstimator(self.REGEN_FIELDS)
+        self.regenerative_precision = regenerative_precision
+        self.converged: bool = False
+        self._cycle: Optional[Dict[str, float]] = self._new_cycle()
+        self._cycle_time: float = 0.0
+        # Detector de divergencia (crecimiento lineal del número en sistema)
+        self.divergence_policy = divergence_policy
+        self.unstable: bool = False
+        self.drift: Optional[DriftDetector] = None
+        if divergence_policy is not None:
+            self.drift = DriftDetector(divergence_batch if divergence_batch is not None else 50.0 / mu)
         # Flag para indicar si estamos en periodo de warmup
         self._in_warmup: bool = True if warmup > 0 else False
 
     def step(self):
         raise NotImplementedError
     
-    def _update_areas(self):
-        """Actualizar áreas para calcular L y Lq"""
+    def utilization(self) -> float:
+        raise NotImplementedError
+    
+    def _counts(self) -> Tuple[int, int]:
+        """Clientes (en sistema, en cola) en el instante actual"""
+        raise NotImplementedError
+    
+    def state(self) -> Dict:
+        n_system, n_queue = self._counts()
+        # Calcular tiempo efectivo (después del warmup)
+        effective_time = max(0.0, self.time - self.warmup)
+        st = {
+            't': self.time,
+            'in_system': n_system,
+            'in_queue': n_queue,
+            'served': self.served,
+            'rejected': 0,
+            'rho': self.utilization(),
+            'wq_avg': (self.total_wait_q / self.count_wait_q) if self.count_wait_q > 0 else 0.0,
+            'w_avg': (self.total_wait_sys / self.count_wait_sys) if self.count_wait_sys > 0 else 0.0,
+            'lq_avg': (self.area_in_queue / effective_time) if effective_time > 0 else 0.0,
+            'l_avg': (self.area_in_system / effective_time) if effective_time > 0 else 0.0,
+            'p0': (self.time_in_state[0] / effective_time) if effective_time > 0 else 0.0,
+            'p_wait': (self.time_all_busy / effective_time) if effective_time > 0 else 0.0,
+            'unstable': self.unstable,
+        }
+        # Utilización medida por servidor y agregada
+        rho_servers = self.server_utilization()
+        st['rho_servers'] = rho_servers
+        st['rho_measured'] = sum(rho_servers) / len(rho_servers) if rho_servers else 0.0
+        # Percentiles de cola (p. ej. 'w_p95', 'wq_p99')
+        for p in self.percentiles:
+            st[f'w_p{p:g}'] = self.sketch_w.quantile(p / 100)
+            st[f'wq_p{p:g}'] = self.sketch_wq.quantile(p / 100)
+        return st
+    
+    def _update_areas(self, n_system: int, n_queue: int):
+        """
+        Acumular el intervalo desde el último evento y registrar el nuevo estado
+
+        El intervalo [last_event_time, time] se pondera con el estado que
+        rigió durante él (last_n_system/last_n_queue); luego se guardan
+        n_system y n_queue como estado vigente a partir de time.
+        """
         # Solo acumular métricas después del periodo de warmup
         if self._in_warmup and self.time >= self.warmup:
             # Salimos del warmup: reiniciar acumuladores
             self._in_warmup = False
             self.area_in_system = 0.0
             self.area_in_queue = 0.0
+            self.time_in_state[:] = 0.0
+            self.time_all_busy = 0.0
             self.total_wait_q = 0.0
             self.count_wait_q = 0
             self.total_wait_sys = 0.0
             self.count_wait_sys = 0
-            self.last_event_time = self.time
-            return
+            self.sketch_w.clear()
+            self.sketch_wq.clear()
+            self.hist_w.clear()
+            self.hist_wq.clear()
+            # El tramo [warmup, time] sí cuenta, con el estado vigente
+            self.last_event_time = self.warmup
         
         if not self._in_warmup:
             dt = self.time - self.last_event_time
             if dt > 0:
-                self.area_in_system += self.last_n_system * dt
+                n = self.last_n_system
+                self.area_in_system += n * dt
                 self.area_in_queue += self.last_n_queue * dt
+                # Tiempo en cada estado n para P(n); el arreglo crece por duplicación
+                if n >= len(self.time_in_state):
+                    grown = np.zeros(max(2 * len(self.time_in_state), n + 1))
+                    grown[:len(self.time_in_state)] = self.time_in_state
+                    self.time_in_state = grown
+                self.time_in_state[n] += dt
+                if self.windows:
+                    for key, value in (('L', n), ('Lq', self.last_n_queue)):
+                        self.windows[key].add_interval(value, self.last_event_time, self.time)
+                    # W y Wq solo reciben datos en las salidas: se cierran también
+                    # aquí para que nunca queden detrás de las ventanas de L
+                    for key in ('W', 'Wq'):
+                        self.windows[key].roll(self.time)
+                if self.decayed:
+                    for key, value in (('L', n), ('Lq', self.last_n_queue)):
+                        self.decayed[key].add_interval(value, self.last_event_time, self.time)
+                # Todos los servidores ocupados: una llegada tendría que esperar
+                if n - self.last_n_queue >= self.n_servers:
+                    self.time_all_busy += dt
             self.last_event_time = self.time
+        # Los ciclos regenerativos no dependen del warmup
+        regenerated = False
+        if self._cycle is not None:
+            dt = self.time - self._cycle_time
+            self._cycle['area'] += self.last_n_system * dt
+            self._cycle['area_q'] += self.last_n_queue * dt
+        self._cycle_time = self.time
+        if n_system == 0 and self.last_n_system > 0:
+            regenerated = self._close_cycle()
+        # El detector cubre también el warmup: una corrida inestable se
+        # reconoce lo antes posible
+        diverging = self.drift is not None and self.drift.update(self.last_n_system, self.time)
+        self.last_n_system = n_system
+        self.last_n_queue = n_queue
+        if regenerated:
+            # Precisión objetivo alcanzada: terminar en este punto de regeneración
+            self.converged = True
+            self.horizon = self.time
+        if diverging and not self.unstable:
+            self._on_divergence()
+    
+    def _new_cycle(self) -> Dict[str, float]:
+        return {'area': 0.0, 'area_q': 0.0, 'wait': 0.0, 'wait_q': 0.0,
+                'customers': 0, 'start': self.time}
+    
+    def _close_cycle(self) -> bool:
+        """
+        Cerrar el ciclo en curso (el sistema acaba de vaciarse) y abrir otro
+
+        Retorna:
+            True si con este ciclo se alcanzó regenerative_precision
+        """
+        done = False
+        if self._cycle is not None:
+            self._cycle['length'] = self.time - self._cycle['start']
+            self.regenerative.add_cycle(self._cycle)
+            if (self.regenerative_precision is not None
+                    and self.regenerative.cycles >= self.REGEN_MIN_CYCLES):
+                est = self.regenerative_estimates()
+                done = all(est[key][1] <= self.regenerative_precision * est[key][0]
+                           for key in ('L', 'W'))
+        self._cycle = self._new_cycle()
+        return done
+    
+    def regenerative_estimates(self, confidence: float = 0.95) -> Dict:
+        """
+        Estimaciones regenerativas con intervalos de confianza
+
+        Usa solo ciclos completos (entre dos instantes en que el sistema
+        queda vacío), por lo que no tienen sesgo de condición inicial ni
+        requieren warmup.
+
+        Retorna:
+            Diccionario con 'cycles' y (estimación, semiancho) para L, Lq,
+            W, Wq y throughput
+        """
+        reg = self.regenerative
+        return {
+            'cycles': reg.cycles,
+            'L': reg.ratio('area', 'length', confidence),
+            'Lq': reg.ratio('area_q', 'length', confidence),
+            'W': reg.ratio('wait', 'customers', confidence),
+            'Wq': reg.ratio('wait_q', 'customers', confidence),
+            'throughput': reg.ratio('customers', 'length', confidence),
+        }
+    
+    def _on_divergence(self):
+        """Aplicar divergence_policy al detectar crecimiento lineal sostenido"""
+        self.unstable = True
+        msg = (f"⚠️ Simulación divergente en t={self.time:.2f}: el número en sistema crece "
+               f"~{self.drift.slope:.3f} clientes por unidad de tiempo (t = {self.drift.t_stat:.1f}).")
+        if self.divergence_policy == 'raise':
+            raise DivergenceError(msg, self.state())
+        if self.divergence_policy == 'stop':
+            # Acortar el horizonte: los bucles `while sim.time < sim.horizon` terminan
+            self.horizon = self.time
+            msg += " Se detiene la corrida con resultados parciales."
+        warnings.warn(msg, category=UserWarning)
+    
+    def window_metrics(self) -> Dict:
+        """
+        Métricas recientes, consultables durante la corrida
+
+        Retorna:
+            Diccionario con 'window' (última ventana cerrada: t_start,
+            t_end, l, lq, w, wq, throughput; None si aún no se cerró
+            ninguna o si no se pidió window) y 'decayed' (promedios con
+            decaimiento exponencial hasta el instante actual: l, lq, w, wq,
+            throughput; None si no se pidió window ni decay_tau)
+        """
+        ref = self.windows['L'].last() if self.windows else None
+        window = None
+        if ref is not None:
+            # L se acumula al comienzo del paso siguiente y W/Wq en la salida
+            # misma, así que pueden ir una ventana adelante: se toma la suya
+            # con el mismo inicio que la de L
+            last = {key: self._window_at(self.windows[key], ref.t_start) for key in ('Lq', 'W', 'Wq')}
+            window = {
+                't_start': ref.t_start,
+                't_end': ref.t_end,
+                'l': ref.mean,
+                'lq': last['Lq'].mean if last['Lq'] is not None else 0.0,
+                'w': last['W'].mean if last['W'] is not None else 0.0,
+                'wq': last['Wq'].mean if last['Wq'] is not None else 0.0,
+                'throughput': (last['W'].count if last['W'] is not None else 0) / self.window,
+            }
+        decayed = None
+        if self.decayed:
+            decayed = {key.lower(): dw.mean() for key, dw in self.decayed.items()}
+            decayed['throughput'] = self.decayed['W'].rate(self.time)
+        return {'window': window, 'decayed': decayed}
+    
+    @staticmethod
+    def _window_at(win: TumblingWindow, t_start: float):
+        """Ventana cerrada de win que empieza en t_start (None si no se conserva)"""
+        for w in reversed(win.history):
+            if w.t_start <= t_start + win.width / 2:
+                return w if abs(w.t_start - t_start) < win.width / 2 else None
+        return None
+    
+    def _process_checkpoints(self, t_next: float):
+        """
+        Tomar las instantáneas pendientes anteriores o iguales a t_next
+
+        Se llama antes de avanzar el reloj al próximo evento: el estado no
+        cambia hasta t_next, así que basta con cerrar el intervalo parcial
+        hasta cada instante de reporte y leer los acumuladores.
+        """
+        while self._next_report < len(self.report_times) and self.report_times[self._next_report] <= t_next:
+            self.time = self.report_times[self._next_report]
+            self._update_areas(self.last_n_system, self.last_n_queue)
+            self.checkpoints.append(self.state())
+            self._next_report += 1
+    
+    def _advance_to_horizon(self):
+        """Llevar el reloj al horizonte cerrando el último intervalo"""
+        self.time = self.horizon
+        self._update_areas(self.last_n_system, self.last_n_queue)
+    
+    def state_distribution(self) -> np.ndarray:
+        """
+        Distribución P(n) ponderada por tiempo del número en el sistema
+
+        Retorna:
+            Arreglo con P(n) para n = 0..máximo observado (vacío si aún no
+            transcurrió tiempo después del warmup)
+        """
+        observed = np.nonzero(self.time_in_state)[0]
+        if len(observed) == 0:
+            return np.zeros(0)
+        dist = self.time_in_state[:observed[-1] + 1]
+        return dist / dist.sum()
     
     def _record_state(self):
         """Registrar estado actual para series temporales"""
         # Solo registrar después del warmup
         if not self._in_warmup:
-            st = self.state()
             self.time_series.append(self.time)
-            self.system_series.append(st['in_system'])
-            self.queue_series.append(st['in_queue'])
+            self.system_series.append(self.last_n_system)
+            self.queue_series.append(self.last_n_queue)
+
+    def _admit(self, job: Job):
+        """Ingresar job al sistema (cola o servicio) según la política del modelo"""
+        raise NotImplementedError
+    
+    def _stationary_probability(self, n: int) -> float:
+        """P(n) estacionaria analítica, para initial_state='stationary'"""
+        raise ValueError(
+            f"{type(self).__name__} no tiene distribución estacionaria analítica; "
+            f"pase initial_state como arreglo P(n) (p. ej. de state_distribution())"
+        )
+    
+    def _draw_initial_population(self) -> int:
+        """Muestrear el número inicial en sistema por inversión de la CDF"""
+        u = self.rng.random()
+        if isinstance(self.initial_state, str):
+            n, cdf = 0, self._stationary_probability(0)
+            while u > cdf:
+                n += 1
+                p = self._stationary_probability(n)
+                if p == 0.0:
+                    break
+                cdf += p
+            return n
+        cdf = np.cumsum(np.asarray(self.initial_state, dtype=float))
+        return int(np.searchsorted(cdf, u * cdf[-1], side='right'))
+    
+    def _place_initial_jobs(self):
+        """
+        Poblar el sistema en t=0 según initial_state
+
+        Cada modelo lo llama al final de su constructor. Los clientes se
+        ingresan con la misma política que las llegadas (en JSQ quedan
+        balanceados) y, por falta de memoria de la exponencial, el tiempo
+        de servicio nuevo de los que quedan en servicio es un residual
+        exacto.
+        """
+        if self.initial_state is None:
+            return
+        n = self._draw_initial_population()
+        self.initial_jobs = n
+        if n > 0:
+            # El primer ciclo regenerativo empieza cuando el sistema se vacíe
+            self._cycle = None
+        for _ in range(n):
+            self._admit(self._new_job())
+        self.last_n_system, self.last_n_queue = self._counts()
+    
+    def subscribe(self, callback: Callable[[str, int, int], None]):
+        """
+        Registrar callback(kind, job_id, index) para los cambios de los clientes
+
+        kind es 'enqueue' (index = número de cola), 'start' o 'depart'
+        (index = posición del servidor en server_list). Las colas son FIFO,
+        así que 'start' siempre corresponde al primero de la cola del job.
+        Permite seguir el sistema por deltas sin recorrer colas y servidores.
+        """
+        self._listeners.append(callback)
+
+    def record_trace(self) -> EventTrace:
+        """Empezar a grabar los eventos de clientes en una EventTrace"""
+        trace = EventTrace()
+        trace.attach(self)
+        return trace
+
+    def unsubscribe(self, callback: Callable[[str, int, int], None]):
+        """Dejar de notificar a callback"""
+        self._listeners.remove(callback)
+
+    def _emit(self, kind: str, job_id: int, index: int):
+        for callback in self._listeners:
+            callback(kind, job_id, index)
 
     def _new_job(self) -> Job:
         self.jobs_created += 1
         return Job(
             id=self.jobs_created,
             t_arrival=self.time,
-            service_time=expovariate(self.mu),
+            service_time=expovariate(self.mu, self.rng),
         )
     
+    def _start_service(self, server: Server, job: Job):
+        """Asignar job a server y programar su salida"""
+        self._record_service_start(job)
+        self._emit('start', job.id, server.index)
+        server.current_job = job
+        server.busy_until = self.time + job.service_time
+        server.busy_since = self.time
+    
+    def _end_service(self, server: Server):
+        """Completar el servicio en curso de server y liberarlo"""
+        self._record_departure(server.current_job)
+        self._emit('depart', server.current_job.id, server.index)
+        # Tiempo ocupado recortado al periodo posterior al warmup
+        start = max(server.busy_since, self.warmup)
+        if self.time > start:
+            server.busy_time += self.time - start
+        if self.time >= self.warmup:
+            server.completions += 1
+        server.current_job = None
+        if server.retiring:
+            self._prune_servers()
+
+    def reconfigure(self, lam: Optional[float] = None, mu: Optional[float] = None,
+                    c: Optional[int] = None, k: Optional[int] = None):
+        """
+        Cambiar parámetros de la simulación en curso, sin reiniciarla
+
+        Las tasas rigen desde ahora: por falta de memoria de la exponencial
+        se vuelven a muestrear la próxima llegada y los servicios pendientes
+        (en curso y en cola). Los servidores nuevos empiezan a atender de
+        inmediato; los que sobran terminan su servicio actual y se retiran,
+        y los clientes de colas retiradas se reasignan al final de las que
+        quedan. Las métricas acumuladas mezclan ambos regímenes.
+
+        Parámetros:
+            lam: Nueva tasa de llegadas (λ)
+            mu: Nueva tasa de servicio (μ)
+            c: Nuevos servidores (por cola en M/M/k/c)
+            k: Nuevas colas (M/M/k/1 y M/M/k/c)
+        """
+        if lam is not None and lam <= 0:
+            raise ValueError(f"Tasa de llegadas (λ) debe ser positiva, recibido: {lam}")
+        if mu is not None and mu <= 0:
+            raise ValueError(f"Tasa de servicio (μ) debe ser positiva, recibido: {mu}")
+        if c is not None and c <= 0:
+            raise ValueError(f"Número de servidores (c) debe ser positivo, recibido: {c}")
+        if k is not None and k <= 0:
+            raise ValueError(f"Número de colas (k) debe ser positivo, recibido: {k}")
+        if c is not None or k is not None:
+            self._resize(c, k)
+        if lam is not None:
+            self.lam = lam
+            self.next_arrival = self.time + expovariate(lam, self.rng)
+        if mu is not None:
+            self.mu = mu
+            for srv in self.server_list:
+                if srv.current_job:
+                    srv.busy_until = self.time + expovariate(mu, self.rng)
+                    srv.current_job.service_time = srv.busy_until - srv.current_job.t_service_start
+            for q in self._waiting_queues():
+                for job in q:
+                    job.service_time = expovariate(mu, self.rng)
+
+    def _waiting_queues(self) -> List[List[Job]]:
+        return self.queues if hasattr(self, 'queues') else [self.queue]
+
+    def _resize(self, c: Optional[int], k: Optional[int]):
+        """Cambiar la cantidad de servidores o colas (cada modelo define cuáles admite)"""
+        raise ValueError(f"{type(self).__name__} no admite cambiar c ni k")
+
+    def _prune_servers(self):
+        """Quitar del final los servidores retirados que ya quedaron libres"""
+
+    def _reindex_servers(self):
+        for i, srv in enumerate(self.server_list):
+            srv.index = i
+    
+    def next_event_time(self) -> float:
+        """Instante del próximo evento ya programado (llegada o salida); inf si pasa el horizonte"""
+        t = min([self.next_arrival] + [s.busy_until for s in self.server_list if s.current_job])
+        return t if t < self.horizon else float('inf')
+
+    def event_rate(self) -> float:
+        """Tasa instantánea de eventos: llegadas más salidas de los servidores ocupados"""
+        if self.time >= self.horizon:
+            return 0.0
+        busy = sum(1 for s in self.server_list if s.current_job)
+        return self.lam + self.mu * busy
+
+    def server_utilization(self) -> List[float]:
+        """
+        Utilización medida de cada servidor (fracción de tiempo ocupado)
+
+        Incluye el servicio en curso hasta el instante actual; el orden es
+        el de server_list (en MMKC, cola por cola).
+        """
+        effective_time = self.time - self.warmup
+        if effective_time <= 0:
+            return [0.0] * len(self.server_list)
+        utils = []
+        for s in self.server_list:
+            busy = s.busy_time
+            if s.current_job is not None:
+                busy += max(0.0, self.time - max(s.busy_since, self.warmup))
+            utils.append(busy / effective_time)
+        return utils
+    
+    def _record_service_start(self, job: Job):
+        """Marcar el inicio de servicio de job y acumular su espera en cola"""
+        job.t_service_start = self.time
+        # Acumular espera en cola (solo después del warmup y sin población inicial)
+        if not self._in_warmup and job.id > self.initial_jobs:
+            self.total_wait_q += (job.t_service_start - job.t_arrival)
+            self.count_wait_q += 1
+    
+    def _record_departure(self, job: Job):
+        """Marcar la salida de job y acumular su tiempo en sistema"""
+        job.t_departure = self.time
+        self.served += 1
+        if self._cycle is not None:
+            self._cycle['wait'] += job.t_departure - job.t_arrival
+            self._cycle['wait_q'] += job.t_service_start - job.t_arrival
+            self._cycle['customers'] += 1
+        if self.store_waits:
+            self.completed.append(job)
+        wait_sys = job.t_departure - job.t_arrival
+        wait_q = job.t_service_start - job.t_arrival if job.t_service_start is not None else 0.0
+        # Acumular tiempo en sistema (solo después del warmup y sin población inicial)
+        if not self._in_warmup and job.id > self.initial_jobs:
+            self.total_wait_sys += wait_sys
+            self.count_wait_sys += 1
+            self.sketch_w.add(wait_sys)
+            self.sketch_wq.add(wait_q)
+            self.hist_w.add(wait_sys)
+            self.hist_wq.add(wait_q)
+            if self.windows:
+                self.windows['W'].add(wait_sys, self.time)
+                self.windows['Wq'].add(wait_q, self.time)
+            if self.decayed:
+                self.decayed['W'].add(wait_sys, self.time)
+                self.decayed['Wq'].add(wait_q, self.time)
+            # Registrar para gráficos
+            if self.store_waits:
+                self.departure_times.append(self.time)
+                self.wait_times.append(wait_sys)
+                self.wait_times_q.append(wait_q)
+    
     def export_results(self, filename: str):
         """Exportar resultados de simulación a JSON"""
         st = self.state()
@@ -145,6 +928,9 @@ class EventSim:
             },
             'metrics': {
                 'rho': st.get('rho', 0.0),
+                'rho_measured': st.get('rho_measured', 0.0),
+                'rho_servers': st.get('rho_servers', []),
+                'completions': [srv.completions for srv in self.server_list],
                 'L_avg': st.get('l_avg', 0.0),
                 'Lq_avg': st.get('lq_avg', 0.0),
                 'W_avg': st.get('w_avg', 0.0),
@@ -153,6 +939,11 @@ class EventSim:
                 'rejected': st.get('rejected', 0),
                 'simulation_time': self.time,
                 'effective_time': effective_time,
+                'P0': st.get('p0', 0.0),
+                'P_wait': st.get('p_wait', 0.0),
+                'P_n': self.state_distribution().tolist(),
+                'unstable': self.unstable,
+                'percentiles': {k: v for k, v in st.items() if k.startswith(('w_p', 'wq_p'))},
             },
             'time_series': {
                 't': self.time_series,
@@ -163,7 +954,8 @@ class EventSim:
                 'W': self.wait_times,
                 'Wq': self.wait_times_q,
                 'departure_times': self.departure_times,
-            }
+            },
+            'checkpoints': self.checkpoints,
         }
         
         with open(filename, 'w', encoding='utf-8') as f:
@@ -176,10 +968,12 @@ class EventSim:
 # -----------------------------
 
 class MM1(EventSim):
-    def __init__(self, lam: float, mu: float, horizon: float, warmup: float = 0.0):
-        super().__init__(lam, mu, horizon, warmup)
+    def __init__(self, lam: float, mu: float, horizon: float, warmup: float = 0.0, **options):
+        super().__init__(lam, mu, horizon, warmup, **options)
         self.server = Server()
+        self.server_list = [self.server]
         self.queue: List[Job] = []
+        self._place_initial_jobs()
         
         # Advertencia de sistema inestable
         rho = lam / mu
@@ -193,82 +987,55 @@ class MM1(EventSim):
     def utilization(self) -> float:
         return min(1.0, self.lam / self.mu) if self.mu > 0 else 0.0
 
-    def state(self) -> Dict:
-        n_system = len(self.queue) + (1 if self.server.current_job else 0)
+    def _stationary_probability(self, n: int) -> float:
+        return stationary_probability_mmc(self.lam, self.mu, 1, n)
+
+    def _counts(self) -> Tuple[int, int]:
         n_queue = len(self.queue)
-        # Calcular tiempo efectivo (después del warmup)
-        effective_time = max(0.0, self.time - self.warmup)
-        return {
-            't': self.time,
-            'in_system': n_system,
-            'in_queue': n_queue,
-            'served': len(self.completed),
-            'rejected': 0,
-            'rho': self.utilization(),
-            'wq_avg': (self.total_wait_q / self.count_wait_q) if self.count_wait_q > 0 else 0.0,
-            'w_avg': (self.total_wait_sys / self.count_wait_sys) if self.count_wait_sys > 0 else 0.0,
-            'lq_avg': (self.area_in_queue / effective_time) if effective_time > 0 else 0.0,
-            'l_avg': (self.area_in_system / effective_time) if effective_time > 0 else 0.0,
-        }
+        return n_queue + (1 if self.server.current_job else 0), n_queue
+
+    def _admit(self, job: Job):
+        self.queue.append(job)
+        self._emit('enqueue', job.id, 0)
+        self._maybe_start_service()
 
     def _maybe_start_service(self):
         if (self.server.current_job is None) and self.queue:
             job = self.queue.pop(0)
-            job.t_service_start = self.time
-            # Acumular espera en cola (solo después del warmup)
-            if not self._in_warmup:
-                self.total_wait_q += (job.t_service_start - job.t_arrival)
-                self.count_wait_q += 1
-            self.server.current_job = job
-            self.server.busy_until = self.time + job.service_time
+            self._start_service(self.server, job)
 
     def step(self):
         # Actualizar áreas antes del evento
-        self.last_n_system = len(self.queue) + (1 if self.server.current_job else 0)
-        self.last_n_queue = len(self.queue)
-        self._update_areas()
+        self._update_areas(len(self.queue) + (1 if self.server.current_job else 0), len(self.queue))
         self._record_state()
         
         # Próximo evento: llegada o salida
         t_depart = self.server.busy_until if self.server.current_job else float('inf')
-        if self.next_arrival <= t_depart and self.next_arrival <= self.horizon:
+        self._process_checkpoints(min(self.next_arrival, t_depart, self.horizon))
+        if min(self.next_arrival, t_depart) >= self.horizon:
+            self._advance_to_horizon()
+            return
+        if self.next_arrival <= t_depart:
             # Llegada
             self.time = self.next_arrival
-            job = self._new_job()
-            self.queue.append(job)
-            self.next_arrival = self.time + expovariate(self.lam)
-            self._maybe_start_service()
+            self._admit(self._new_job())
+            self.next_arrival = self.time + expovariate(self.lam, self.rng)
         else:
-            # Salida (si existe)
-            if t_depart == float('inf'):
-                # No más eventos
-                self.time = self.horizon
-                return
+            # Salida
             self.time = t_depart
-            job = self.server.current_job
-            if job:
-                job.t_departure = self.time
-                self.completed.append(job)
-                # Acumular tiempo en sistema (solo después del warmup)
-                wait_sys = job.t_departure - job.t_arrival
-                wait_q = job.t_service_start - job.t_arrival if job.t_service_start else 0.0
-                if not self._in_warmup:
-                    self.total_wait_sys += wait_sys
-                    self.count_wait_sys += 1
-                    # Registrar para gráficos
-                    self.departure_times.append(self.time)
-                    self.wait_times.append(wait_sys)
-                    self.wait_times_q.append(wait_q)
-            self.server.current_job = None
+            self._end_service(self.server)
             self._maybe_start_service()
 
 class MMC(EventSim):
-    def __init__(self, lam: float, mu: float, c: int, horizon: float, warmup: float = 0.0):
+    def __init__(self, lam: float, mu: float, c: int, horizon: float, warmup: float = 0.0, **options):
         if c <= 0:
             raise ValueError(f"Número de servidores (c) debe ser positivo, recibido: {c}")
-        super().__init__(lam, mu, horizon, warmup)
-        self.servers: List[Server] = [Server() for _ in range(c)]
+        super().__init__(lam, mu, horizon, warmup, **options)
+        self.servers: List[Server] = [Server(index=i) for i in range(c)]
+        self.n_servers = c
+        self.server_list = self.servers
         self.queue: List[Job] = []
+        self._place_initial_jobs()
         
         # Advertencia de sistema inestable
         rho = lam / (mu * c)
@@ -283,44 +1050,47 @@ class MMC(EventSim):
         c = len(self.servers)
         return min(1.0, self.lam / (self.mu * c)) if self.mu > 0 and c > 0 else 0.0
 
-    def state(self) -> Dict:
+    def _stationary_probability(self, n: int) -> float:
+        return stationary_probability_mmc(self.lam, self.mu, len(self.servers), n)
+
+    def _counts(self) -> Tuple[int, int]:
         busy = sum(1 for s in self.servers if s.current_job)
-        n_system = len(self.queue) + busy
-        # Calcular tiempo efectivo (después del warmup)
-        effective_time = max(0.0, self.time - self.warmup)
-        return {
-            't': self.time,
-            'in_system': n_system,
-            'in_queue': len(self.queue),
-            'served': len(self.completed),
-            'rejected': 0,
-            'rho': self.utilization(),
-            'wq_avg': (self.total_wait_q / self.count_wait_q) if self.count_wait_q > 0 else 0.0,
-            'w_avg': (self.total_wait_sys / self.count_wait_sys) if self.count_wait_sys > 0 else 0.0,
-            'lq_avg': (self.area_in_queue / effective_time) if effective_time > 0 else 0.0,
-            'l_avg': (self.area_in_system / effective_time) if effective_time > 0 else 0.0,
-        }
+        return len(self.queue) + busy, len(self.queue)
+
+    def _admit(self, job: Job):
+        self.queue.append(job)
+        self._emit('enqueue', job.id, 0)
+        self._maybe_start_service()
 
     def _maybe_start_service(self):
         for s in self.servers:
             if not self.queue:
                 break
-            if s.current_job is None:
+            if s.current_job is None and not s.retiring:
                 job = self.queue.pop(0)
-                job.t_service_start = self.time
-                # Acumular espera en cola (solo después del warmup)
-                if not self._in_warmup:
-                    self.total_wait_q += (job.t_service_start - job.t_arrival)
-                    self.count_wait_q += 1
-                s.current_job = job
-                s.busy_until = self.time + job.service_time
+                self._start_service(s, job)
+
+    def _resize(self, c: Optional[int], k: Optional[int]):
+        if k is not None:
+            raise ValueError("M/M/c no tiene colas paralelas (k)")
+        for s in self.servers:
+            s.retiring = False
+        while len(self.servers) < c:
+            self.servers.append(Server(index=len(self.servers)))
+        for s in self.servers[c:]:
+            s.retiring = True
+        self.n_servers = c
+        self._prune_servers()
+        self._maybe_start_service()
+
+    def _prune_servers(self):
+        while self.servers[-1].retiring and self.servers[-1].current_job is None:
+            self.servers.pop()
 
     def step(self):
         # Actualizar áreas
         busy = sum(1 for s in self.servers if s.current_job)
-        self.last_n_system = len(self.queue) + busy
-        self.last_n_queue = len(self.queue)
-        self._update_areas()
+        self._update_areas(len(self.queue) + busy, len(self.queue))
         self._record_state()
         
         # Calcular próxima salida
@@ -333,55 +1103,43 @@ class MMC(EventSim):
         
         # Elegir mínimo entre llegada y salida
         t_next = min(self.next_arrival, next_depart)
+        self._process_checkpoints(min(t_next, self.horizon))
         
         # Manejo unificado de fin de simulación
         if t_next >= self.horizon:
-            self.time = self.horizon
+            self._advance_to_horizon()
             return
         
         if self.next_arrival <= next_depart:
             # Llegada
             self.time = self.next_arrival
-            job = self._new_job()
-            self.queue.append(job)
-            self.next_arrival = self.time + expovariate(self.lam)
-            self._maybe_start_service()
+            self._admit(self._new_job())
+            self.next_arrival = self.time + expovariate(self.lam, self.rng)
         else:
             # Salida
             if depart_server_idx is None:
                 # No hay más eventos de salida, avanzar al horizonte
-                self.time = self.horizon
+                self._advance_to_horizon()
                 return
             self.time = next_depart
             s = self.servers[depart_server_idx]
-            job = s.current_job
-            if job:
-                job.t_departure = self.time
-                self.completed.append(job)
-                wait_sys = job.t_departure - job.t_arrival
-                wait_q = job.t_service_start - job.t_arrival if job.t_service_start else 0.0
-                # Acumular tiempo en sistema (solo después del warmup)
-                if not self._in_warmup:
-                    self.total_wait_sys += wait_sys
-                    self.count_wait_sys += 1
-                    # Registrar para gráficos
-                    self.departure_times.append(self.time)
-                    self.wait_times.append(wait_sys)
-                    self.wait_times_q.append(wait_q)
-            s.current_job = None
+            self._end_service(s)
             self._maybe_start_service()
 
 class MMK1(EventSim):
     """
     k colas paralelas, 1 servidor por cola, asignación por cola más corta.
     """
-    def __init__(self, lam: float, mu: float, k: int, horizon: float, warmup: float = 0.0):
+    def __init__(self, lam: float, mu: float, k: int, horizon: float, warmup: float = 0.0, **options):
         if k <= 0:
             raise ValueError(f"Número de colas (k) debe ser positivo, recibido: {k}")
-        super().__init__(lam, mu, horizon, warmup)
+        super().__init__(lam, mu, horizon, warmup, **options)
         self.k = k
-        self.servers: List[Server] = [Server() for _ in range(k)]
+        self.servers: List[Server] = [Server(index=i) for i in range(k)]
+        self.n_servers = k
+        self.server_list = self.servers
         self.queues: List[List[Job]] = [[] for _ in range(k)]
+        self._place_initial_jobs()
         
         # Advertencia de sistema inestable
         rho_per_queue = (lam / k) / mu
@@ -396,44 +1154,64 @@ class MMK1(EventSim):
         # Carga promedio por servidor (asumiendo distribución equitativa)
         return min(1.0, (self.lam / self.k) / self.mu) if self.k > 0 and self.mu > 0 else 0.0
 
-    def state(self) -> Dict:
+    def _counts(self) -> Tuple[int, int]:
         busy = sum(1 for s in self.servers if s.current_job)
         n_queue = sum(len(q) for q in self.queues)
-        # Calcular tiempo efectivo (después del warmup)
-        effective_time = max(0.0, self.time - self.warmup)
-        return {
-            't': self.time,
-            'in_system': n_queue + busy,
-            'in_queue': n_queue,
-            'served': len(self.completed),
-            'rejected': 0,
-            'rho': self.utilization(),
-            'wq_avg': (self.total_wait_q / self.count_wait_q) if self.count_wait_q > 0 else 0.0,
-            'w_avg': (self.total_wait_sys / self.count_wait_sys) if self.count_wait_sys > 0 else 0.0,
-            'lq_avg': (self.area_in_queue / effective_time) if effective_time > 0 else 0.0,
-            'l_avg': (self.area_in_system / effective_time) if effective_time > 0 else 0.0,
-        }
+        return n_queue + busy, n_queue
+
+    def _admit(self, job: Job):
+        # Política determinista (menor índice) en caso de empate; solo colas activas
+        lengths = [len(q) + (1 if s.current_job else 0)
+                   for q, s in zip(self.queues[:self.k], self.servers[:self.k])]
+        m = min(lengths)
+        # Seleccionar el primer índice con longitud mínima (determinista)
+        idx = next(i for i, L in enumerate(lengths) if L == m)
+        self.queues[idx].append(job)
+        self._emit('enqueue', job.id, idx)
+        self._maybe_start_service(idx)
 
     def _maybe_start_service(self, idx: int):
+        if idx >= self.k:
+            return  # Cola retirada
         s = self.servers[idx]
         q = self.queues[idx]
         if s.current_job is None and q:
             job = q.pop(0)
-            job.t_service_start = self.time
-            # Acumular espera en cola (solo después del warmup)
-            if not self._in_warmup:
-                self.total_wait_q += (job.t_service_start - job.t_arrival)
-                self.count_wait_q += 1
-            s.current_job = job
-            s.busy_until = self.time + job.service_time
+            self._start_service(s, job)
+
+    def _resize(self, c: Optional[int], k: Optional[int]):
+        if c is not None:
+            raise ValueError("M/M/k/1 tiene un servidor por cola; use k")
+        for s in self.servers:
+            s.retiring = False
+        while len(self.queues) < k:
+            self.queues.append([])
+            self.servers.append(Server(index=len(self.servers)))
+        for s in self.servers[k:]:
+            s.retiring = True
+        self.k = k
+        self.n_servers = k
+        # Los que esperaban en colas retiradas se reasignan por JSQ
+        moved = [job for q in self.queues[k:] for job in q]
+        for q in self.queues[k:]:
+            q.clear()
+        for job in moved:
+            self._admit(job)
+        self._prune_servers()
+        for idx in range(k):
+            self._maybe_start_service(idx)
+
+    def _prune_servers(self):
+        while (len(self.servers) > self.k and self.servers[-1].current_job is None
+               and not self.queues[-1]):
+            self.servers.pop()
+            self.queues.pop()
 
     def step(self):
         # Actualizar áreas
         busy = sum(1 for s in self.servers if s.current_job)
         n_queue = sum(len(q) for q in self.queues)
-        self.last_n_system = n_queue + busy
-        self.last_n_queue = n_queue
-        self._update_areas()
+        self._update_areas(n_queue + busy, n_queue)
         self._record_state()
         
         # Próxima salida por cola
@@ -445,62 +1223,45 @@ class MMK1(EventSim):
                 idx_dep = i
         
         t_next = min(self.next_arrival, next_depart)
+        self._process_checkpoints(min(t_next, self.horizon))
         
         # Manejo unificado de fin de simulación
         if t_next >= self.horizon:
-            self.time = self.horizon
+            self._advance_to_horizon()
             return
         
         if self.next_arrival <= next_depart:
             self.time = self.next_arrival
-            job = self._new_job()
-            # Política determinista (menor índice) en caso de empate
-            lengths = [len(q) + (1 if s.current_job else 0) for q, s in zip(self.queues, self.servers)]
-            m = min(lengths)
-            # Seleccionar el primer índice con longitud mínima (determinista)
-            idx = next(i for i, L in enumerate(lengths) if L == m)
-            self.queues[idx].append(job)
-            self.next_arrival = self.time + expovariate(self.lam)
-            self._maybe_start_service(idx)
+            self._admit(self._new_job())
+            self.next_arrival = self.time + expovariate(self.lam, self.rng)
         else:
             # Salida
             if idx_dep is None:
                 # No hay más eventos de salida, avanzar al horizonte
-                self.time = self.horizon
+                self._advance_to_horizon()
                 return
             self.time = next_depart
             s = self.servers[idx_dep]
-            job = s.current_job
-            if job:
-                job.t_departure = self.time
-                self.completed.append(job)
-                wait_sys = job.t_departure - job.t_arrival
-                wait_q = job.t_service_start - job.t_arrival if job.t_service_start else 0.0
-                # Acumular tiempo en sistema (solo después del warmup)
-                if not self._in_warmup:
-                    self.total_wait_sys += wait_sys
-                    self.count_wait_sys += 1
-                    # Registrar para gráficos
-                    self.departure_times.append(self.time)
-                    self.wait_times.append(wait_sys)
-                    self.wait_times_q.append(wait_q)
-            s.current_job = None
+            self._end_service(s)
             self._maybe_start_service(idx_dep)
 
 class MMKC(EventSim):
     """
     k colas, c servidores por cola (servicio por cola), asignación a cola más corta.
     """
-    def __init__(self, lam: float, mu: float, k: int, c: int, horizon: float, warmup: float = 0.0):
+    def __init__(self, lam: float, mu: float, k: int, c: int, horizon: float, warmup: float = 0.0, **options):
         if k <= 0:
             raise ValueError(f"Número de colas (k) debe ser positivo, recibido: {k}")
         if c <= 0:
             raise ValueError(f"Número de servidores por cola (c) debe ser positivo, recibido: {c}")
-        super().__init__(lam, mu, horizon, warmup)
+        super().__init__(lam, mu, horizon, warmup, **options)
         self.k = k
         self.c = c
-        self.servers: List[List[Server]] = [[Server() for _ in range(c)] for _ in range(k)]
+        self.servers: List[List[Server]] = [[Server(index=qi * c + si) for si in range(c)] for qi in range(k)]
+        self.n_servers = k * c
+        self.server_list = [s for col in self.servers for s in col]
         self.queues: List[List[Job]] = [[] for _ in range(k)]
+        self._place_initial_jobs()
         
         # ✅ Advertencia de sistema inestable
         total_servers = k * c
@@ -516,46 +1277,74 @@ class MMKC(EventSim):
         total_servers = self.k * self.c
         return min(1.0, self.lam / (self.mu * total_servers)) if total_servers > 0 and self.mu > 0 else 0.0
 
-    def state(self) -> Dict:
+    def _counts(self) -> Tuple[int, int]:
         busy = sum(1 for col in self.servers for s in col if s.current_job)
         n_queue = sum(len(q) for q in self.queues)
-        # Calcular tiempo efectivo (después del warmup)
-        effective_time = max(0.0, self.time - self.warmup)
-        return {
-            't': self.time,
-            'in_system': n_queue + busy,
-            'in_queue': n_queue,
-            'served': len(self.completed),
-            'rejected': 0,
-            'rho': self.utilization(),
-            'wq_avg': (self.total_wait_q / self.count_wait_q) if self.count_wait_q > 0 else 0.0,
-            'w_avg': (self.total_wait_sys / self.count_wait_sys) if self.count_wait_sys > 0 else 0.0,
-            'lq_avg': (self.area_in_queue / effective_time) if effective_time > 0 else 0.0,
-            'l_avg': (self.area_in_system / effective_time) if effective_time > 0 else 0.0,
-        }
+        return n_queue + busy, n_queue
+
+    def _admit(self, job: Job):
+        # Política determinista (menor índice) en caso de empate; solo colas activas
+        lengths = [len(q) + sum(1 for s in col if s.current_job)
+                   for q, col in zip(self.queues[:self.k], self.servers[:self.k])]
+        m = min(lengths)
+        # Seleccionar el primer índice con longitud mínima (determinista)
+        qi = next(i for i, L in enumerate(lengths) if L == m)
+        self.queues[qi].append(job)
+        self._emit('enqueue', job.id, qi)
+        self._maybe_start_service(qi)
 
     def _maybe_start_service(self, qi: int):
+        if qi >= self.k:
+            return  # Cola retirada
         q = self.queues[qi]
         if not q:
             return
         for s in self.servers[qi]:
-            if s.current_job is None and q:
+            if s.current_job is None and not s.retiring and q:
                 job = q.pop(0)
-                job.t_service_start = self.time
-                # Acumular espera en cola (solo después del warmup)
-                if not self._in_warmup:
-                    self.total_wait_q += (job.t_service_start - job.t_arrival)
-                    self.count_wait_q += 1
-                s.current_job = job
-                s.busy_until = self.time + job.service_time
+                self._start_service(s, job)
+
+    def _resize(self, c: Optional[int], k: Optional[int]):
+        c = self.c if c is None else c
+        k = self.k if k is None else k
+        while len(self.queues) < k:
+            self.queues.append([])
+            self.servers.append([])
+        for qi, col in enumerate(self.servers):
+            for s in col:
+                s.retiring = qi >= k
+            if qi < k:
+                while len(col) < c:
+                    col.append(Server())
+                for s in col[c:]:
+                    s.retiring = True
+        self.k, self.c = k, c
+        self.n_servers = k * c
+        # Los que esperaban en colas retiradas se reasignan por JSQ
+        moved = [job for q in self.queues[k:] for job in q]
+        for q in self.queues[k:]:
+            q.clear()
+        self._prune_servers()
+        for job in moved:
+            self._admit(job)
+        for qi in range(k):
+            self._maybe_start_service(qi)
+
+    def _prune_servers(self):
+        for col in self.servers:
+            while col and col[-1].retiring and col[-1].current_job is None:
+                col.pop()
+        while len(self.queues) > self.k and not self.servers[-1] and not self.queues[-1]:
+            self.servers.pop()
+            self.queues.pop()
+        self.server_list = [s for col in self.servers for s in col]
+        self._reindex_servers()
 
     def step(self):
         # Actualizar áreas
         busy = sum(1 for col in self.servers for s in col if s.current_job)
         n_queue = sum(len(q) for q in self.queues)
-        self.last_n_system = n_queue + busy
-        self.last_n_queue = n_queue
-        self._update_areas()
+        self._update_areas(n_queue + busy, n_queue)
         self._record_state()
         
         # Próxima salida global
@@ -568,52 +1357,47 @@ class MMKC(EventSim):
                     dep_qi, dep_si = qi, si
         
         t_next = min(self.next_arrival, next_depart)
+        self._process_checkpoints(min(t_next, self.horizon))
         
         # Manejo unificado de fin de simulación
         if t_next >= self.horizon:
-            self.time = self.horizon
+            self._advance_to_horizon()
             return
         
         if self.next_arrival <= next_depart:
             self.time = self.next_arrival
-            job = self._new_job()
-            # Política determinista (menor índice) en caso de empate
-            lengths = [len(q) + sum(1 for s in col if s.current_job) for q, col in zip(self.queues, self.servers)]
-            m = min(lengths)
-            # Seleccionar el primer índice con longitud mínima (determinista)
-            qi = next(i for i, L in enumerate(lengths) if L == m)
-            self.queues[qi].append(job)
-            self.next_arrival = self.time + expovariate(self.lam)
-            self._maybe_start_service(qi)
+            self._admit(self._new_job())
+            self.next_arrival = self.time + expovariate(self.lam, self.rng)
         else:
             # Salida
             if dep_qi is None:
                 # No hay más eventos de salida, avanzar al horizonte
-                self.time = self.horizon
+                self._advance_to_horizon()
                 return
             self.time = next_depart
             s = self.servers[dep_qi][dep_si]
-            job = s.current_job
-            if job:
-                job.t_departure = self.time
-                self.completed.append(job)
-                wait_sys = job.t_departure - job.t_arrival
-                wait_q = job.t_service_start - job.t_arrival if job.t_service_start else 0.0
-                # Acumular tiempo en sistema (solo después del warmup)
-                if not self._in_warmup:
-                    self.total_wait_sys += wait_sys
-                    self.count_wait_sys += 1
-                    # Registrar para gráficos
-                    self.departure_times.append(self.time)
-                    self.wait_times.append(wait_sys)
-                    self.wait_times_q.append(wait_q)
-            s.current_job = None
+            self._end_service(s)
             self._maybe_start_service(dep_qi)
 
 # -----------------------------
-# Capa de animación (2x2)
+# Capa de animación (grilla de N paneles)
 # -----------------------------
 
+def panel_grid(n: int) -> Tuple[int, int]:
+    """Filas y columnas de la grilla más compacta (casi cuadrada) para n paneles"""
+    if n <= 0:
+        raise ValueError(f"Se necesita al menos un panel, recibido: {n}")
+    cols = int(math.ceil(math.sqrt(n)))
+    return int(math.ceil(n / cols)), cols
+
+def panel_colors(n: int) -> List:
+    """Paleta de n colores distinguibles (tab10/tab20, o un colormap continuo si no alcanzan)"""
+    if n <= 10:
+        return [plt.get_cmap('tab10')(i) for i in range(n)]
+    if n <= 20:
+        return [plt.get_cmap('tab20')(i) for i in range(n)]
+    return [tuple(c) for c in plt.get_cmap('turbo')(np.linspace(0.05, 0.95, n))]
+
 @dataclass
 class ModelSpec:
     name: str
@@ -626,133 +1410,432 @@ class LiveSeries:
     in_system: List[int] = field(default_factory=list)
     in_queue: List[int] = field(default_factory=list)
 
+class IncrementalLayout:
+    """
+    Posiciones de los clientes de un panel, mantenidas por deltas
+
+    Recibe los eventos enqueue/start/depart de una simulación (attach) o
+    de una EventTrace y aplica cada uno en O(1): las filas se indexan por id de job (los ids son consecutivos)
+    y la posición en cola se deriva de un turno por cola, de modo que
+    cuando el primero pasa a servicio toda la cola avanza incrementando un
+    solo contador. Las coordenadas en cola se calculan vectorizadas al
+    dibujar.
+    """
+    DEAD = -2        # Fila libre o cliente ya salido
+    IN_SERVICE = -1  # Cliente en un servidor (objetivo fijo en target)
+
+    def __init__(self, server_positions: Sequence[Tuple[float, float]], n_queues: int = 1,
+                 spawn_xy: Tuple[float, float] = (1.5, 5.0),
+                 queue_xy: Tuple[float, float] = (3.5, 6.0),
+                 queue_gap: float = 1.5, queue_step: float = 0.3):
+        self.server_positions = np.asarray(server_positions, dtype=float).reshape(-1, 2)
+        self.n_queues = n_queues
+        self.spawn_xy = spawn_xy
+        self.queue_xy = queue_xy
+        self.queue_gap = queue_gap
+        self.queue_step = queue_step
+        self.clear()
+
+    def clear(self, first_id: int = 1, capacity: int = 64):
+        """Vaciar el layout (sistema sin clientes, próximo id first_id)"""
+        self.first_id = first_id
+        self.lo = self.hi = 0
+        self.xy = np.empty((capacity, 2))
+        self.xy[:] = self.spawn_xy
+        self.target = np.zeros((capacity, 2))
+        self.queue_of = np.full(capacity, self.DEAD, dtype=np.int64)
+        self.slot = np.zeros(capacity, dtype=np.int64)
+        self.head = np.zeros(self.n_queues, dtype=np.int64)
+        self.tail = np.zeros(self.n_queues, dtype=np.int64)
+
+    def attach(self, sim: EventSim):
+        """
+        Tomar el estado actual de sim con un único recorrido y seguir sus eventos
+
+        Si el layout ya tenía clientes (p. ej. tras reconfigurar la
+        simulación), los que siguen en el sistema conservan su posición.
+        """
+        ids, xy = self.positions()
+        queues = sim._waiting_queues()
+        in_service = [(s.current_job.id, s.index) for s in sim.server_list if s.current_job]
+        live_ids = [job.id for q in queues for job in q] + [jid for jid, _ in in_service]
+        first_id = min(live_ids) if live_ids else sim.jobs_created + 1
+        hi = sim.jobs_created + 1 - first_id
+        self.n_queues = len(queues)
+        self.clear(first_id, max(64, 2 * hi))
+        self.hi = hi
+        self.tail[:] = [len(q) for q in queues]
+        for qi, q in enumerate(queues):
+            for pos, job in enumerate(q):
+                row = job.id - self.first_id
+                self.queue_of[row] = qi
+                self.slot[row] = pos
+        for jid, si in in_service:
+            row = jid - self.first_id
+            self.queue_of[row] = self.IN_SERVICE
+            self.target[row] = self.server_positions[si]
+        self._advance_lo()
+        rows = ids - self.first_id
+        kept = (rows >= 0) & (rows < self.hi)
+        self.xy[rows[kept]] = xy[kept]
+        sim.subscribe(self.on_event)
+
+    def positions(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Ids y posiciones actuales (copia) de los clientes en sistema"""
+        lo, hi = self.lo, self.hi
+        alive = self.queue_of[lo:hi] != self.DEAD
+        return np.arange(lo, hi, dtype=np.int64)[alive] + self.first_id, self.xy[lo:hi][alive]
+
+    def _ensure_capacity(self, row: int) -> int:
+        """Garantizar espacio para row; compacta o duplica y devuelve la fila ajustada"""
+        cap = len(self.queue_of)
+        if row < cap:
+            return row
+        if self.lo > 0:
+            # Descartar las filas ya salidas del principio
+            n = self.hi - self.lo
+            for arr in (self.xy, self.target, self.queue_of, self.slot):
+                arr[:n] = arr[self.lo:self.hi]
+            self.queue_of[n:] = self.DEAD
+            self.first_id += self.lo
+            row -= self.lo
+            self.hi, self.lo = n, 0
+        if row >= cap:
+            new_cap = max(2 * cap, row + 1)
+            self.xy = np.concatenate([self.xy, np.empty((new_cap - cap, 2))])
+            self.target = np.concatenate([self.target, np.zeros((new_cap - cap, 2))])
+            self.queue_of = np.concatenate([self.queue_of, np.full(new_cap - cap, self.DEAD, dtype=np.int64)])
+            self.slot = np.concatenate([self.slot, np.zeros(new_cap - cap, dtype=np.int64)])
+        return row
+
+    def _advance_lo(self):
+        while self.lo < self.hi and self.queue_of[self.lo] == self.DEAD:
+            self.lo += 1
+
+    def on_event(self, kind: str, job_id: int, index: int):
+        """Aplicar un delta de la simulación (ver EventSim.subscribe)"""
+        if self.hi == 0 and kind == 'enqueue':
+            # Layout vacío: las filas empiezan en este id
+            self.first_id = job_id
+        row = job_id - self.first_id
+        if kind == 'enqueue':
+            # Un job ya presente solo cambia de cola (reasignación tras reconfigurar)
+            new = row >= self.hi or self.queue_of[row] == self.DEAD
+            row = self._ensure_capacity(row)
+            self.hi = max(self.hi, row + 1)
+            if new:
+                self.xy[row] = self.spawn_xy
+            self.queue_of[row] = index
+            self.slot[row] = self.tail[index]
+            self.tail[index] += 1
+        elif kind == 'start':
+            # FIFO: sale el primero de la cola y el resto avanza un lugar
+            self.head[self.queue_of[row]] += 1
+            self.queue_of[row] = self.IN_SERVICE
+            self.target[row] = self.server_positions[index]
+        elif kind == 'depart':
+            self.queue_of[row] = self.DEAD
+            if row == self.lo:
+                self._advance_lo()
+
+    def targets(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Ids y posiciones objetivo de los clientes en sistema, ordenados por id"""
+        lo, hi = self.lo, self.hi
+        q = self.queue_of[lo:hi]
+        alive = q != self.DEAD
+        target = self.target[lo:hi].copy()
+        queued = q >= 0
+        qi = q[queued]
+        target[queued, 0] = self.queue_xy[0]
+        target[queued, 1] = (self.queue_xy[1] + qi * self.queue_gap
+                             + (self.slot[lo:hi][queued] - self.head[qi]) * self.queue_step)
+        ids = np.arange(lo, hi, dtype=np.int64) + self.first_id
+        return ids[alive], target[alive]
+
+    def snap(self):
+        """Llevar todos los clientes a su objetivo (tras un salto en el tiempo)"""
+        lo, hi = self.lo, self.hi
+        _, target = self.targets()
+        self.xy[lo:hi][self.queue_of[lo:hi] != self.DEAD] = target
+
+    def advance(self, alpha: float, tol: float) -> Tuple[np.ndarray, bool]:
+        """
+        Mover los clientes una fracción alpha hacia su objetivo
+
+        Retorna:
+            (posiciones de los clientes en sistema, True si alguno sigue en movimiento)
+        """
+        lo, hi = self.lo, self.hi
+        _, target = self.targets()
+        alive = self.queue_of[lo:hi] != self.DEAD
+        xy = self.xy[lo:hi][alive]
+        xy += alpha * (target - xy)
+        # Con todos los clientes en su lugar, el panel queda quieto hasta el próximo evento
+        moving = np.abs(target - xy).max(initial=0.0) >= tol
+        if not moving:
+            xy[:] = target
+        self.xy[lo:hi][alive] = xy
+        return xy, moving
+
+class _ProfiledAnimation(animation.FuncAnimation):
+    """
+    FuncAnimation que mide el dibujo con blit y solo toca los paneles con cambios
+
+    Con blit no hay draw_event: el dibujo de cada frame es restaurar el
+    fondo cacheado (restore_region), dibujar los artistas animados
+    (draw_artist) y copiarlos a pantalla (canvas.blit). Ese tiempo se suma
+    a stats['draw_time'].
+
+    FuncAnimation restaura antes de cada frame el fondo de los ejes
+    dibujados en el anterior, y ante una lista vacía hace un draw_idle
+    completo que omite los artistas animados. Aquí la restauración se hace
+    después de actualizar, solo en los ejes de los artistas devueltos, y un
+    frame sin artistas no dibuja nada: lo que está en pantalla sigue
+    siendo correcto.
+    """
+
+    def __init__(self, *args, stats: Dict, **kwargs):
+        # Antes de super().__init__: con blit ya se llama a _post_draw
+        self._stats = stats
+        super().__init__(*args, **kwargs)
+
+    def _pre_draw(self, framedata, blit):
+        if not blit:
+            super()._pre_draw(framedata, blit)
+
+    def _post_draw(self, framedata, blit):
+        # framedata None: dibujo inicial o tras un resize, siempre completo
+        if not blit or framedata is None:
+            super()._post_draw(framedata, blit)
+            return
+        if not self._drawn_artists:
+            return
+        t0 = time.perf_counter()
+        self._blit_clear(self._drawn_artists)
+        self._blit_draw(self._drawn_artists)
+        self._stats['draw_time'] += time.perf_counter() - t0
+
+
 class AnimatedComparison:
-    def __init__(self, specs: List[ModelSpec], horizon: float = 60.0, seed: Optional[int] = None):
+    CLIENT_SPAWN_XY = (1.5, 5.0)  # Nodo de llegada
+    CLIENT_MARKER_SIZE = 45
+    SETTLE_TOL = 1e-3  # Distancia a la que un cliente se considera en su lugar
+
+    def __init__(self, specs: List[ModelSpec], horizon: float = 60.0, seed: Optional[int] = None,
+                 traces: Optional[List[EventTrace]] = None):
+        """
+        Parámetros:
+            specs: Modelos a comparar, uno por panel
+            horizon: Tiempo de simulación
+            seed: Semilla para reproducibilidad
+            traces: Si se pasa (una EventTrace por panel), la animación
+                    reproduce las trazas en lugar de simular
+        """
         if seed is not None:
             random.seed(seed)
+        if traces is not None and len(traces) != len(specs):
+            raise ValueError(f"Se esperaba una traza por modelo ({len(specs)}), recibidas: {len(traces)}")
         self.horizon = horizon
         self.specs = specs
+        # Reproducción: cursor (eventos ya aplicados) y Wq acumulado por panel
+        self.traces = traces
+        self._cursor: List[int] = [0] * len(specs)
+        self._wait_means = [tr.wait_means() for tr in traces] if traces is not None else []
+        # Reloj de la animación (tiempo simulado que muestra el próximo frame)
+        self.clock = 0.0
+        self.set_timing(0.2)
         # Construir simuladores
+        # (el panel muestra el Wq reciente: se pide solo el promedio con
+        # decaimiento, no las ventanas)
         self.sims = []
+        tau = horizon / 20
         for sp in specs:
             if sp.kind == 'mm1':
-                sim = MM1(sp.params['lam'], sp.params['mu'], horizon)
+                sim = MM1(sp.params['lam'], sp.params['mu'], horizon, decay_tau=tau)
             elif sp.kind == 'mmc':
-                sim = MMC(sp.params['lam'], sp.params['mu'], sp.params['c'], horizon)
+                sim = MMC(sp.params['lam'], sp.params['mu'], sp.params['c'], horizon, decay_tau=tau)
             elif sp.kind == 'mmk1':
-                sim = MMK1(sp.params['lam'], sp.params['mu'], sp.params['k'], horizon)
+                sim = MMK1(sp.params['lam'], sp.params['mu'], sp.params['k'], horizon, decay_tau=tau)
             elif sp.kind == 'mmkc':
-                sim = MMKC(sp.params['lam'], sp.params['mu'], sp.params['k'], sp.params['c'], horizon)
+                sim = MMKC(sp.params['lam'], sp.params['mu'], sp.params['k'], sp.params['c'], horizon,
+                           decay_tau=tau)
             else:
                 raise ValueError('Modelo no soportado')
             self.sims.append(sim)
-        # Figura
-        self.fig, axs = plt.subplots(2, 2, figsize=(12, 8))
-        self.axes = axs.flatten()
-        self.colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728']
+        # Figura: una grilla automática con un solo canvas para todos los paneles
+        n = len(specs)
+        rows, cols = panel_grid(n)
+        self.fig, axs = plt.subplots(rows, cols, figsize=(min(16, 6 * cols), min(10, 4 * rows)),
+                                     squeeze=False)
+        for ax in axs.flat[n:]:
+            ax.set_visible(False)
+        self.axes = list(axs.flat[:n])
+        self.colors = panel_colors(n)
+        # Escala de textos y marcadores según el tamaño de cada panel
+        self.panel_scale = min(1.0, 2.0 / max(rows, cols))
+        fs = self.panel_scale
         self.texts = []
         # Elementos "muñequitos"
-        # Clientes por panel: dict id-> sprite
-        self.client_sprites: List[Dict[int, Dict]] = [dict() for _ in specs]
-        # Servidores: posiciones y artistas por panel
+        # Clientes por panel: un único scatter cuyas posiciones se actualizan
+        # en el lugar, con las posiciones mantenidas por deltas de la simulación
+        self.client_scatter: List = []
+        self.layouts: List[IncrementalLayout] = []
+        # Servidores: posiciones y colecciones (nodos, iconos y enlaces) por panel
         self.server_positions: List[List[Tuple[float, float]]] = [[] for _ in specs]
-        self.server_artists: List[List[Tuple[Circle, Line2D]]] = [[] for _ in specs]
+        self.server_artists: List[Tuple[PatchCollection, PatchCollection, LineCollection]] = []
+        self.server_labels: List[List] = [[] for _ in specs]
         # Nodos de llegada por panel
         self.arrival_nodes: List[List[Circle]] = [[] for _ in specs]
+        # Estilo compartido por todos los paneles
+        text_bbox = dict(facecolor='white', alpha=0.8)
 
         for i, (ax, sp) in enumerate(zip(self.axes, self.specs)):
-            # Título con parámetros por modelo
-            p = sp.params
-            parts = [f"λ={p.get('lam')}", f"μ={p.get('mu')}"]
-            if 'c' in p:
-                parts.append(f"c={p['c']}")
-            if 'k' in p:
-                parts.append(f"k={p['k']}")
-            ax.set_title(f"{sp.name} (" + ", ".join(parts) + ")")
+            ax.set_title(self._panel_title(sp), fontsize=max(7, 12 * fs))
             ax.set_xlim(0, 10)
             ax.set_ylim(0, 10)
             ax.set_xticks([])
             ax.set_yticks([])
             ax.set_aspect('equal')
-            txt = ax.text(0.02, 0.98, '', transform=ax.transAxes, va='top', fontsize=10,
-                           bbox=dict(facecolor='white', alpha=0.8))
+            txt = ax.text(0.02, 0.98, '', transform=ax.transAxes, va='top', fontsize=max(6, 10 * fs),
+                           bbox=text_bbox)
             self.texts.append(txt)
+            self.client_scatter.append(
+                ax.scatter(np.zeros(0), np.zeros(0), s=self.CLIENT_MARKER_SIZE * fs ** 2, c='red',
+                           edgecolors='darkred', linewidths=1.5 * fs, alpha=0.9, zorder=5)
+            )
 
             # Topología tipo red: Nodo de llegada -> Cola -> Servidores
-            # Nodo de llegada (izquierda)
-            x_arrival = 1.5
-            y_center = 5.0
-            
-            # Nodo de cola (centro)
+            x_arrival, y_center = self.CLIENT_SPAWN_XY
             x_queue = 5.0
             
-            # Servidores (derecha)
-            x_servers = 8.5
-            
             # Dibujar nodo de llegada (círculo grande)
             arrival_node = Circle((x_arrival, y_center), radius=0.4, 
-                                 facecolor='lightblue', edgecolor='black', lw=2)
+                                 facecolor='lightblue', edgecolor='black', lw=2 * fs)
             ax.add_patch(arrival_node)
-            ax.text(x_arrival, y_center-0.8, 'Llegadas', ha='center', fontsize=8)
+            ax.text(x_arrival, y_center-0.8, 'Llegadas', ha='center', fontsize=max(5, 8 * fs))
             
             # Dibujar nodo de cola (rectángulo)
-            from matplotlib.patches import Rectangle, FancyBboxPatch
             queue_node = FancyBboxPatch((x_queue-0.5, y_center-0.4), 1.0, 0.8,
                                        boxstyle="round,pad=0.1", 
-                                       facecolor='lightyellow', edgecolor='black', lw=2)
+                                       facecolor='lightyellow', edgecolor='black', lw=2 * fs)
             ax.add_patch(queue_node)
-            ax.text(x_queue, y_center, 'Cola', ha='center', va='center', fontsize=8)
+            ax.text(x_queue, y_center, 'Cola', ha='center', va='center', fontsize=max(5, 8 * fs))
             
             # Línea de llegada a cola
             line1 = Line2D([x_arrival+0.4, x_queue-0.5], [y_center, y_center], 
-                          color='black', lw=2, marker='>', markersize=8, markevery=[1])
+                          color='black', lw=2 * fs, marker='>', markersize=8 * fs, markevery=[1])
             ax.add_line(line1)
             
-            # Configurar servidores según modelo
-            positions: List[Tuple[float, float]] = []
-            if sp.kind == 'mm1':
-                positions = [(x_servers, y_center)]
-            elif sp.kind == 'mmc':
-                c = sp.params['c']
-                y_start = y_center - (c-1)*0.6
-                positions = [(x_servers, y_start + i*1.2) for i in range(c)]
-            elif sp.kind == 'mmk1':
-                k = sp.params['k']
-                y_start = y_center - (k-1)*0.6
-                positions = [(x_servers, y_start + i*1.2) for i in range(k)]
-            else:  # mmkc
-                k = sp.params['k']
-                c = sp.params['c']
-                total = k * c
-                y_start = y_center - (total-1)*0.4
-                for idx in range(total):
-                    positions.append((x_servers, y_start + idx*0.8))
-            
-            self.server_positions[i] = positions
-            
-            # Dibujar servidores como nodos con icono
-            s_artists: List[Tuple[Circle, Line2D]] = []
-            for idx, (sx, sy) in enumerate(positions):
-                # Nodo servidor (círculo)
-                server_circle = Circle((sx, sy), radius=0.35, 
-                                      facecolor=self.colors[i], edgecolor='black', lw=2, alpha=0.7)
-                ax.add_patch(server_circle)
-                # Icono de servidor (rectángulo pequeño dentro)
-                server_icon = Rectangle((sx-0.15, sy-0.1), 0.3, 0.2, 
-                                       facecolor='white', edgecolor='black', lw=1)
-                ax.add_patch(server_icon)
-                ax.text(sx, sy-0.6, f'S{idx+1}', ha='center', fontsize=7)
-                s_artists.append((server_circle, server_icon))
-                
-                # Línea de cola a servidor
-                line_to_server = Line2D([x_queue+0.5, sx-0.35], [y_center, sy],
-                                       color='gray', lw=1.5, linestyle='--', alpha=0.6)
-                ax.add_line(line_to_server)
-            
-            self.server_artists[i] = s_artists
+            # Servidores: una colección por tipo de elemento, sin artistas por servidor
+            nodes = PatchCollection([], facecolor=self.colors[i], edgecolor='black',
+                                    linewidths=2 * fs, alpha=0.7, zorder=3)
+            icons = PatchCollection([], facecolor='white', edgecolor='black', linewidths=fs, zorder=4)
+            links = LineCollection([], colors='gray', linewidths=1.5 * fs, linestyles='--', alpha=0.6)
+            for artist in (nodes, icons, links):
+                ax.add_collection(artist)
+            self.server_artists.append((nodes, icons, links))
+            positions = self._draw_servers(i)
             self.arrival_nodes[i] = [arrival_node]
+            layout = IncrementalLayout(positions, n_queues=sp.params.get('k', 1),
+                                       spawn_xy=self.CLIENT_SPAWN_XY)
+            if traces is None:
+                layout.attach(self.sims[i])
+            self.layouts.append(layout)
 
         self.anim = None
+        self._blit = False
+        self._frames = 0
+        self._interval_ms = 100
+        # Perfil por frame: simulación vs actualización de artistas vs dibujo
+        self.frame_stats: Dict = {
+            'frames': 0,
+            'sim_time': 0.0,
+            'update_time': 0.0,
+            'draw_time': 0.0,
+            'sim_time_panels': [0.0] * len(specs),
+            'skipped': 0,
+        }
+        self._update_done: Optional[float] = None
+        # Un dibujo completo omite los artistas animados: el frame siguiente
+        # redibuja todos los paneles, tengan cambios o no
+        self._redraw_all = True
+        self.fig.canvas.mpl_connect('draw_event', self._on_draw)
+        # Estado por panel para saltar los que no cambiaron
+        self._panel_version: List[int] = [-1] * len(specs)
+        self._panel_moving: List[bool] = [False] * len(specs)
+
+    @staticmethod
+    def _panel_title(sp: ModelSpec) -> str:
+        """Título del panel con los parámetros del modelo"""
+        p = sp.params
+        parts = [f"λ={p.get('lam')}", f"μ={p.get('mu')}"]
+        if 'c' in p:
+            parts.append(f"c={p['c']}")
+        if 'k' in p:
+            parts.append(f"k={p['k']}")
+        return f"{sp.name} (" + ", ".join(parts) + ")"
+
+    @staticmethod
+    def _server_layout(kind: str, total: int) -> List[Tuple[float, float]]:
+        """Posiciones de total servidores según el modelo, en el orden de server_list"""
+        x_servers, y_center = 8.5, 5.0
+        gap = 0.8 if kind == 'mmkc' else 1.2
+        y_start = y_center - (total - 1) * gap / 2
+        return [(x_servers, y_start + idx * gap) for idx in range(total)]
+
+    def _draw_servers(self, idx: int) -> List[Tuple[float, float]]:
+        """(Re)dibujar los servidores del panel idx sobre sus colecciones existentes"""
+        ax = self.axes[idx]
+        # Según los servidores reales (incluye los que se están retirando)
+        positions = self._server_layout(self.specs[idx].kind, len(self.sims[idx].server_list))
+        self.server_positions[idx] = positions
+        nodes, icons, links = self.server_artists[idx]
+        x_queue, y_center = 5.0, 5.0
+        nodes.set_paths([Circle((sx, sy), radius=0.35) for sx, sy in positions])
+        icons.set_paths([Rectangle((sx-0.15, sy-0.1), 0.3, 0.2) for sx, sy in positions])
+        links.set_segments([[(x_queue+0.5, y_center), (sx-0.35, sy)] for sx, sy in positions])
+        # Etiquetas: se reutilizan las existentes y solo se crean o quitan las que sobran
+        labels = self.server_labels[idx]
+        while len(labels) > len(positions):
+            labels.pop().remove()
+        for j, (sx, sy) in enumerate(positions):
+            if j == len(labels):
+                labels.append(ax.text(sx, sy-0.6, f'S{j+1}', ha='center',
+                                      fontsize=max(4, 7 * self.panel_scale)))
+            else:
+                labels[j].set_position((sx, sy-0.6))
+        return positions
+
+    def _on_draw(self, event):
+        """Medir el dibujo del canvas que sigue a cada actualización de frame"""
+        self._redraw_all = True
+        if self._update_done is not None:
+            self.frame_stats['draw_time'] += time.perf_counter() - self._update_done
+            self._update_done = None
+
+    def profile_summary(self) -> Dict[str, float]:
+        """
+        Costo promedio por frame en milisegundos
+
+        Retorna:
+            Diccionario con frames, sim_ms (avance de las simulaciones),
+            update_ms (actualización de artistas), draw_ms (dibujo: con
+            blit, restaurar fondos, dibujar artistas y copiarlos a
+            pantalla; sin blit, el dibujo completo del canvas),
+            sim_ms_panels, skipped (frames sin ningún panel con cambios) y
+            dt_mean (tiempo simulado promedio por frame)
+        """
+        stats = self.frame_stats
+        n = max(1, stats['frames'])
+        return {
+            'frames': stats['frames'],
+            'sim_ms': 1000 * stats['sim_time'] / n,
+            'update_ms': 1000 * stats['update_time'] / n,
+            'draw_ms': 1000 * stats['draw_time'] / n,
+            'sim_ms_panels': [1000 * t / n for t in stats['sim_time_panels']],
+            'skipped': stats['skipped'],
+            'dt_mean': self.clock / n,
+        }
 
     def _spawn_client_artist(self, ax, color) -> Tuple[Circle, Line2D]:
         head = Circle((0, 0), radius=0.2, facecolor=color, edgecolor='k', lw=0.5)
@@ -780,166 +1863,502 @@ class AnimatedComparison:
         return coords
 
     def _advance_sims_until(self, t_target: float):
-        for sim in self.sims:
+        """Avanzar cada simulación hasta t_target (una sola pasada por frame)"""
+        if self.traces is not None:
+            self._replay_until(t_target)
+            return
+        for i, sim in enumerate(self.sims):
+            t0 = time.perf_counter()
             while sim.time < t_target and sim.time < sim.horizon:
                 sim.step()
+            self.frame_stats['sim_time_panels'][i] += time.perf_counter() - t0
 
-    def _update_panel(self, idx: int, frame_t: float):
-        ax = self.axes[idx]
-        sim = self.sims[idx]
+    def _replay_until(self, t_target: float):
+        """Llevar cada layout al estado de su traza en t_target (hacia adelante o atrás)"""
+        for i, (trace, layout) in enumerate(zip(self.traces, self.layouts)):
+            t0 = time.perf_counter()
+            stop = int(np.searchsorted(trace.time, t_target, side='right'))
+            if stop < self._cursor[i]:
+                # Retroceso: se reconstruye desde el principio de la traza
+                layout.clear()
+                self._cursor[i] = 0
+            trace.replay(self._cursor[i], stop, layout.on_event)
+            self._cursor[i] = stop
+            self.frame_stats['sim_time_panels'][i] += time.perf_counter() - t0
 
-        # Avanzar simulación hasta frame_t
-        self._advance_sims_until(frame_t)
+    def seek(self, t: float):
+        """
+        Saltar al instante t de la reproducción (solo con trazas)
 
-        st = sim.state()
-        sp = self.specs[idx]
-        p = sp.params
-        # No hay gráfica temporal; límites fijos ya establecidos
+        Los clientes aparecen directamente en su lugar; el próximo frame
+        continúa desde t.
+        """
+        if self.traces is None:
+            raise ValueError("seek requiere una animación creada a partir de trazas")
+        t = min(max(0.0, t), self.horizon)
+        self._replay_until(t)
+        for i, layout in enumerate(self.layouts):
+            layout.snap()
+            self._update_panel(i)
+        self.clock = t
+        self.fig.canvas.draw_idle()
 
-        # Texto: solo tiempo de espera promedio en cola (Wq)
-        self.texts[idx].set_text(
-            f"Wq prom: {st.get('wq_avg', 0.0):.2f}"
-        )
-        
-        # Actualizar muñequitos de clientes según estado real (colas y servicio)
-        targets = self._layout_targets(idx)
-        alive_ids = set(targets.keys())
-        # Crear/actualizar sprites
-        for jid, (tx, ty) in targets.items():
-            sprite = self._ensure_client_sprite(idx, jid, x=1.5, y=5.0)
-            # Movimiento suave hacia el objetivo (interpolación)
-            cx, cy = sprite['x'], sprite['y']
-            alpha = 0.25  # Velocidad de movimiento
-            nx = cx + alpha*(tx - cx)
-            ny = cy + alpha*(ty - cy)
-            self._place_client_sprite(sprite, nx, ny)
-        # Remover sprites de jobs completados
-        self._remove_missing_client_sprites(idx, alive_ids)
-
-    # Nuevas utilidades para representar estado detallado
-    def _ensure_client_sprite(self, panel_idx: int, job_id: int, x: float, y: float):
-        dct = self.client_sprites[panel_idx]
-        if job_id not in dct:
-            # Cliente como círculo pequeño (paquete/usuario)
-            client_circle = Circle((x, y), radius=0.15, facecolor='red', 
-                                  edgecolor='darkred', lw=1.5, alpha=0.9)
-            ax = self.axes[panel_idx]
-            ax.add_patch(client_circle)
-            dct[job_id] = {'artist': client_circle, 'x': x, 'y': y}
-        return dct[job_id]
-
-    def _place_client_sprite(self, sprite: Dict, x: float, y: float):
-        client_circle = sprite['artist']
-        client_circle.center = (x, y)
-        sprite['x'] = x
-        sprite['y'] = y
-
-    def _remove_missing_client_sprites(self, panel_idx: int, alive_ids: set):
-        dct = self.client_sprites[panel_idx]
-        remove_ids = [jid for jid in dct.keys() if jid not in alive_ids]
-        for jid in remove_ids:
-            client_circle = dct[jid]['artist']
-            client_circle.remove()
-            del dct[jid]
-
-    def _layout_targets(self, idx: int) -> Dict[int, Tuple[float, float]]:
-        sp = self.specs[idx]
-        sim = self.sims[idx]
-        targets: Dict[int, Tuple[float, float]] = {}
-        
-        # Posiciones de nodos en topología
-        x_arrival = 1.5
-        x_queue = 5.0
-        y_center = 5.0
-        
-        # Posición en cola: apilados verticalmente cerca del nodo de cola
-        queue_x_offset = 3.5
-        queue_y_start = y_center + 1.0
-        queue_y_step = 0.3
+    def _panel_text(self, idx: int) -> str:
+        """
+        Texto del panel: Wq promedio y reciente (en vivo) o acumulado de la traza
+
+        En grillas grandes se usa una sola línea: cada línea de texto cuesta
+        tanto como dibujar todos los clientes del panel. Se lee directamente
+        de los acumuladores en O(1); state() calcula además utilizaciones y
+        percentiles del sketch, demasiado para cada panel en cada frame.
+        """
+        if self.traces is None:
+            sim = self.sims[idx]
+            wq = sim.total_wait_q / sim.count_wait_q if sim.count_wait_q > 0 else 0.0
+            recent = sim.decayed['Wq'].mean()
+            if self.panel_scale < 1.0:
+                return f"Wq {wq:.2f} · {recent:.2f}"
+            return f"Wq prom: {wq:.2f}\nWq reciente: {recent:.2f}"
+        c = self._cursor[idx]
+        wq = self._wait_means[idx][c - 1] if c else float('nan')
+        wq = 0.0 if np.isnan(wq) else wq
+        if self.panel_scale < 1.0:
+            return f"Wq {wq:.2f} · {c}/{len(self.traces[idx])}"
+        return f"Wq prom: {wq:.2f}\nEventos: {c}/{len(self.traces[idx])}"
+
+    def reconfigure(self, panel: int, lam: Optional[float] = None, mu: Optional[float] = None,
+                    c: Optional[int] = None, k: Optional[int] = None):
+        """
+        Cambiar los parámetros de un panel sin reiniciar (ver EventSim.reconfigure)
+
+        La simulación sigue desde su instante actual y se reutilizan los
+        artistas del panel: las colecciones de servidores se rehacen en el
+        lugar y los clientes conservan su posición.
+        """
+        if self.traces is not None:
+            raise ValueError("Una reproducción de trazas no se puede reconfigurar")
+        sim, sp, layout = self.sims[panel], self.specs[panel], self.layouts[panel]
+        # Sin seguir eventos mientras cambia la topología; attach retoma el estado
+        sim.unsubscribe(layout.on_event)
+        try:
+            sim.reconfigure(lam=lam, mu=mu, c=c, k=k)
+        finally:
+            self._sync_topology(panel)
+        changes = {key: v for key, v in (('lam', lam), ('mu', mu), ('c', c), ('k', k)) if v is not None}
+        sp.params = dict(sp.params, **changes)
+        self.axes[panel].set_title(self._panel_title(sp))
+
+    def _sync_topology(self, idx: int):
+        """Redibujar servidores y rehacer el layout del panel tras un cambio de topología"""
+        sim, layout = self.sims[idx], self.layouts[idx]
+        if layout.on_event in sim._listeners:
+            sim.unsubscribe(layout.on_event)
+        layout.server_positions = np.asarray(self._draw_servers(idx), dtype=float).reshape(-1, 2)
+        layout.attach(sim)
+        self._panel_version[idx] = -1
+        # Los servidores están en el fondo cacheado del blit
+        if self.anim is not None and self._blit:
+            self._restart_animation()
+        self.fig.canvas.draw_idle()
+
+    def _update_panel(self, idx: int) -> bool:
+        """
+        Actualizar los artistas del panel idx con el estado actual de su simulación
+
+        Retorna:
+            True si algo cambió en pantalla (hubo eventos o hay clientes en
+            movimiento); un panel sin cambios no se toca
+        """
+        if len(self.sims[idx].server_list) != len(self.server_positions[idx]):
+            # Terminó de retirarse un servidor sobrante
+            self._sync_topology(idx)
+        # Llegadas + salidas (o eventos reproducidos): cambia si y solo si
+        # hubo eventos desde el último frame
+        if self.traces is None:
+            version = self.sims[idx].jobs_created + self.sims[idx].served
+        else:
+            version = self._cursor[idx]
+        if version == self._panel_version[idx] and not self._panel_moving[idx]:
+            return False
+        self._panel_version[idx] = version
+
+        # Texto: espera promedio en cola (Wq) y su valor reciente con decaimiento
+        self.texts[idx].set_text(self._panel_text(idx))
         
-        if sp.kind == 'mm1':
-            if isinstance(sim, MM1):
-                # Clientes en cola
-                for pos, job in enumerate(sim.queue):
-                    targets[job.id] = (queue_x_offset, queue_y_start + pos*queue_y_step)
-                # Cliente en servicio
-                if sim.server.current_job:
-                    job = sim.server.current_job
-                    sx, sy = self.server_positions[idx][0]
-                    targets[job.id] = (sx, sy)
-        elif sp.kind == 'mmc':
-            if isinstance(sim, MMC):
-                # Clientes en cola
-                for pos, job in enumerate(sim.queue):
-                    targets[job.id] = (queue_x_offset, queue_y_start + pos*queue_y_step)
-                # Clientes en servicio
-                for si, s in enumerate(sim.servers):
-                    if s.current_job:
-                        sx, sy = self.server_positions[idx][si]
-                        targets[s.current_job.id] = (sx, sy)
-        elif sp.kind == 'mmk1':
-            if isinstance(sim, MMK1):
-                # Múltiples colas
-                for qi, q in enumerate(sim.queues):
-                    for pos, job in enumerate(q):
-                        y_offset = queue_y_start + qi*1.5
-                        targets[job.id] = (queue_x_offset, y_offset + pos*queue_y_step)
-                # Clientes en servicio
-                for si, s in enumerate(sim.servers):
-                    if s.current_job:
-                        sx, sy = self.server_positions[idx][si]
-                        targets[s.current_job.id] = (sx, sy)
-        else:  # mmkc
-            if isinstance(sim, MMKC):
-                k = sp.params['k']
-                c = sp.params['c']
-                # Múltiples colas
-                for qi, q in enumerate(sim.queues):
-                    for pos, job in enumerate(q):
-                        y_offset = queue_y_start + qi*1.5
-                        targets[job.id] = (queue_x_offset, y_offset + pos*queue_y_step)
-                # Clientes en servicio
-                for qi in range(k):
-                    for si in range(c):
-                        s = sim.servers[qi][si]
-                        if s.current_job:
-                            idx_lin = qi*c + si
-                            sx, sy = self.server_positions[idx][idx_lin]
-                            targets[s.current_job.id] = (sx, sy)
-        return targets
+        # Actualizar muñequitos de clientes: el layout ya aplicó los eventos
+        # del frame; los nuevos aparecen en el nodo de llegada y todos se
+        # mueven suavemente hacia su objetivo
+        alpha = 0.25  # Velocidad de movimiento
+        xy, moving = self.layouts[idx].advance(alpha, self.SETTLE_TOL)
+        self._panel_moving[idx] = moving
+        self.client_scatter[idx].set_offsets(xy)
+        return True
+
+    def set_timing(self, dt: float, adaptive: bool = False, events_per_frame: float = 2.0,
+                   dt_bounds: Optional[Tuple[float, float]] = None, skip_idle: bool = False):
+        """
+        Configurar el tiempo simulado que avanza cada frame
+
+        Parámetros:
+            dt: Paso fijo (o de referencia en modo adaptativo)
+            adaptive: Si True, el paso se elige en cada frame según la
+                      densidad de eventos próximos, para que el panel más
+                      activo muestre ~events_per_frame eventos por frame
+            events_per_frame: Objetivo de eventos por frame en modo adaptativo
+            dt_bounds: (mínimo, máximo) del paso adaptativo; por defecto
+                       (dt/10, 10·dt)
+            skip_idle: Si True, cuando ningún panel tiene eventos dentro del
+                       paso se salta directamente al próximo evento
+        """
+        if dt <= 0:
+            raise ValueError(f"dt debe ser positivo, recibido: {dt}")
+        if events_per_frame <= 0:
+            raise ValueError(f"events_per_frame debe ser positivo, recibido: {events_per_frame}")
+        if dt_bounds is None:
+            dt_bounds = (dt / 10, dt * 10)
+        if not 0 < dt_bounds[0] <= dt_bounds[1]:
+            raise ValueError(f"dt_bounds debe cumplir 0 < mínimo ≤ máximo, recibido: {dt_bounds}")
+        self.dt = dt
+        self.adaptive = adaptive
+        self.events_per_frame = events_per_frame
+        self.dt_bounds = dt_bounds
+        self.skip_idle = skip_idle
+
+    def _event_rates(self) -> List[float]:
+        """Densidad de eventos próximos por panel (eventos por unidad de tiempo)"""
+        if self.traces is None:
+            return [sim.event_rate() for sim in self.sims]
+        # Con trazas la densidad es exacta: tiempo hasta los próximos events_per_frame eventos
+        n = max(1, int(math.ceil(self.events_per_frame)))
+        rates = []
+        for trace, c in zip(self.traces, self._cursor):
+            times = trace.time
+            if c >= len(times):
+                rates.append(0.0)
+                continue
+            end = min(c + n, len(times))
+            span = times[end - 1] - self.clock
+            rates.append((end - c) / span if span > 0 else float('inf'))
+        return rates
+
+    def _next_event_time(self) -> float:
+        """Próximo evento en cualquiera de los paneles"""
+        if self.traces is None:
+            return min(sim.next_event_time() for sim in self.sims)
+        return min((trace.time[c] for trace, c in zip(self.traces, self._cursor) if c < len(trace)),
+                   default=float('inf'))
+
+    def _frame_dt(self) -> float:
+        """Paso del próximo frame: fijo, o adaptativo y acotado, saltando tramos sin eventos"""
+        dt = self.dt
+        if self.adaptive:
+            rate = max(self._event_rates())
+            lo, hi = self.dt_bounds
+            dt = min(hi, max(lo, self.events_per_frame / rate)) if rate > 0 else hi
+        if self.skip_idle:
+            gap = self._next_event_time() - self.clock
+            if gap > dt and math.isfinite(gap):
+                dt = gap
+        return dt
 
     def _init_anim(self):
-        return self.texts
+        # Con blit, estos son los únicos artistas dinámicos: el resto
+        # (topología, servidores, etiquetas) queda en el fondo cacheado
+        return self.texts + self.client_scatter
 
     def _update_anim(self, frame_idx: int):
-        frame_t = frame_idx * self.dt
-        for i in range(len(self.sims)):
-            self._update_panel(i, frame_t)
-        artists = []
-        # Incluir sprites de clientes
-        for sprite_map in self.client_sprites:
-            for spr in sprite_map.values():
-                client_circle = spr['artist']
-                artists.append(client_circle)
-        return self.texts + artists
-
-    def run(self, dt: float = 0.2, frames: int = 400, interval_ms: int = 100):
-        self.dt = dt
-        self.anim = animation.FuncAnimation(
+        frame_t = self.clock
+        stats = self.frame_stats
+        t0 = time.perf_counter()
+        self._advance_sims_until(frame_t)
+        # El paso del próximo frame depende del estado recién alcanzado
+        self.clock = frame_t + self._frame_dt()
+        t1 = time.perf_counter()
+        changed = [i for i in range(len(self.sims)) if self._update_panel(i)]
+        t2 = time.perf_counter()
+        stats['frames'] += 1
+        stats['sim_time'] += t1 - t0
+        stats['update_time'] += t2 - t1
+        if not changed:
+            stats['skipped'] += 1
+        # Sin blit el dibujo completo se mide con draw_event; con blit lo
+        # mide _ProfiledAnimation
+        self._update_done = t2 if not self._blit else None
+        # Con blit solo se redibujan los paneles con cambios (ver
+        # _ProfiledAnimation); sin ninguno, la lista vacía no dibuja nada
+        if self._redraw_all:
+            self._redraw_all = False
+            return self._init_anim()
+        return [a for i in changed for a in (self.texts[i], self.client_scatter[i])]
+
+    def run(self, dt: float = 0.2, frames: int = 400, interval_ms: int = 100, blit: bool = True,
+            **timing):
+        """
+        Mostrar la animación en una ventana interactiva
+
+        Parámetros:
+            dt: Tiempo simulado por frame
+            frames: Número de frames
+            interval_ms: Intervalo entre frames en milisegundos
+            blit: Si True, la topología estática se cachea como fondo y en
+                  cada frame solo se redibujan clientes y textos; los
+                  paneles sin cambios no recalculan sus artistas
+            **timing: Paso adaptativo y salto de tramos inactivos (ver set_timing)
+
+        Con trazas, dt fija la velocidad de reproducción; una barra inferior
+        permite ir a cualquier instante y las flechas ←/→ retroceden o
+        avanzan 10 frames.
+        """
+        self.set_timing(dt, **timing)
+        self._blit = blit
+        self._frames = frames
+        self._interval_ms = interval_ms
+        self.anim = self._new_animation(frames)
+        if self.traces is None:
+            self.fig.tight_layout(rect=(0, 0.08, 1, 1))
+            self._add_reconfigure_controls()
+            plt.show()
+            # Generar reporte post-simulación
+            self._generate_report()
+            return
+        self.fig.tight_layout(rect=(0, 0.06, 1, 1))
+        self._add_scrub_controls()
+        plt.show()
+
+    def _new_animation(self, frames: int) -> animation.FuncAnimation:
+        return _ProfiledAnimation(
             self.fig,
             self._update_anim,
             init_func=self._init_anim,
             frames=frames,
-            interval=interval_ms,
-            blit=False,
+            interval=self._interval_ms,
+            blit=self._blit,
             repeat=False,
+            stats=self.frame_stats,
         )
-        plt.tight_layout()
-        plt.show()
-        
-        # Generar reporte post-simulación
-        self._generate_report()
+
+    def _restart_animation(self):
+        """
+        Reemplazar la animación en curso por una nueva con los frames restantes
+
+        Con blit, FuncAnimation solo vuelve a cachear el fondo si cambia la
+        vista de los ejes; una animación nueva lo captura en su primer
+        dibujo, ya con la topología actualizada.
+        """
+        old = self.anim
+        old.pause()
+        # Sin callbacks el timer viejo queda inerte aunque algo lo reanude
+        old.event_source.callbacks.clear()
+        self.anim = self._new_animation(max(1, self._frames - self.frame_stats['frames']))
+
+    def _add_reconfigure_controls(self):
+        """
+        Controles para cambiar parámetros en vivo
+
+        Un clic elige el panel; ↑/↓ multiplican λ por 1.1 o 1/1.1, ]/[ hacen
+        lo mismo con μ, +/- agregan o quitan un servidor (una cola en
+        M/M/k/1) y >/< una cola en M/M/k/c. Las barras inferiores fijan λ y
+        μ del panel elegido.
+        """
+        from matplotlib.widgets import Slider
+        self.selected_panel = 0
+        lam_max = 3 * max(sp.params['lam'] for sp in self.specs)
+        mu_max = 3 * max(sp.params['mu'] for sp in self.specs)
+        p = self.specs[0].params
+        self.lam_slider = Slider(self.fig.add_axes([0.15, 0.045, 0.7, 0.02]), 'λ', 0.01, lam_max,
+                                 valinit=p['lam'])
+        self.mu_slider = Slider(self.fig.add_axes([0.15, 0.015, 0.7, 0.02]), 'μ', 0.01, mu_max,
+                                valinit=p['mu'])
+
+        def on_slider(_):
+            p = self.specs[self.selected_panel].params
+            changes = {name: slider.val for name, slider in (('lam', self.lam_slider), ('mu', self.mu_slider))
+                       if slider.val != p[name]}
+            if changes:
+                self.reconfigure(self.selected_panel, **changes)
+
+        self.lam_slider.on_changed(on_slider)
+        self.mu_slider.on_changed(on_slider)
+
+        def show_params(i):
+            # Mostrar λ y μ del panel sin disparar on_slider: con el otro
+            # deslizador aún en el valor del panel anterior, reconfiguraría
+            p = self.specs[i].params
+            for name, slider in (('lam', self.lam_slider), ('mu', self.mu_slider)):
+                slider.eventson = False
+                slider.set_val(p[name])
+                slider.eventson = True
+
+        def on_click(event):
+            if event.inaxes in self.axes:
+                self.selected_panel = self.axes.index(event.inaxes)
+                show_params(self.selected_panel)
+
+        def on_key(event):
+            i = self.selected_panel
+            p = self.specs[i].params
+            changes = {
+                'up': {'lam': p['lam'] * 1.1}, 'down': {'lam': p['lam'] / 1.1},
+                ']': {'mu': p['mu'] * 1.1}, '[': {'mu': p['mu'] / 1.1},
+            }.get(event.key, {})
+            servers = 'c' if 'c' in p else 'k' if 'k' in p else None
+            queues = 'k' if 'c' in p and 'k' in p else None
+            for keys, name in ((('+', '-'), servers), (('>', '<'), queues)):
+                if name is not None and event.key in keys:
+                    changes = {name: max(1, p[name] + (1 if event.key == keys[0] else -1))}
+            if changes:
+                try:
+                    self.reconfigure(i, **changes)
+                except ValueError as exc:
+                    print(f"⚠️ {exc}")
+                show_params(i)
+
+        self.fig.canvas.mpl_connect('button_press_event', on_click)
+        self.fig.canvas.mpl_connect('key_press_event', on_key)
+
+    def _add_scrub_controls(self):
+        """Barra de tiempo y teclas para recorrer una reproducción"""
+        from matplotlib.widgets import Slider
+        ax_time = self.fig.add_axes([0.15, 0.015, 0.7, 0.025])
+        self.time_slider = Slider(ax_time, 't', 0.0, self.horizon, valinit=self.clock)
+        self.time_slider.on_changed(self.seek)
+
+        def on_key(event):
+            if event.key in SCRUB_KEYS:
+                step = 10 * self.dt if event.key == 'right' else -10 * self.dt
+                self.seek(self.clock + step)
+
+        SCRUB_KEYS = ('left', 'right')
+        manager = self.fig.canvas.manager
+        if manager is not None and manager.key_press_handler_id is not None:
+            # ←/→ son también atrás/adelante en el historial de vistas de la
+            # barra de herramientas (keymap.back/forward): en esta figura el
+            # manejador por defecto se reemplaza por uno que no los atiende
+            from matplotlib.backend_bases import key_press_handler
+
+            def default_keys(event):
+                if event.key not in SCRUB_KEYS:
+                    key_press_handler(event)
+
+            self.fig.canvas.mpl_disconnect(manager.key_press_handler_id)
+            manager.key_press_handler_id = self.fig.canvas.mpl_connect('key_press_event', default_keys)
+        self.fig.canvas.mpl_connect('key_press_event', on_key)
+
+    def simulate_traces(self) -> List[EventTrace]:
+        """Simular todos los modelos hasta el horizonte grabando sus trazas, sin dibujar"""
+        traces = [sim.record_trace() for sim in self.sims]
+        for sim in self.sims:
+            while sim.time < sim.horizon:
+                sim.step()
+        return traces
+
+    def save_traces(self, path: str, traces: List[EventTrace]):
+        """Guardar las trazas (una por panel) con modelos y horizonte en un .npz"""
+        meta = {
+            'horizon': self.horizon,
+            'specs': [{'name': sp.name, 'kind': sp.kind, 'params': sp.params} for sp in self.specs],
+        }
+        arrays = {'meta': np.array(json.dumps(meta))}
+        for i, trace in enumerate(traces):
+            for key, values in trace.to_arrays().items():
+                arrays[f'panel{i}_{key}'] = values
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def from_trace_file(cls, path: str) -> 'AnimatedComparison':
+        """Crear una animación que reproduce las trazas guardadas con save_traces"""
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            specs = [ModelSpec(d['name'], d['kind'], d['params']) for d in meta['specs']]
+            traces = [
+                EventTrace.from_arrays(*(data[f'panel{i}_{key}'] for key in ('time', 'kind', 'job_id', 'index')))
+                for i in range(len(specs))
+            ]
+        return cls(specs, horizon=meta['horizon'], traces=traces)
     
+    VIDEO_WRITERS = {'.gif': 'pillow', '.mp4': 'ffmpeg', '.avi': 'ffmpeg', '.mov': 'ffmpeg', '.webm': 'ffmpeg'}
+
+    def record(self, dt: float = 0.2, frames: int = 400, **timing) -> List[List[Tuple[str, np.ndarray]]]:
+        """
+        Avanzar las simulaciones una sola vez y guardar el estado de cada frame
+
+        timing acepta las opciones de set_timing (paso adaptativo, skip_idle).
+
+        Retorna:
+            Por frame, una lista con (texto, posiciones de los clientes) por panel
+        """
+        self.set_timing(dt, **timing)
+        recorded = []
+        for f in range(frames):
+            self._update_anim(f)
+            recorded.append([(txt.get_text(), np.array(sc.get_offsets(), dtype=float))
+                             for txt, sc in zip(self.texts, self.client_scatter)])
+        return recorded
+
+    def export(self, path: str, dt: float = 0.2, frames: int = 400, fps: int = 10,
+               dpi: int = 100, workers: Optional[int] = None,
+               writer: Optional[str] = None, **timing) -> Union[str, List[str]]:
+        """
+        Exportar la animación sin ventana (backend Agg)
+
+        La simulación corre una sola vez (record) y el dibujo de los frames
+        se reparte en un pool de procesos, cada uno con su propia figura.
+
+        Parámetros:
+            path: Directorio para una secuencia frame_00000.png, ... o archivo
+                  de video (.gif, .mp4, .avi, .mov, .webm)
+            dt: Tiempo simulado por frame
+            frames: Número de frames
+            fps: Frames por segundo del video
+            dpi: Resolución de los frames
+            workers: Procesos de dibujo (None = núcleos disponibles, 1 = sin pool)
+            writer: Writer de matplotlib para el video (None lo elige por extensión)
+            **timing: Paso adaptativo y salto de tramos inactivos (ver set_timing)
+
+        Retorna:
+            Lista de archivos PNG, o la ruta del video
+        """
+        ext = os.path.splitext(path)[1].lower()
+        if ext not in self.VIDEO_WRITERS and writer is None:
+            os.makedirs(path, exist_ok=True)
+            return self._render_frames(self.record(dt, frames, **timing), path, dpi, workers)
+        writer = writer or self.VIDEO_WRITERS[ext]
+        if not animation.writers.is_available(writer):
+            raise RuntimeError(f"Writer de video '{writer}' no disponible; disponibles: {animation.writers.list()}")
+        recorded = self.record(dt, frames, **timing)
+        with tempfile.TemporaryDirectory() as tmp:
+            pngs = self._render_frames(recorded, tmp, dpi, workers)
+            _encode_video(pngs, path, fps, writer, dpi)
+        return path
+
+    def _render_frames(self, recorded: List[List[Tuple[str, np.ndarray]]], directory: str,
+                       dpi: int, workers: Optional[int]) -> List[str]:
+        """Dibujar los frames grabados como PNG, en bloques contiguos por proceso"""
+        paths = [os.path.join(directory, f'frame_{f:05d}.png') for f in range(len(recorded))]
+        workers = workers or os.cpu_count() or 1
+        if workers == 1:
+            # Sin pool: se reutiliza la figura propia (savefig dibuja con Agg)
+            self.fig.tight_layout()
+            self._save_frames(recorded, paths, dpi)
+            return paths
+        n_chunks = min(len(recorded), 4 * workers)
+        bounds = np.linspace(0, len(recorded), n_chunks + 1).astype(int)
+        with ProcessPoolExecutor(workers, initializer=_init_render_worker,
+                                 initargs=(self.specs, self.horizon)) as pool:
+            list(pool.map(_render_chunk,
+                          [recorded[a:b] for a, b in zip(bounds[:-1], bounds[1:])],
+                          [paths[a:b] for a, b in zip(bounds[:-1], bounds[1:])],
+                          [dpi] * n_chunks))
+        return paths
+
+    def _save_frames(self, recorded: List[List[Tuple[str, np.ndarray]]], paths: List[str], dpi: int):
+        """Aplicar cada estado grabado a los artistas y guardar la figura"""
+        for frame, path in zip(recorded, paths):
+            for (text, offsets), txt, sc in zip(frame, self.texts, self.client_scatter):
+                txt.set_text(text)
+                sc.set_offsets(offsets.reshape(-1, 2))
+            self.fig.savefig(path, dpi=dpi)
+
     def _generate_report(self):
         """Generar reporte de métricas post-simulación"""
         print("\n" + "="*80)
@@ -986,15 +2405,31 @@ class AnimatedComparison:
         print("  L  = Número promedio de clientes en el sistema")
         print("="*80 + "\n")
         
+        # Perfil de la animación: costo de simular vs costo de dibujar
+        prof = self.profile_summary()
+        if prof['frames'] > 0:
+            print(f"PERFIL POR FRAME ({prof['frames']} frames):")
+            print(f"  Simulación            = {prof['sim_ms']:.3f} ms")
+            for spec, ms in zip(self.specs, prof['sim_ms_panels']):
+                print(f"    {spec.name:<18} = {ms:.3f} ms")
+            print(f"  Actualizar artistas   = {prof['update_ms']:.3f} ms")
+            dibujo = "Dibujo (blit)" if self._blit else "Dibujo del canvas"
+            print(f"  {dibujo:<21} = {prof['draw_ms']:.3f} ms")
+            print(f"  Frames sin cambios    = {prof['skipped']}")
+            print(f"  Tiempo simulado/frame = {prof['dt_mean']:.3f}")
+            print("="*80 + "\n")
+        
         # Generar gráfico de series temporales
         self._plot_time_series()
     
     def _plot_time_series(self):
         """Generar gráfico de tiempo en el sistema vs tiempo de simulación"""
-        fig, axes = plt.subplots(2, 2, figsize=(16, 10))
-        axes = axes.flatten()
+        rows, cols = panel_grid(len(self.specs))
+        fig, axes = plt.subplots(rows, cols, figsize=(min(20, 8 * cols), min(14, 5 * rows)), squeeze=False)
+        for ax in axes.flat[len(self.specs):]:
+            ax.set_visible(False)
         
-        for i, (spec, sim, ax) in enumerate(zip(self.specs, self.sims, axes)):
+        for i, (spec, sim, ax) in enumerate(zip(self.specs, self.sims, axes.flat)):
             p = spec.params
             
             if not sim.departure_times:
@@ -1004,26 +2439,20 @@ class AnimatedComparison:
                 ax.set_title(f"{spec.name}", fontsize=13, fontweight='bold', pad=10)
                 continue
             
-            # Usar datos de tiempos de espera
-            departure_times = sim.departure_times
-            wait_times = sim.wait_times
-            wait_times_q = sim.wait_times_q
-            
-            # Submuestrear si hay demasiados puntos
-            sample_rate = max(1, len(departure_times) // 500)
-            dep_times = departure_times[::sample_rate]
-            w_times = wait_times[::sample_rate]
-            wq_times = wait_times_q[::sample_rate]
+            # Envolvente mín/máx por píxel en lugar de tomar uno de cada n
+            # puntos, que descartaba justamente los picos de espera
+            departure_times = np.asarray(sim.departure_times, dtype=float)
+            dep_times, w_times = downsample_for_axes(ax, departure_times, sim.wait_times)
+            dq_times, wq_times = downsample_for_axes(ax, departure_times, sim.wait_times_q)
             
             # Graficar tiempos de espera con líneas conectadas
             ax.plot(dep_times, w_times, 'b-', linewidth=2, alpha=0.7, 
                    label='Tiempo en sistema (W)', marker='o', markersize=4, markevery=max(1, len(dep_times)//50))
-            ax.plot(dep_times, wq_times, 'r--', linewidth=2, alpha=0.7, 
-                   label='Tiempo en cola (Wq)', marker='s', markersize=3, markevery=max(1, len(dep_times)//50))
+            ax.plot(dq_times, wq_times, 'r--', linewidth=2, alpha=0.7, 
+                   label='Tiempo en cola (Wq)', marker='s', markersize=3, markevery=max(1, len(dq_times)//50))
             
-            # Calcular límites dinámicos del eje Y
-            max_val = max(max(w_times) if w_times else 1, 
-                         max(wq_times) if wq_times else 1)
+            # Calcular límites dinámicos del eje Y (la envolvente conserva los máximos)
+            max_val = max(w_times.max(), wq_times.max())
             ax.set_ylim(-0.05, max_val * 1.15)
             
             # Configurar ejes
@@ -1068,6 +2497,40 @@ class AnimatedComparison:
         plt.tight_layout()
         plt.show()
 
+# -----------------------------
+# Exportación sin ventana
+# -----------------------------
+
+_render_figure: Optional[AnimatedComparison] = None  # Figura propia de cada proceso de dibujo
+
+
+def _init_render_worker(specs: List[ModelSpec], horizon: float):
+    """Construir (una vez por proceso) la figura con la topología estática"""
+    global _render_figure
+    plt.switch_backend('Agg')
+    _render_figure = AnimatedComparison(specs, horizon=horizon)
+    _render_figure.fig.tight_layout()
+
+
+def _render_chunk(recorded: List[List[Tuple[str, np.ndarray]]], paths: List[str], dpi: int):
+    """Dibujar un bloque de frames con la figura del proceso"""
+    _render_figure._save_frames(recorded, paths, dpi)
+
+
+def _encode_video(pngs: List[str], path: str, fps: int, writer: str, dpi: int):
+    """Codificar los PNG ya dibujados con un writer de matplotlib"""
+    first = plt.imread(pngs[0])
+    height, width = first.shape[:2]
+    fig = plt.figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+    image = fig.figimage(first)
+    movie = animation.writers[writer](fps=fps)
+    with movie.saving(fig, path, dpi):
+        for png in pngs:
+            image.set_data(plt.imread(png))
+            movie.grab_frame()
+    plt.close(fig)
+
+
 # -----------------------------
 # Punto de entrada
 # -----------------------------
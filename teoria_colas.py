@@ -6,13 +6,120 @@ de modelos de colas M/M/1 y M/M/c, útiles para validar simulaciones.
 """
 
 import math
-from typing import Dict, Optional
+import numbers
+import threading
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+from typing import Callable, Dict, Hashable, Optional
+
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class LRUCache:
+    """
+    Caché acotada con política LRU, segura para uso entre hilos
+
+    Guarda diccionarios de métricas y entrega copias, de modo que un
+    llamador que modifique el resultado no altere la entrada en caché.
+    Las excepciones no se almacenan: un cálculo que falla se repite.
+    """
+    
+    def __init__(self, maxsize: int = 4096):
+        if maxsize < 0:
+            raise ValueError(f"maxsize no puede ser negativo, recibido: {maxsize}")
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Dict[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Dict[str, float]]) -> Dict[str, float]:
+        """Devolver el valor asociado a key, calculándolo si no está en caché"""
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return dict(value)
+            self.misses += 1
+        
+        # El cálculo se hace fuera del candado para no serializar hilos;
+        # si dos hilos calculan la misma clave, ambos obtienen el mismo valor
+        value = compute()
+        with self._lock:
+            if self.maxsize > 0:
+                self._data[key] = value
+                self._data.move_to_end(key)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+        return dict(value)
+    
+    def resize(self, maxsize: int):
+        """Cambiar el tamaño máximo, descartando las entradas más antiguas si sobran"""
+        if maxsize < 0:
+            raise ValueError(f"maxsize no puede ser negativo, recibido: {maxsize}")
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._data) > maxsize:
+                self._data.popitem(last=False)
+    
+    def clear(self):
+        """Vaciar la caché y reiniciar las estadísticas"""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def info(self) -> CacheInfo:
+        """Estadísticas de aciertos y fallos"""
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+
+# Caché compartida por analytical_mm1 y analytical_mmc
+_analytic_cache = LRUCache()
+
+
+def _analytic_key(model: str, lam: float, mu: float, c: int) -> tuple:
+    """
+    Clave normalizada (λ, μ, c): 1 y 1.0 comparten entrada para λ y μ
+
+    c se valida en lugar de convertirse: con int(c), c = 2.5 compartiría
+    la entrada de c = 2 y devolvería métricas de otro sistema.
+    """
+    if isinstance(c, bool) or not isinstance(c, numbers.Integral):
+        raise ValueError(f"c debe ser un entero, recibido: {c!r}")
+    return (model, float(lam), float(mu), c)
+
+
+def configure_analytic_cache(maxsize: int):
+    """
+    Configurar el tamaño de la caché de funciones analíticas
+    
+    Parámetros:
+        maxsize: Número máximo de entradas (0 desactiva la caché)
+    """
+    _analytic_cache.resize(maxsize)
+
+
+def analytic_cache_info() -> CacheInfo:
+    """Estadísticas de la caché analítica: hits, misses, maxsize, currsize"""
+    return _analytic_cache.info()
+
+
+def clear_analytic_cache():
+    """Vaciar la caché analítica y reiniciar sus estadísticas"""
+    _analytic_cache.clear()
 
 
 def analytical_mm1(lam: float, mu: float) -> Dict[str, float]:
     """
     Calcular métricas analíticas para modelo M/M/1
     
+    Los resultados se guardan en una caché LRU compartida (ver
+    configure_analytic_cache y analytic_cache_info).
+    
     Parámetros:
         lam: Tasa de llegadas (λ)
         mu: Tasa de servicio (μ)
@@ -23,6 +130,14 @@ def analytical_mm1(lam: float, mu: float) -> Dict[str, float]:
     Raises:
         ValueError: Si λ o μ no son positivos, o si ρ ≥ 1 (sistema inestable)
     """
+    return _analytic_cache.get_or_compute(
+        _analytic_key('mm1', lam, mu, 1),
+        lambda: _analytical_mm1(lam, mu),
+    )
+
+
+def _analytical_mm1(lam: float, mu: float) -> Dict[str, float]:
+    """Cálculo sin caché de analytical_mm1"""
     if lam <= 0:
         raise ValueError(f"λ debe ser positiva, recibido: {lam}")
     if mu <= 0:
@@ -62,6 +177,9 @@ def analytical_mmc(lam: float, mu: float, c: int) -> Dict[str, float]:
     """
     Calcular métricas analíticas para modelo M/M/c
     
+    Los resultados se guardan en una caché LRU compartida (ver
+    configure_analytic_cache y analytic_cache_info).
+    
     Parámetros:
         lam: Tasa de llegadas (λ)
         mu: Tasa de servicio (μ)
@@ -73,6 +191,14 @@ def analytical_mmc(lam: float, mu: float, c: int) -> Dict[str, float]:
     Raises:
         ValueError: Si parámetros inválidos o sistema inestable
     """
+    return _analytic_cache.get_or_compute(
+        _analytic_key('mmc', lam, mu, c),
+        lambda: _analytical_mmc(lam, mu, c),
+    )
+
+
+def _analytical_mmc(lam: float, mu: float, c: int) -> Dict[str, float]:
+    """Cálculo sin caché de analytical_mmc"""
     if lam <= 0:
         raise ValueError(f"λ debe ser positiva, recibido: {lam}")
     if mu <= 0:
@@ -115,6 +241,174 @@ def analytical_mmc(lam: float, mu: float, c: int) -> Dict[str, float]:
     }
 
 
+def stationary_probability_mmc(lam: float, mu: float, c: int, n: int) -> float:
+    """
+    Probabilidad estacionaria P(n) de tener n clientes en M/M/c
+
+        P(n) = P0·aⁿ/n!              si n < c
+        P(n) = P0·aᶜ/c!·ρ⁽ⁿ⁻ᶜ⁾         si n ≥ c
+
+    Con c = 1 se reduce a la geométrica (1-ρ)ρⁿ de M/M/1. P0 se toma de
+    analytical_mmc (con caché), por lo que evaluar muchos n es barato.
+
+    Raises:
+        ValueError: Si parámetros inválidos, n negativo o sistema inestable
+    """
+    if n < 0:
+        raise ValueError(f"n no puede ser negativo, recibido: {n}")
+    P0 = analytical_mmc(lam, mu, c)['P0']
+    a = lam / mu
+    if n < c:
+        return P0 * a ** n / factorial(n)
+    rho = lam / (c * mu)
+    return P0 * a ** c / factorial(c) * rho ** (n - c)
+
+
+def _brent_root(f: Callable[[float], float], a: float, b: float,
+                xtol: float = 1e-12, maxiter: int = 200) -> float:
+    """
+    Encontrar una raíz de f en [a, b] con el método de Brent
+
+    Combina bisección, secante e interpolación cuadrática inversa: cada
+    paso de interpolación se acepta solo si cae dentro del intervalo y
+    reduce el paso lo suficiente; en caso contrario se bisecta. Así la
+    convergencia es superlineal sin perder la garantía de la bisección.
+
+    Raises:
+        ValueError: Si f(a) y f(b) no tienen signos opuestos
+    """
+    fa, fb = f(a), f(b)
+    if fa == 0.0:
+        return a
+    if fb == 0.0:
+        return b
+    if fa * fb > 0:
+        raise ValueError(f"La raíz no está acotada en [{a}, {b}]")
+
+    c, fc = a, fa
+    d = e = b - a
+    for _ in range(maxiter):
+        if fb * fc > 0:
+            c, fc = a, fa
+            d = e = b - a
+        if abs(fc) < abs(fb):
+            a, b, c = b, c, b
+            fa, fb, fc = fb, fc, fb
+
+        tol = 2.0 * 2.2e-16 * abs(b) + 0.5 * xtol
+        m = 0.5 * (c - b)
+        if abs(m) <= tol or fb == 0.0:
+            return b
+
+        if abs(e) >= tol and abs(fa) > abs(fb):
+            # Interpolación (secante o cuadrática inversa)
+            s = fb / fa
+            if a == c:
+                p = 2.0 * m * s
+                q = 1.0 - s
+            else:
+                q = fa / fc
+                r = fb / fc
+                p = s * (2.0 * m * q * (q - r) - (b - a) * (r - 1.0))
+                q = (q - 1.0) * (r - 1.0) * (s - 1.0)
+            if p > 0:
+                q = -q
+            else:
+                p = -p
+            if 2.0 * p < min(3.0 * m * q - abs(tol * q), abs(e * q)):
+                e, d = d, p / q
+            else:
+                d = e = m
+        else:
+            d = e = m
+
+        a, fa = b, fb
+        b += d if abs(d) > tol else math.copysign(tol, m)
+        fb = f(b)
+
+    return b
+
+
+def _waiting_time_mmc(lam: float, mu: float, c: int, metric: str) -> float:
+    """W o Wq de M/M/c extendido con continuidad a λ = 0"""
+    if lam <= 0:
+        return 1 / mu if metric == 'W' else 0.0
+    # Sin caché: las iteraciones del solver no deben desplazar entradas útiles
+    return _analytical_mmc(lam, mu, c)[metric]
+
+
+@lru_cache(maxsize=1024)
+def max_arrival_rate_mmc(mu: float, c: int, threshold: float, metric: str = 'Wq',
+                         xtol: float = 1e-10) -> float:
+    """
+    Calcular la máxima tasa de llegadas que cumple un SLA en M/M/c
+
+    Busca el mayor λ tal que la métrica (W o Wq) no supere el umbral con
+    c servidores de tasa μ. Como W y Wq crecen de forma monótona con λ,
+    la raíz queda acotada en [0, c·μ) por la condición de estabilidad y
+    se resuelve con el método de Brent. Los resultados se memorizan.
+
+    Parámetros:
+        mu: Tasa de servicio por servidor (μ)
+        c: Número de servidores
+        threshold: Valor máximo admisible de la métrica
+        metric: 'Wq' (tiempo en cola) o 'W' (tiempo en sistema)
+        xtol: Tolerancia absoluta sobre λ
+
+    Retorna:
+        λ máximo que mantiene la métrica por debajo del umbral
+
+    Raises:
+        ValueError: Si los parámetros son inválidos o el umbral es inalcanzable
+    """
+    if mu <= 0:
+        raise ValueError(f"μ debe ser positiva, recibido: {mu}")
+    if c <= 0:
+        raise ValueError(f"c debe ser positivo, recibido: {c}")
+    if metric not in ('W', 'Wq'):
+        raise ValueError(f"Métrica no soportada: {metric} (use 'W' o 'Wq')")
+    if threshold <= 0:
+        raise ValueError(f"El umbral debe ser positivo, recibido: {threshold}")
+    if metric == 'W' and threshold <= 1 / mu:
+        raise ValueError(
+            f"Umbral W = {threshold} inalcanzable: el tiempo de servicio "
+            f"promedio ya es 1/μ = {1 / mu:.4f}"
+        )
+
+    def f(lam: float) -> float:
+        return _waiting_time_mmc(lam, mu, c, metric) - threshold
+
+    # Acotar la raíz por debajo de la cota de estabilidad λ < c·μ: la
+    # métrica diverge cuando ρ → 1, así que basta acercarse a c·μ
+    upper = c * mu
+    gap = 0.5
+    hi = upper * (1 - gap)
+    while f(hi) < 0:
+        gap *= 0.5
+        if upper * gap <= xtol:
+            return upper * (1 - gap)
+        hi = upper * (1 - gap)
+
+    return _brent_root(f, 0.0, hi, xtol=xtol)
+
+
+def max_arrival_rate_mm1(mu: float, threshold: float, metric: str = 'Wq',
+                         xtol: float = 1e-10) -> float:
+    """
+    Calcular la máxima tasa de llegadas que cumple un SLA en M/M/1
+
+    Parámetros:
+        mu: Tasa de servicio (μ)
+        threshold: Valor máximo admisible de la métrica
+        metric: 'Wq' (tiempo en cola) o 'W' (tiempo en sistema)
+        xtol: Tolerancia absoluta sobre λ
+
+    Retorna:
+        λ máximo que mantiene la métrica por debajo del umbral
+    """
+    return max_arrival_rate_mmc(mu, 1, threshold, metric, xtol)
+
+
 def littles_law_check(L: float, lam: float, W: float, tolerance: float = 0.1) -> bool:
     """
     Verificar la Ley de Little: L = λ × W
@@ -243,3 +537,8 @@ if __name__ == '__main__':
     print(f"Wq = {mmc_metrics['Wq']:.3f}")
     print(f"P0 = {mmc_metrics['P0']:.3f}")
     print(f"C (Prob. espera) = {mmc_metrics['C']:.3f}")
+    
+    print("\n" + "="*80)
+    print("Ejemplo: λ máximo con μ=2.5, c=3 y SLA Wq ≤ 0.1")
+    lam_max = max_arrival_rate_mmc(mu=2.5, c=3, threshold=0.1, metric='Wq')
+    print(f"λ máx = {lam_max:.4f} (ρ = {lam_max / (3 * 2.5):.3f})")
@@ -0,0 +1,372 @@
+"""
+Módulo de solución matriz-geométrica para procesos cuasi-nacimiento-muerte
+
+Varias variantes de M/M/c que no tienen fórmula cerrada son procesos QBD
+(quasi-birth-death): el número de clientes define el nivel y una fase
+finita describe el estado interno de los servidores. Este módulo resuelve
+la distribución estacionaria con el método matriz-geométrico, calculando
+la matriz R por reducción logarítmica (Latouche–Ramaswami), e incluye:
+
+- M/M/c con servidores heterogéneos (tasas μ₁, ..., μc distintas)
+- M/PH/c con tiempos de servicio de tipo fase (Erlang, hiperexponencial...)
+
+Las métricas se devuelven con las mismas claves que analytical_mmc
+(rho, L, Lq, W, Wq, P0, C), de modo que pueden pasarse directamente a
+compare_simulation_vs_theory().
+"""
+
+import itertools
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+def log_reduction(A0: np.ndarray, A1: np.ndarray, A2: np.ndarray,
+                  tol: float = 1e-12, maxiter: int = 100) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calcular las matrices G y R de un QBD por reducción logarítmica
+
+    G es la solución mínima no negativa de A2 + A1·G + A0·G² = 0 y
+    R = A0·(−(A1 + A0·G))⁻¹. La convergencia es cuadrática: cada iteración
+    duplica el número de niveles considerados.
+
+    Parámetros:
+        A0: Transiciones hacia el nivel superior (llegadas)
+        A1: Transiciones dentro del nivel (incluye la diagonal)
+        A2: Transiciones hacia el nivel inferior (salidas)
+        tol: Tolerancia sobre 1 − G·1
+        maxiter: Máximo de iteraciones
+
+    Retorna:
+        (G, R)
+
+    Raises:
+        ValueError: Si no converge (típicamente, QBD no recurrente positivo)
+    """
+    m = A1.shape[0]
+    eye = np.eye(m)
+    ones = np.ones(m)
+    inv_a1 = np.linalg.inv(-A1)
+    down = inv_a1 @ A2
+    up = inv_a1 @ A0
+    G = down.copy()
+    T = up.copy()
+    for _ in range(maxiter):
+        local = down @ up + up @ down
+        inv_local = np.linalg.inv(eye - local)
+        down = inv_local @ (down @ down)
+        up = inv_local @ (up @ up)
+        G = G + T @ down
+        T = T @ up
+        if np.max(np.abs(ones - G @ ones)) < tol:
+            break
+    else:
+        raise ValueError("La reducción logarítmica no convergió: ¿el sistema es estable?")
+
+    R = A0 @ np.linalg.inv(-(A1 + A0 @ G))
+    return G, R
+
+
+def solve_qbd(B00: np.ndarray, B01: np.ndarray, B10: np.ndarray,
+              A0: np.ndarray, A1: np.ndarray, A2: np.ndarray,
+              tol: float = 1e-12) -> Dict[str, np.ndarray]:
+    """
+    Resolver un QBD con un nivel frontera arbitrario
+
+    El nivel 0 (frontera) tiene su propio espacio de fases; los niveles
+    j ≥ 1 se repiten con bloques A0, A1, A2, salvo que el nivel 1 baja a
+    la frontera mediante B10. La solución es π_j = π₁·R^(j−1).
+
+    Parámetros:
+        B00: Transiciones dentro de la frontera (incluye la diagonal)
+        B01: Frontera → nivel 1
+        B10: Nivel 1 → frontera
+        A0, A1, A2: Bloques de los niveles repetitivos
+
+    Retorna:
+        Diccionario con pi0, pi1, R y G
+    """
+    G, R = log_reduction(A0, A1, A2, tol=tol)
+    b = B00.shape[0]
+    m = A1.shape[0]
+    inv_i_r = np.linalg.inv(np.eye(m) - R)
+
+    # [π0, π1]·M = 0 con la última ecuación reemplazada por la normalización
+    M = np.block([[B00, B01], [B10, A1 + R @ A2]])
+    M[:, -1] = np.concatenate([np.ones(b), inv_i_r @ np.ones(m)])
+    rhs = np.zeros(b + m)
+    rhs[-1] = 1.0
+    x = np.linalg.solve(M.T, rhs)
+    return {'pi0': x[:b], 'pi1': x[b:], 'R': R, 'G': G}
+
+
+def _qbd_metrics(lam: float, rho: float, c: int, n_boundary: np.ndarray,
+                 sol: Dict[str, np.ndarray]) -> Dict[str, float]:
+    """
+    Métricas L, Lq, W, Wq, P0 y C a partir de la solución matriz-geométrica
+
+    Los estados frontera tienen n_boundary clientes (todos en servicio);
+    el nivel j ≥ 1 tiene c + j − 1 clientes, de los cuales j − 1 en cola.
+    """
+    pi0, pi1, R = sol['pi0'], sol['pi1'], sol['R']
+    m = R.shape[0]
+    ones = np.ones(m)
+    inv_i_r = np.linalg.inv(np.eye(m) - R)
+
+    p_busy = float(pi1 @ inv_i_r @ ones)            # P(n ≥ c) = P(esperar)
+    Lq = float(pi1 @ R @ inv_i_r @ inv_i_r @ ones)  # Σ (j−1)·π_j·1
+    L = float(pi0 @ n_boundary) + c * p_busy + Lq
+
+    return {
+        'rho': rho,
+        'L': L,
+        'Lq': Lq,
+        'W': L / lam,
+        'Wq': Lq / lam,
+        'P0': float(pi0[n_boundary == 0].sum()),
+        'C': p_busy,
+    }
+
+
+def qbd_mmc_heterogeneous(lam: float, mus: Sequence[float],
+                          policy: str = 'fastest') -> Dict[str, float]:
+    """
+    Calcular métricas de M/M/c con servidores de tasas distintas
+
+    La fase de la frontera es el subconjunto de servidores ocupados (2^c
+    estados); cuando todos están ocupados la tasa de salida es Σμᵢ.
+
+    Parámetros:
+        lam: Tasa de llegadas (λ)
+        mus: Tasas de servicio de cada servidor (μ₁, ..., μc)
+        policy: Servidor libre que recibe una llegada: 'fastest' (el de
+                mayor μ) o 'random' (uniforme entre los libres)
+
+    Retorna:
+        Diccionario con métricas: rho, L, Lq, W, Wq, P0, C
+
+    Raises:
+        ValueError: Si parámetros inválidos o sistema inestable
+    """
+    mus = [float(m) for m in mus]
+    c = len(mus)
+    if lam <= 0:
+        raise ValueError(f"λ debe ser positiva, recibido: {lam}")
+    if c == 0 or any(m <= 0 for m in mus):
+        raise ValueError(f"Todas las tasas μ deben ser positivas, recibido: {mus}")
+    if policy not in ('fastest', 'random'):
+        raise ValueError(f"Política no soportada: {policy} (use 'fastest' o 'random')")
+    total_mu = sum(mus)
+    rho = lam / total_mu
+    if rho >= 1.0:
+        raise ValueError(
+            f"Sistema M/M/c heterogéneo inestable: ρ = λ/Σμ = {rho:.3f} ≥ 1. "
+            f"No se pueden calcular métricas en estado estacionario."
+        )
+
+    # Frontera: subconjuntos propios de servidores ocupados, como máscaras
+    full = (1 << c) - 1
+    masks = [s for s in range(full)]
+    index = {s: i for i, s in enumerate(masks)}
+    b = len(masks)
+    B00 = np.zeros((b, b))
+    B01 = np.zeros((b, 1))
+    B10 = np.zeros((1, b))
+    by_speed = sorted(range(c), key=lambda i: -mus[i])
+
+    for s in masks:
+        i = index[s]
+        idle = [j for j in range(c) if not s & (1 << j)]
+        if policy == 'fastest':
+            targets = [(next(j for j in by_speed if j in idle), 1.0)]
+        else:
+            targets = [(j, 1.0 / len(idle)) for j in idle]
+        for j, p in targets:
+            t = s | (1 << j)
+            if t == full:
+                B01[i, 0] += lam * p
+            else:
+                B00[i, index[t]] += lam * p
+        for j in range(c):
+            if s & (1 << j):
+                B00[i, index[s & ~(1 << j)]] += mus[j]
+        B00[i, i] = -(lam + sum(mus[j] for j in range(c) if s & (1 << j)))
+
+    for j in range(c):
+        B10[0, index[full & ~(1 << j)]] += mus[j]
+
+    A0 = np.array([[lam]])
+    A1 = np.array([[-(lam + total_mu)]])
+    A2 = np.array([[total_mu]])
+
+    sol = solve_qbd(B00, B01, B10, A0, A1, A2)
+    n_boundary = np.array([bin(s).count('1') for s in masks], dtype=float)
+    return _qbd_metrics(lam, rho, c, n_boundary, sol)
+
+
+def ph_erlang(k: int, mu: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Representación de tipo fase de una Erlang-k con media 1/μ
+
+    Retorna:
+        (alpha, T): vector inicial y subgeneradora
+    """
+    if k <= 0:
+        raise ValueError(f"k debe ser positivo, recibido: {k}")
+    T = np.diag(np.full(k, -k * mu)) + np.diag(np.full(k - 1, k * mu), 1)
+    alpha = np.zeros(k)
+    alpha[0] = 1.0
+    return alpha, T
+
+
+def ph_hyperexponential(probs: Sequence[float], rates: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Representación de tipo fase de una hiperexponencial
+
+    Retorna:
+        (alpha, T): vector inicial y subgeneradora
+    """
+    alpha = np.asarray(probs, dtype=float)
+    T = -np.diag(np.asarray(rates, dtype=float))
+    return alpha, T
+
+
+def _ph_configs(m: int, n: int) -> List[Tuple[int, ...]]:
+    """Vectores de conteo (servidores por fase) con n servidores ocupados"""
+    configs = []
+    for combo in itertools.combinations_with_replacement(range(m), n):
+        x = [0] * m
+        for phase in combo:
+            x[phase] += 1
+        configs.append(tuple(x))
+    return configs
+
+
+def qbd_mphc(lam: float, alpha: Sequence[float], T: np.ndarray, c: int) -> Dict[str, float]:
+    """
+    Calcular métricas de M/PH/c (servicio de tipo fase, c servidores)
+
+    La fase de cada nivel es el vector de conteo de servidores ocupados en
+    cada fase del servicio, de modo que el tamaño de los bloques es
+    C(c+m−1, m−1) para m fases.
+
+    Parámetros:
+        lam: Tasa de llegadas (λ)
+        alpha: Distribución de la fase inicial del servicio (suma 1)
+        T: Subgeneradora m×m del tiempo de servicio
+        c: Número de servidores
+
+    Retorna:
+        Diccionario con métricas: rho, L, Lq, W, Wq, P0, C
+
+    Raises:
+        ValueError: Si parámetros inválidos o sistema inestable
+    """
+    alpha = np.asarray(alpha, dtype=float)
+    T = np.asarray(T, dtype=float)
+    m = len(alpha)
+    if lam <= 0:
+        raise ValueError(f"λ debe ser positiva, recibido: {lam}")
+    if c <= 0:
+        raise ValueError(f"c debe ser positivo, recibido: {c}")
+    if T.shape != (m, m):
+        raise ValueError(f"T debe ser {m}×{m}, recibido: {T.shape}")
+    if abs(alpha.sum() - 1.0) > 1e-9:
+        raise ValueError(f"alpha debe sumar 1, suma: {alpha.sum()}")
+
+    exit_rates = -T @ np.ones(m)
+    mean_service = float(alpha @ np.linalg.inv(-T) @ np.ones(m))
+    rho = lam * mean_service / c
+    if rho >= 1.0:
+        raise ValueError(
+            f"Sistema M/PH/c inestable: ρ = λ·E[S]/c = {rho:.3f} ≥ 1. "
+            f"No se pueden calcular métricas en estado estacionario."
+        )
+
+    boundary = [x for n in range(c) for x in _ph_configs(m, n)]
+    b_index = {x: i for i, x in enumerate(boundary)}
+    level = _ph_configs(m, c)
+    l_index = {x: i for i, x in enumerate(level)}
+    b, ml = len(boundary), len(level)
+
+    def phase_moves(x):
+        """Cambios de fase internos (i → j) de servidores ocupados"""
+        for i in range(m):
+            if x[i] == 0:
+                continue
+            for j in range(m):
+                if j != i and T[i, j] > 0:
+                    y = list(x)
+                    y[i] -= 1
+                    y[j] += 1
+                    yield tuple(y), x[i] * T[i, j]
+
+    def out_rate(x):
+        return lam + sum(x[i] * -T[i, i] for i in range(m))
+
+    B00 = np.zeros((b, b))
+    B01 = np.zeros((b, ml))
+    B10 = np.zeros((ml, b))
+    A0 = lam * np.eye(ml)
+    A1 = np.zeros((ml, ml))
+    A2 = np.zeros((ml, ml))
+
+    for x in boundary:
+        i = b_index[x]
+        n = sum(x)
+        for j in range(m):
+            if alpha[j] == 0:
+                continue
+            y = list(x)
+            y[j] += 1
+            y = tuple(y)
+            if n + 1 == c:
+                B01[i, l_index[y]] += lam * alpha[j]
+            else:
+                B00[i, b_index[y]] += lam * alpha[j]
+        for y, rate in phase_moves(x):
+            B00[i, b_index[y]] += rate
+        for ph in range(m):
+            if x[ph] and exit_rates[ph] > 0:
+                y = list(x)
+                y[ph] -= 1
+                B00[i, b_index[tuple(y)]] += x[ph] * exit_rates[ph]
+        B00[i, i] = -out_rate(x)
+
+    for x in level:
+        i = l_index[x]
+        for y, rate in phase_moves(x):
+            A1[i, l_index[y]] += rate
+        A1[i, i] = -out_rate(x)
+        for ph in range(m):
+            if not x[ph] or exit_rates[ph] <= 0:
+                continue
+            rate = x[ph] * exit_rates[ph]
+            y = list(x)
+            y[ph] -= 1
+            # Nivel 1: el servidor queda libre (vuelve a la frontera)
+            B10[i, b_index[tuple(y)]] += rate
+            # Niveles ≥ 2: el siguiente cliente de la cola inicia servicio
+            for j in range(m):
+                if alpha[j] > 0:
+                    z = list(y)
+                    z[j] += 1
+                    A2[i, l_index[tuple(z)]] += rate * alpha[j]
+
+    sol = solve_qbd(B00, B01, B10, A0, A1, A2)
+    n_boundary = np.array([sum(x) for x in boundary], dtype=float)
+    return _qbd_metrics(lam, rho, c, n_boundary, sol)
+
+
+if __name__ == '__main__':
+    # Ejemplo de uso
+    print("Ejemplo: M/M/3 heterogéneo con λ=4.0, μ=(1.0, 1.5, 2.5)")
+    m = qbd_mmc_heterogeneous(4.0, [1.0, 1.5, 2.5])
+    print(f"ρ = {m['rho']:.3f}  L = {m['L']:.4f}  Lq = {m['Lq']:.4f}  "
+          f"W = {m['W']:.4f}  Wq = {m['Wq']:.4f}")
+
+    print("\nEjemplo: M/E3/2 con λ=3.0, μ=2.0")
+    alpha, T = ph_erlang(3, 2.0)
+    m = qbd_mphc(3.0, alpha, T, c=2)
+    print(f"ρ = {m['rho']:.3f}  L = {m['L']:.4f}  Lq = {m['Lq']:.4f}  "
+          f"W = {m['W']:.4f}  Wq = {m['Wq']:.4f}")
@@ -16,8 +16,18 @@ from teoria_colas import (
     analytical_mm1,
     analytical_mmc,
     littles_law_check,
-    compare_simulation_vs_theory
+    compare_simulation_vs_theory,
+    max_arrival_rate_mm1,
+    max_arrival_rate_mmc,
+    analytic_cache_info,
+    clear_analytic_cache,
+    configure_analytic_cache,
 )
+from teoria_jsq import ctmc_mmk1, ctmc_mmkc
+from teoria_qbd import qbd_mmc_heterogeneous, qbd_mphc, ph_erlang
+from teoria_transitoria import transient_distribution, transient_mean, warmup_time
+from estadisticas_online import QuantileSketch, OnlineHistogram, TumblingWindow, DecayingWindow
+from submuestreo import minmax_envelope, lttb, downsample
 
 
 class TestMM1(unittest.TestCase):
@@ -320,6 +330,1081 @@ class TestExportacion(unittest.TestCase):
         os.remove(filename)
 
 
+class TestCapacidadMaxima(unittest.TestCase):
+    """Pruebas para el cálculo de λ máximo bajo un SLA"""
+    
+    def test_mm1_coincide_con_formula_cerrada(self):
+        """En M/M/1 el λ máximo tiene solución cerrada"""
+        mu = 2.0
+        # W = 1/(μ-λ) ≤ T  →  λ = μ - 1/T
+        self.assertAlmostEqual(max_arrival_rate_mm1(mu, 1.0, metric='W'), mu - 1.0, places=8)
+        # Wq = λ/(μ(μ-λ)) ≤ T  →  λ = Tμ²/(1+Tμ)
+        self.assertAlmostEqual(max_arrival_rate_mm1(mu, 1.0, metric='Wq'), 4.0 / 3.0, places=8)
+    
+    def test_mmc_cumple_umbral(self):
+        """El λ encontrado deja la métrica justo en el umbral"""
+        mu, c, umbral = 2.5, 3, 0.5
+        lam = max_arrival_rate_mmc(mu, c, umbral, metric='Wq')
+        self.assertLess(lam, c * mu)
+        self.assertAlmostEqual(analytical_mmc(lam, mu, c)['Wq'], umbral, places=6)
+    
+    def test_umbral_inalcanzable(self):
+        """Un umbral W menor que 1/μ no tiene solución"""
+        with self.assertRaises(ValueError):
+            max_arrival_rate_mmc(2.0, 2, 0.4, metric='W')
+    
+    def test_resultados_memorizados(self):
+        """Consultas repetidas no repiten la búsqueda de la raíz"""
+        max_arrival_rate_mmc.cache_clear()
+        max_arrival_rate_mmc(1.0, 4, 0.2, 'Wq')
+        max_arrival_rate_mmc(1.0, 4, 0.2, 'Wq')
+        self.assertEqual(max_arrival_rate_mmc.cache_info().hits, 1)
+
+
+class TestCacheAnalitica(unittest.TestCase):
+    """Pruebas para la caché LRU de funciones analíticas"""
+    
+    def setUp(self):
+        configure_analytic_cache(4096)
+        clear_analytic_cache()
+    
+    def tearDown(self):
+        configure_analytic_cache(4096)
+        clear_analytic_cache()
+    
+    def test_aciertos_con_clave_normalizada(self):
+        """Parámetros equivalentes (1 y 1.0) comparten entrada"""
+        analytical_mmc(1, 2, 3)
+        analytical_mmc(1.0, 2.0, 3)
+        info = analytic_cache_info()
+        self.assertEqual(info.misses, 1)
+        self.assertEqual(info.hits, 1)
+        self.assertEqual(info.currsize, 1)
+    
+    def test_c_no_entero(self):
+        """Un c no entero se rechaza en lugar de leer la entrada de int(c)"""
+        analytical_mmc(1, 1, 2)
+        with self.assertRaises(ValueError):
+            analytical_mmc(1, 1, 2.5)
+        self.assertEqual(analytic_cache_info().hits, 0)
+    
+    def test_resultado_no_se_altera(self):
+        """Modificar el diccionario devuelto no corrompe la caché"""
+        r1 = analytical_mm1(0.6, 2.0)
+        r1['L'] = -1.0
+        self.assertAlmostEqual(analytical_mm1(0.6, 2.0)['L'], 0.3 / 0.7)
+    
+    def test_expulsion_lru(self):
+        """Con tamaño acotado se expulsa la entrada menos reciente"""
+        configure_analytic_cache(2)
+        analytical_mm1(0.1, 1.0)
+        analytical_mm1(0.2, 1.0)
+        analytical_mm1(0.1, 1.0)   # 0.1 pasa a ser la más reciente
+        analytical_mm1(0.3, 1.0)   # expulsa 0.2
+        analytical_mm1(0.1, 1.0)
+        info = analytic_cache_info()
+        self.assertEqual(info.currsize, 2)
+        self.assertEqual(info.hits, 2)
+        analytical_mm1(0.2, 1.0)
+        self.assertEqual(analytic_cache_info().misses, 4)
+    
+    def test_errores_no_se_almacenan(self):
+        """Un sistema inestable sigue lanzando ValueError en cada llamada"""
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                analytical_mm1(3.0, 2.0)
+        self.assertEqual(analytic_cache_info().currsize, 0)
+    
+    def test_acceso_concurrente(self):
+        """Varios hilos consultando la caché obtienen resultados consistentes"""
+        import threading
+        
+        errores = []
+        
+        def trabajador():
+            for i in range(200):
+                lam = 0.1 + (i % 20) * 0.1
+                if analytical_mmc(lam, 1.0, 3)['rho'] != lam / 3.0:
+                    errores.append(lam)
+        
+        hilos = [threading.Thread(target=trabajador) for _ in range(4)]
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+        
+        info = analytic_cache_info()
+        self.assertEqual(errores, [])
+        self.assertEqual(info.hits + info.misses, 800)
+        self.assertEqual(info.currsize, 20)
+
+
+class TestCadenaJSQ(unittest.TestCase):
+    """Pruebas para el solver CTMC de modelos con cola más corta"""
+    
+    def test_k1_coincide_con_mm1(self):
+        """Con una sola cola, M/M/k/1 es un M/M/1"""
+        num = ctmc_mmk1(1.5, 2.0, k=1)
+        theo = analytical_mm1(1.5, 2.0)
+        for key in ['L', 'Lq', 'W', 'Wq']:
+            self.assertAlmostEqual(num[key], theo[key], places=4)
+    
+    def test_ruptura_bicgstab(self):
+        """Si BiCGSTAB se rompe (r̂·v = 0), el respaldo parte de la uniforme y no da NaN"""
+        num = ctmc_mmk1(0.8, 1.0, k=1)
+        theo = analytical_mm1(0.8, 1.0)
+        for key in ['L', 'Lq', 'W', 'Wq']:
+            self.assertAlmostEqual(num[key], theo[key], places=4)
+    
+    def test_k1_coincide_con_mmc(self):
+        """Con una sola cola, M/M/k/c es un M/M/c"""
+        num = ctmc_mmkc(3.5, 2.0, k=1, c=2)
+        theo = analytical_mmc(3.5, 2.0, 2)
+        for key in ['L', 'Lq', 'Wq', 'P0']:
+            self.assertAlmostEqual(num[key], theo[key], places=4)
+    
+    def test_jsq_entre_cotas(self):
+        """JSQ es peor que una cola compartida y mejor que colas independientes"""
+        lam, mu, k = 1.6, 1.0, 2
+        L_jsq = ctmc_mmk1(lam, mu, k)['L']
+        L_compartida = analytical_mmc(lam, mu, k)['L']
+        L_independientes = k * analytical_mm1(lam / k, mu)['L']
+        self.assertGreater(L_jsq, L_compartida)
+        self.assertLess(L_jsq, L_independientes)
+    
+    def test_ley_de_little(self):
+        """Las métricas numéricas cumplen L = λW"""
+        m = ctmc_mmkc(0.9, 2.5, k=2, c=2)
+        self.assertTrue(littles_law_check(m['L'], 0.9, m['W'], tolerance=1e-6))
+    
+    def test_sistema_inestable(self):
+        """ρ ≥ 1 no tiene distribución estacionaria"""
+        with self.assertRaises(ValueError):
+            ctmc_mmk1(3.0, 1.0, k=3)
+
+
+class TestMatrizGeometrica(unittest.TestCase):
+    """Pruebas para el solver QBD matriz-geométrico"""
+    
+    def test_servidores_iguales_coincide_con_mmc(self):
+        """Con tasas iguales, el modelo heterogéneo es un M/M/c"""
+        num = qbd_mmc_heterogeneous(2.7, [1.0, 1.0, 1.0])
+        theo = analytical_mmc(2.7, 1.0, 3)
+        for key in ['L', 'Lq', 'W', 'Wq', 'P0', 'C']:
+            self.assertAlmostEqual(num[key], theo[key], places=8)
+    
+    def test_formato_compatible_con_comparacion(self):
+        """La salida se compara directamente con compare_simulation_vs_theory"""
+        num = qbd_mmc_heterogeneous(0.7, [2.5, 2.5, 2.5])
+        comparison = compare_simulation_vs_theory(num, analytical_mmc(0.7, 2.5, 3))
+        self.assertEqual(set(comparison.keys()), {'L', 'Lq', 'W', 'Wq', 'rho'})
+        self.assertTrue(all(v['ok'] for v in comparison.values()))
+    
+    def test_politica_mas_rapido_mejora(self):
+        """Asignar al servidor más rápido reduce el tiempo en sistema"""
+        mus = [0.5, 1.0, 3.0]
+        W_rapido = qbd_mmc_heterogeneous(2.0, mus, policy='fastest')['W']
+        W_azar = qbd_mmc_heterogeneous(2.0, mus, policy='random')['W']
+        self.assertLess(W_rapido, W_azar)
+    
+    def test_erlang_coincide_con_pollaczek_khinchine(self):
+        """M/E2/1 coincide con la fórmula de Pollaczek-Khinchine"""
+        lam, mu, k = 1.5, 2.0, 2
+        alpha, T = ph_erlang(k, mu)
+        num = qbd_mphc(lam, alpha, T, c=1)
+        rho = lam / mu
+        es2 = (k + 1) / (k * mu ** 2)
+        self.assertAlmostEqual(num['Lq'], lam ** 2 * es2 / (2 * (1 - rho)), places=8)
+    
+    def test_fase_exponencial_coincide_con_mmc(self):
+        """Un PH de una fase es un servicio exponencial"""
+        alpha, T = ph_erlang(1, 2.5)
+        num = qbd_mphc(5.0, alpha, T, c=3)
+        self.assertAlmostEqual(num['L'], analytical_mmc(5.0, 2.5, 3)['L'], places=8)
+    
+    def test_sistema_inestable(self):
+        """ρ ≥ 1 se rechaza"""
+        with self.assertRaises(ValueError):
+            qbd_mmc_heterogeneous(4.0, [1.0, 2.0])
+
+
+class TestTransitorio(unittest.TestCase):
+    """Pruebas para el análisis transitorio por uniformización"""
+    
+    def test_muchos_servidores_coincide_con_mm_infinito(self):
+        """Con c grande, E[L(t)] = (λ/μ)(1 - e^(-μt)) como en M/M/∞"""
+        import math
+        lam, mu = 2.0, 1.0
+        tiempos = [0.0, 0.5, 1.0, 3.0]
+        medias = transient_mean(lam, mu, 60, tiempos)
+        for t, m in zip(tiempos, medias):
+            self.assertAlmostEqual(m, lam / mu * (1 - math.exp(-mu * t)), places=6)
+    
+    def test_converge_a_estacionaria(self):
+        """Para t grande, P(n, t) tiende a (1-ρ)ρⁿ en M/M/1"""
+        P = transient_distribution(0.6, 2.0, 1, 60.0, n0=3)
+        self.assertAlmostEqual(P.sum(), 1.0, places=8)
+        for n in range(4):
+            self.assertAlmostEqual(P[n], 0.7 * 0.3 ** n, places=6)
+    
+    def test_estado_inicial(self):
+        """En t = 0 toda la masa está en n0"""
+        P = transient_distribution(0.7, 2.5, 3, [0.0, 1.0], n0=2)
+        self.assertEqual(P[0][2], 1.0)
+        self.assertAlmostEqual(P[1].sum(), 1.0, places=8)
+    
+    def test_warmup_sugerido(self):
+        """Después del warmup sugerido E[L(t)] está cerca del estacionario"""
+        lam, mu = 0.6, 2.0
+        t_w = warmup_time(lam, mu, rel_tol=0.05)
+        L = analytical_mm1(lam, mu)['L']
+        self.assertGreater(t_w, 0.0)
+        self.assertLessEqual(abs(transient_mean(lam, mu, 1, t_w) - L) / L, 0.05)
+        self.assertGreater(abs(transient_mean(lam, mu, 1, t_w / 2) - L) / L, 0.05)
+    
+    def test_parametros_invalidos(self):
+        """Una tolerancia inalcanzable o n_max < n0 dan ValueError en lugar de colgarse"""
+        with self.assertRaises(ValueError):
+            warmup_time(0.6, 2.0, rel_tol=1e-14)
+        with self.assertRaises(ValueError):
+            warmup_time(0.6, 2.0, rel_tol=0.0)
+        with self.assertRaises(ValueError):
+            transient_mean(0.6, 2.0, 1, 1.0, n0=5, n_max=3)
+
+
+class TestCuantiles(unittest.TestCase):
+    """Pruebas para el sketch de cuantiles en línea"""
+    
+    def test_error_relativo_acotado(self):
+        """Los cuantiles estimados están dentro del error relativo del sketch"""
+        import random
+        rng = random.Random(7)
+        datos = sorted(rng.expovariate(1.0) for _ in range(20000))
+        sk = QuantileSketch(relative_accuracy=0.01)
+        for x in datos:
+            sk.add(x)
+        for q in [0.5, 0.95, 0.99]:
+            exacto = datos[int(q * (len(datos) - 1))]
+            self.assertAlmostEqual(sk.quantile(q), exacto, delta=0.02 * exacto)
+    
+    def test_combinar_replicas(self):
+        """Combinar sketches equivale a construir uno con todos los datos"""
+        import random
+        rng = random.Random(11)
+        datos = [rng.expovariate(2.0) for _ in range(5000)] + [0.0] * 500
+        total, a, b = QuantileSketch(), QuantileSketch(), QuantileSketch()
+        for i, x in enumerate(datos):
+            total.add(x)
+            (a if i % 2 else b).add(x)
+        combinado = QuantileSketch.merged([a, b])
+        self.assertEqual(combinado.count, total.count)
+        for q in [0.05, 0.5, 0.99]:
+            self.assertEqual(combinado.quantile(q), total.quantile(q))
+    
+    def test_memoria_acotada(self):
+        """El número de cubetas no supera max_bins"""
+        sk = QuantileSketch(max_bins=64)
+        for i in range(1, 100000, 7):
+            sk.add(i * 1e-3)
+        self.assertLessEqual(len(sk.bins), 64)
+        self.assertAlmostEqual(sk.quantile(1.0), sk.max)
+    
+    def test_percentiles_en_estado(self):
+        """state() reporta los percentiles configurados de W y Wq"""
+        sim = MM1(lam=0.6, mu=2.0, horizon=5000, warmup=500, percentiles=(90, 99.9))
+        while sim.time < sim.horizon:
+            sim.step()
+        st = sim.state()
+        for key in ['w_p90', 'wq_p90', 'w_p99.9', 'wq_p99.9']:
+            self.assertIn(key, st)
+        self.assertNotIn('w_p95', st)
+        self.assertGreater(st['w_p99.9'], st['w_p90'])
+        self.assertGreater(st['w_p90'], st['w_avg'])
+
+
+class TestHistogramaOnline(unittest.TestCase):
+    """Pruebas para el histograma en línea"""
+    
+    def test_coincide_con_histograma_exacto(self):
+        """Los conteos coinciden con un histograma calculado sobre los datos"""
+        import random
+        import numpy as np
+        rng = random.Random(5)
+        datos = [rng.expovariate(1.0) for _ in range(5000)]
+        h = OnlineHistogram(0.0, 0.5, bins=64)
+        for x in datos:
+            h.add(x)
+        counts, edges = h.coarsen(20)
+        self.assertLessEqual(len(counts), 20)
+        self.assertEqual(counts.sum(), len(datos))
+        np.testing.assert_array_equal(counts, np.histogram(datos, bins=edges)[0])
+    
+    def test_reagrupamiento_automatico(self):
+        """Un valor fuera de rango duplica el rango sin cambiar el número de bins"""
+        h = OnlineHistogram(0.0, 1.0, bins=8)
+        h.add(0.1)
+        h.add(3.5)
+        self.assertEqual(h.hi, 4.0)
+        self.assertEqual(len(h.counts), 8)
+        self.assertEqual(h.overflow, 0)
+        self.assertEqual(h.counts.sum(), 2)
+    
+    def test_desbordes_sin_reagrupar(self):
+        """Sin auto_rebin los valores fuera de rango se cuentan aparte"""
+        h = OnlineHistogram(1e-2, 1e2, bins=8, scale='log', auto_rebin=False)
+        for x in [1e-3, 0.5, 5.0, 1e3]:
+            h.add(x)
+        self.assertEqual(h.underflow, 1)
+        self.assertEqual(h.overflow, 1)
+        self.assertEqual(h.counts.sum(), 2)
+    
+    def test_simulacion_sin_listas(self):
+        """Con store_waits=False se obtiene el histograma sin guardar esperas"""
+        sim = MMC(lam=0.7, mu=2.5, c=3, horizon=2000, warmup=200, store_waits=False)
+        while sim.time < sim.horizon:
+            sim.step()
+        self.assertEqual(sim.wait_times, [])
+        self.assertEqual(sim.hist_w.count, sim.count_wait_sys)
+        self.assertAlmostEqual(sim.hist_w.mean(), sim.state()['w_avg'])
+
+
+class TestDistribucionEstados(unittest.TestCase):
+    """Pruebas para la distribución P(n) acumulada en línea"""
+    
+    def test_mm1_geometrica(self):
+        """P(n) de M/M/1 coincide con (1-ρ)ρⁿ"""
+        lam, mu = 0.6, 2.0
+        sim = MM1(lam=lam, mu=mu, horizon=20000, warmup=1000)
+        while sim.time < sim.horizon:
+            sim.step()
+        dist = sim.state_distribution()
+        self.assertAlmostEqual(dist.sum(), 1.0)
+        rho = lam / mu
+        for n in range(3):
+            self.assertAlmostEqual(dist[n], (1 - rho) * rho ** n, delta=0.02)
+    
+    def test_mmc_p0_y_c(self):
+        """P0 y P(espera) de M/M/c coinciden con analytical_mmc"""
+        lam, mu, c = 5.0, 2.0, 3
+        sim = MMC(lam=lam, mu=mu, c=c, horizon=20000, warmup=1000)
+        while sim.time < sim.horizon:
+            sim.step()
+        st = sim.state()
+        theo = analytical_mmc(lam, mu, c)
+        self.assertAlmostEqual(st['p0'], theo['P0'], delta=0.01)
+        self.assertAlmostEqual(st['p_wait'], theo['C'], delta=0.03)
+        self.assertAlmostEqual(sim.state_distribution()[c:].sum(), st['p_wait'])
+    
+    def test_area_coincide_con_distribucion(self):
+        """L acumulado por áreas es la media de P(n) y cubre hasta el horizonte"""
+        import numpy as np
+        sim = MMK1(lam=1.5, mu=1.0, k=2, horizon=3000, warmup=300)
+        while sim.time < sim.horizon:
+            sim.step()
+        dist = sim.state_distribution()
+        self.assertAlmostEqual(sim.time_in_state.sum(), sim.horizon - sim.warmup)
+        self.assertAlmostEqual(sim.state()['l_avg'], float(dist @ np.arange(len(dist))))
+        self.assertAlmostEqual(sim.state()['p0'], ctmc_mmk1(1.5, 1.0, 2)['P0'], delta=0.03)
+
+
+class TestUtilizacionServidores(unittest.TestCase):
+    """Pruebas para la utilización medida por servidor"""
+    
+    def test_mmc_agregada(self):
+        """La utilización agregada medida coincide con λ/(cμ)"""
+        lam, mu, c = 5.0, 2.0, 3
+        sim = MMC(lam=lam, mu=mu, c=c, horizon=10000, warmup=500)
+        while sim.time < sim.horizon:
+            sim.step()
+        st = sim.state()
+        self.assertEqual(len(st['rho_servers']), c)
+        self.assertAlmostEqual(st['rho_measured'], lam / (c * mu), delta=0.02)
+        # Little aplicado a los servidores: ocupados promedio = L - Lq
+        self.assertAlmostEqual(st['rho_measured'] * c, st['l_avg'] - st['lq_avg'], places=6)
+        completados = sum(s.completions for s in sim.server_list)
+        self.assertAlmostEqual(completados / (sim.horizon - sim.warmup), lam, delta=0.15)
+    
+    def test_desbalance_jsq(self):
+        """El desempate por menor índice carga más la primera cola en MMKC"""
+        sim = MMKC(lam=2.0, mu=1.0, k=3, c=2, horizon=10000, warmup=500)
+        while sim.time < sim.horizon:
+            sim.step()
+        rho_servers = sim.state()['rho_servers']
+        self.assertEqual(len(rho_servers), 6)
+        por_cola = [sum(rho_servers[2 * q:2 * q + 2]) for q in range(3)]
+        self.assertGreater(por_cola[0], por_cola[2])
+        self.assertAlmostEqual(sum(rho_servers) / 6, 2.0 / 6, delta=0.02)
+
+
+class TestVentanas(unittest.TestCase):
+    """Pruebas para las métricas por ventanas temporales"""
+    
+    def test_ventana_consecutiva_ponderada(self):
+        """Un tramo que cruza bordes se reparte entre ventanas"""
+        w = TumblingWindow(10.0)
+        w.add_interval(2.0, 0.0, 25.0)
+        w.add_interval(4.0, 25.0, 31.0)
+        cerradas = w.completed()
+        self.assertEqual([v.t_start for v in cerradas], [0.0, 10.0, 20.0])
+        self.assertAlmostEqual(cerradas[2].mean, 3.0)
+        self.assertAlmostEqual(w.current().mean, 4.0)
+    
+    def test_decaimiento_sigue_cambio_de_regimen(self):
+        """El promedio con decaimiento olvida el régimen anterior"""
+        d = DecayingWindow(tau=1.0)
+        d.add_interval(10.0, 0.0, 50.0)
+        d.add_interval(1.0, 50.0, 60.0)
+        self.assertAlmostEqual(d.mean(), 1.0, places=3)
+    
+    def test_ventanas_de_simulacion(self):
+        """Las ventanas de L promedian al L global y el throughput ≈ λ"""
+        lam, mu = 0.6, 2.0
+        sim = MM1(lam=lam, mu=mu, horizon=20000, warmup=1000, window=1000)
+        while sim.time < sim.horizon:
+            sim.step()
+            if sim.time > 5000:
+                # Consultable durante la corrida
+                self.assertIsNotNone(sim.window_metrics()['window'])
+                break
+        while sim.time < sim.horizon:
+            sim.step()
+        ventanas = sim.windows['L'].completed()
+        self.assertEqual(len(ventanas), 19)
+        media = sum(v.mean for v in ventanas) / len(ventanas)
+        self.assertAlmostEqual(media, sim.state()['l_avg'], places=6)
+        m = sim.window_metrics()
+        self.assertAlmostEqual(m['window']['throughput'], lam, delta=0.1)
+        self.assertAlmostEqual(m['decayed']['throughput'], lam, delta=0.1)
+
+    def test_ventana_sin_salidas(self):
+        """Con tramos sin salidas, W/Wq y el throughput son de la misma ventana que L"""
+        import numpy as np
+        sim = MM1(lam=0.05, mu=2.0, horizon=2000, window=2.0)
+        vacias = 0
+        while sim.time < sim.horizon:
+            sim.step()
+            win = sim.window_metrics()['window']
+            if win is None:
+                continue
+            salidas = np.asarray(sim.departure_times)
+            en_ventana = (salidas >= win['t_start']) & (salidas < win['t_end'])
+            self.assertAlmostEqual(win['throughput'] * sim.window, en_ventana.sum())
+            if en_ventana.any():
+                self.assertAlmostEqual(win['w'], np.mean(np.asarray(sim.wait_times)[en_ventana]))
+            else:
+                vacias += 1
+                self.assertEqual(win['w'], 0.0)
+        self.assertGreater(vacias, 0)
+
+    def test_ventanas_opcionales(self):
+        """Sin window ni decay_tau no se mantienen ventanas; decay_tau solo no crea ventanas"""
+        sim = MM1(lam=0.6, mu=2.0, horizon=500)
+        while sim.time < sim.horizon:
+            sim.step()
+        self.assertEqual(sim.windows, {})
+        self.assertEqual(sim.decayed, {})
+        self.assertEqual(sim.window_metrics(), {'window': None, 'decayed': None})
+        sim = MM1(lam=0.6, mu=2.0, horizon=5000, decay_tau=500)
+        while sim.time < sim.horizon:
+            sim.step()
+        self.assertEqual(sim.windows, {})
+        m = sim.window_metrics()
+        self.assertIsNone(m['window'])
+        self.assertAlmostEqual(m['decayed']['throughput'], 0.6, delta=0.15)
+
+
+class TestCheckpoints(unittest.TestCase):
+    """Pruebas para las métricas a varios horizontes en una sola corrida"""
+    
+    def test_coincide_con_corridas_separadas(self):
+        """La instantánea en t equivale a correr con horizon=t"""
+        import random
+        random.seed(7)
+        sim = MMC(lam=5.0, mu=2.0, c=3, horizon=3000, warmup=100,
+                  report_times=[3000, 500, 1500])
+        while sim.time < sim.horizon:
+            sim.step()
+        self.assertEqual([cp['t'] for cp in sim.checkpoints], [500, 1500, 3000])
+        
+        random.seed(7)
+        corta = MMC(lam=5.0, mu=2.0, c=3, horizon=1500, warmup=100)
+        while corta.time < corta.horizon:
+            corta.step()
+        cp, st = sim.checkpoints[1], corta.state()
+        for key in ('l_avg', 'lq_avg', 'w_avg', 'wq_avg', 'p0', 'rho_measured'):
+            self.assertAlmostEqual(cp[key], st[key], places=9)
+        self.assertEqual(cp['served'], st['served'])
+        # La última instantánea es el estado final
+        self.assertAlmostEqual(sim.checkpoints[-1]['l_avg'], sim.state()['l_avg'], places=12)
+    
+    def test_instantes_invalidos(self):
+        """Instantes fuera de (warmup, horizon] se rechazan"""
+        with self.assertRaises(ValueError):
+            MM1(lam=1.0, mu=2.0, horizon=100, warmup=10, report_times=[5])
+        with self.assertRaises(ValueError):
+            MM1(lam=1.0, mu=2.0, horizon=100, report_times=[150])
+
+
+class TestHistorialCompacto(unittest.TestCase):
+    """Pruebas para Job/Server con __slots__ y el historial en arreglos"""
+    
+    def test_sin_dict_por_instancia(self):
+        """Job y Server no tienen __dict__"""
+        from sim_colas_animado import Job, Server
+        self.assertFalse(hasattr(Job(1, 0.0, 1.0), '__dict__'))
+        self.assertFalse(hasattr(Server(), '__dict__'))
+    
+    def test_historial_coincide_con_esperas(self):
+        """Las columnas del historial reproducen las esperas registradas"""
+        import numpy as np
+        sim = MMC(lam=5.0, mu=2.0, c=3, horizon=500)
+        while sim.time < sim.horizon:
+            sim.step()
+        h = sim.completed
+        self.assertEqual(len(h), sim.state()['served'])
+        self.assertGreater(len(h), 1024)  # Forzó al menos un crecimiento
+        np.testing.assert_allclose(h.t_departure - h.t_arrival, sim.wait_times)
+        np.testing.assert_allclose(h.t_service_start - h.t_arrival, sim.wait_times_q)
+        job = h[-1]
+        self.assertEqual(job.id, int(h.ids[-1]))
+        self.assertEqual(job.t_departure, sim.departure_times[-1])
+    
+    def test_sin_historial(self):
+        """Con store_waits=False no se guarda historial pero served se cuenta"""
+        sim = MM1(lam=0.6, mu=2.0, horizon=500, store_waits=False)
+        while sim.time < sim.horizon:
+            sim.step()
+        self.assertEqual(len(sim.completed), 0)
+        self.assertGreater(sim.state()['served'], 0)
+
+
+class TestDivergencia(unittest.TestCase):
+    """Pruebas para la detección de corridas inestables"""
+    
+    def test_stop_detiene_corrida(self):
+        """Con 'stop' la corrida inestable termina temprano y se marca"""
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter("always")
+            sim = MM1(lam=3.0, mu=2.0, horizon=100000, divergence_policy='stop')
+            while sim.time < sim.horizon:
+                sim.step()
+        self.assertTrue(sim.state()['unstable'])
+        self.assertLess(sim.time, 10000)
+        self.assertTrue(any("divergente" in str(x.message) for x in w))
+    
+    def test_raise_con_resultado_parcial(self):
+        """Con 'raise' se lanza DivergenceError con el estado parcial"""
+        from sim_colas_animado import DivergenceError
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            sim = MMKC(lam=10.0, mu=1.0, k=2, c=2, horizon=100000, divergence_policy='raise')
+        with self.assertRaises(DivergenceError) as ctx:
+            while sim.time < sim.horizon:
+                sim.step()
+        self.assertTrue(ctx.exception.partial['unstable'])
+        self.assertGreater(ctx.exception.partial['in_system'], 0)
+    
+    def test_sin_falsos_positivos(self):
+        """Un sistema estable con carga alta no se marca como divergente"""
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            sim = MMC(lam=5.4, mu=2.0, c=3, horizon=30000, divergence_policy='warn')
+            while sim.time < sim.horizon:
+                sim.step()
+        self.assertFalse(sim.state()['unstable'])
+    
+    def test_carga_alta_sin_detector_por_defecto(self):
+        """Por defecto no hay detector: corridas estables con ρ ≈ 1 no se marcan"""
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            for seed in range(3):
+                sim = MM1(lam=0.98, mu=1.0, horizon=50000, seed=seed)
+                while sim.time < sim.horizon:
+                    sim.step()
+                self.assertIsNone(sim.drift)
+                self.assertFalse(sim.state()['unstable'])
+    
+    def test_politica_invalida(self):
+        """Una política desconocida se rechaza"""
+        with self.assertRaises(ValueError):
+            MM1(lam=1.0, mu=2.0, horizon=100, divergence_policy='ignorar')
+
+
+class TestEstadoInicial(unittest.TestCase):
+    """Pruebas para el arranque desde la distribución estacionaria"""
+    
+    def test_poblacion_inicial_estacionaria(self):
+        """La población inicial promedio coincide con L teórico"""
+        import random
+        random.seed(11)
+        lam, mu, c = 5.0, 2.0, 3
+        n0 = [MMC(lam=lam, mu=mu, c=c, horizon=1, initial_state='stationary').last_n_system
+              for _ in range(3000)]
+        self.assertAlmostEqual(sum(n0) / len(n0), analytical_mmc(lam, mu, c)['L'], delta=0.15)
+    
+    def test_corridas_cortas_sin_sesgo(self):
+        """Sin warmup, corridas cortas desde el estacionario no subestiman L"""
+        lam, mu = 1.6, 2.0
+        L = analytical_mm1(lam, mu)['L']
+        medias = []
+        for _ in range(300):
+            sim = MM1(lam=lam, mu=mu, horizon=10, initial_state='stationary')
+            while sim.time < sim.horizon:
+                sim.step()
+            medias.append(sim.state()['l_avg'])
+        self.assertAlmostEqual(sum(medias) / len(medias), L, delta=0.5)
+    
+    def test_jsq_con_distribucion_previa(self):
+        """MMKC acepta un P(n) explícito, balancea y excluye los iniciales de W"""
+        sim = MMKC(lam=2.0, mu=1.0, k=2, c=2, horizon=50, initial_state=[0, 0, 0, 0, 0, 0, 1])
+        self.assertEqual(sim.last_n_system, 6)
+        self.assertEqual([len(q) for q in sim.queues], [1, 1])
+        while sim.time < sim.horizon:
+            sim.step()
+        self.assertEqual(sim.count_wait_sys, sum(1 for j in sim.completed if j.id > 6))
+        with self.assertRaises(ValueError):
+            MMK1(lam=1.0, mu=2.0, k=2, horizon=10, initial_state='stationary')
+
+
+class TestRegenerativo(unittest.TestCase):
+    """Pruebas para el estimador regenerativo por ciclos"""
+    
+    def test_intervalos_cubren_teoria(self):
+        """Los intervalos regenerativos de M/M/1 contienen los valores teóricos"""
+        lam, mu = 1.2, 2.0
+        sim = MM1(lam=lam, mu=mu, horizon=20000, seed=3)
+        while sim.time < sim.horizon:
+            sim.step()
+        est = sim.regenerative_estimates(confidence=0.999)
+        theo = analytical_mm1(lam, mu)
+        self.assertGreater(est['cycles'], 1000)
+        for key in ('L', 'Lq', 'W', 'Wq'):
+            valor, semiancho = est[key]
+            self.assertLessEqual(abs(valor - theo[key]), semiancho, key)
+        self.assertAlmostEqual(est['throughput'][0], lam, delta=0.05)
+    
+    def test_parada_temprana(self):
+        """Con regenerative_precision la corrida termina al alcanzarla"""
+        sim = MMC(lam=5.0, mu=2.0, c=3, horizon=1e6, seed=5, regenerative_precision=0.1)
+        while sim.time < sim.horizon:
+            sim.step()
+        self.assertTrue(sim.converged)
+        self.assertLess(sim.time, 1e6)
+        est = sim.regenerative_estimates()
+        self.assertLessEqual(est['L'][1], 0.1 * est['L'][0])
+    
+    def test_combinar_replicas(self):
+        """Los ciclos de réplicas independientes se combinan"""
+        from estadisticas_online import RegenerativeEstimator
+        sims = []
+        for seed in (1, 2):
+            sim = MM1(lam=1.0, mu=2.0, horizon=2000, seed=seed)
+            while sim.time < sim.horizon:
+                sim.step()
+            sims.append(sim)
+        combinado = RegenerativeEstimator.merged(s.regenerative for s in sims)
+        self.assertEqual(combinado.cycles, sum(s.regenerative.cycles for s in sims))
+        self.assertLess(combinado.ratio('area', 'length')[1], sims[0].regenerative.ratio('area', 'length')[1])
+    
+    def test_semilla_reproducible(self):
+        """La misma semilla reproduce la corrida; semillas distintas no"""
+        def correr(seed):
+            sim = MMK1(lam=0.8, mu=2.5, k=3, horizon=200, seed=seed)
+            while sim.time < sim.horizon:
+                sim.step()
+            return sim.state()['served']
+        self.assertEqual(correr(9), correr(9))
+        self.assertNotEqual(correr(9), correr(10))
+
+
+class TestAnimacion(unittest.TestCase):
+    """Pruebas sin ventana de la capa de animación"""
+    
+    def setUp(self):
+        from sim_colas_animado import AnimatedComparison, ModelSpec
+        self.specs = [
+            ModelSpec('M/M/1', 'mm1', {'lam': 0.6, 'mu': 2.0}),
+            ModelSpec('M/M/c', 'mmc', {'lam': 0.7, 'mu': 2.5, 'c': 3}),
+            ModelSpec('M/M/k/1', 'mmk1', {'lam': 0.8, 'mu': 2.5, 'k': 3}),
+            ModelSpec('M/M/k/c', 'mmkc', {'lam': 0.9, 'mu': 2.5, 'k': 2, 'c': 2}),
+        ]
+        self.anim = AnimatedComparison(self.specs, horizon=30.0, seed=1)
+        self.anim.dt = 0.5
+    
+    def tearDown(self):
+        import matplotlib.pyplot as plt
+        plt.close('all')
+    
+    def _objetivos_referencia(self, idx):
+        """Mapa id -> objetivo recorriendo colas y servidores completos (referencia del layout)"""
+        sim = self.anim.sims[idx]
+        objetivos = {}
+        # En cola: apilados sobre el nodo de cola, una columna por cola
+        for qi, cola in enumerate(sim._waiting_queues()):
+            for pos, job in enumerate(cola):
+                objetivos[job.id] = (3.5, 6.0 + qi * 1.5 + pos * 0.3)
+        # En servicio: en la posición de su servidor
+        for s in sim.server_list:
+            if s.current_job:
+                objetivos[s.current_job.id] = tuple(self.anim.server_positions[idx][s.index])
+        return objetivos
+    
+    def _verificar_layout(self):
+        """El layout incremental de cada panel coincide con la referencia"""
+        import numpy as np
+        for i, layout in enumerate(self.anim.layouts):
+            ids, target = layout.targets()
+            ref = self._objetivos_referencia(i)
+            self.assertEqual(sorted(ref), list(ids))
+            esperado = np.array([ref[j] for j in ids], dtype=float).reshape(-1, 2)
+            np.testing.assert_allclose(target, esperado)
+    
+    def test_avance_y_perfil(self):
+        """Cada frame avanza todas las simulaciones y separa los costos"""
+        for f in range(20):
+            self.anim._update_anim(f)
+        for sim in self.anim.sims:
+            self.assertGreaterEqual(sim.time, 19 * 0.5)
+        prof = self.anim.profile_summary()
+        self.assertEqual(prof['frames'], 20)
+        self.assertEqual(len(prof['sim_ms_panels']), 4)
+        self.assertGreater(prof['update_ms'], 0.0)
+    
+    def test_perfil_con_blit(self):
+        """Con blit, draw_ms mide restaurar fondos, dibujar artistas y blit"""
+        fig = self.anim.fig
+        self.anim._blit, self.anim._frames = True, 20
+        self.anim.anim = self.anim._new_animation(20)
+        fig.canvas.draw()
+        dibujo = self.anim.frame_stats['draw_time']
+        for f in range(10):
+            self.anim.anim._draw_next_frame(f, blit=True)
+        self.assertGreater(self.anim.frame_stats['draw_time'], dibujo)
+        self.assertGreater(self.anim.profile_summary()['draw_ms'], 0.0)
+    
+    def test_un_scatter_por_panel(self):
+        """Los clientes son offsets de un único scatter por panel"""
+        parches = [len(ax.patches) for ax in self.anim.axes]
+        for f in range(40):
+            self.anim._update_anim(f)
+        # No se crean ni eliminan artistas al entrar y salir clientes
+        self.assertEqual([len(ax.patches) for ax in self.anim.axes], parches)
+        for sc, sim in zip(self.anim.client_scatter, self.anim.sims):
+            self.assertEqual(len(sc.get_offsets()), sim.state()['in_system'])
+    
+    def test_eventos_de_clientes(self):
+        """Cada cliente emite enqueue, start y depart en ese orden"""
+        sim = MMKC(lam=4.0, mu=1.0, k=2, c=2, horizon=200, seed=3)
+        eventos = []
+        sim.subscribe(lambda kind, job_id, index: eventos.append((kind, job_id, index)))
+        while sim.time < sim.horizon:
+            sim.step()
+        por_job = {}
+        for kind, job_id, index in eventos:
+            por_job.setdefault(job_id, []).append(kind)
+        self.assertEqual(len(por_job), sim.jobs_created)
+        for kinds in por_job.values():
+            self.assertIn(kinds, (['enqueue'], ['enqueue', 'start'], ['enqueue', 'start', 'depart']))
+        self.assertEqual(sum(k == 'depart' for k, _, _ in eventos), sim.served)
+        self.assertTrue(all(0 <= i < 4 for k, _, i in eventos if k != 'enqueue'))
+    
+    def test_layout_incremental(self):
+        """El layout por deltas coincide con el recorrido completo de colas y servidores"""
+        for f in range(60):
+            self.anim._update_anim(f)
+            self._verificar_layout()
+    
+    def test_exportar_sin_ventana(self):
+        """La exportación graba una vez y dibuja igual con y sin pool de procesos"""
+        import os
+        import tempfile
+        import matplotlib.pyplot as plt
+        from sim_colas_animado import AnimatedComparison
+        with tempfile.TemporaryDirectory() as tmp:
+            pngs = self.anim.export(os.path.join(tmp, 'seq'), frames=4, dpi=30, workers=1)
+            self.assertEqual(len(pngs), 4)
+            otra = AnimatedComparison(self.specs, horizon=30.0, seed=1)
+            en_pool = otra.export(os.path.join(tmp, 'pool'), frames=4, dpi=30, workers=2)
+            for a, b in zip(pngs, en_pool):
+                self.assertTrue((plt.imread(a) == plt.imread(b)).all())
+            gif = AnimatedComparison(self.specs, horizon=30.0, seed=1).export(
+                os.path.join(tmp, 'anim.gif'), frames=3, dpi=30, workers=1)
+            self.assertGreater(os.path.getsize(gif), 0)
+    
+    def test_reproducir_traza(self):
+        """La reproducción desde archivo coincide con la simulación en vivo, con saltos"""
+        import os
+        import tempfile
+        import numpy as np
+        from sim_colas_animado import AnimatedComparison
+        origen = AnimatedComparison(self.specs, horizon=30.0, seed=1)
+        trazas = origen.simulate_traces()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'trazas.npz')
+            origen.save_traces(path, trazas)
+            rep = AnimatedComparison.from_trace_file(path)
+        self.assertEqual([len(t) for t in rep.traces], [len(t) for t in trazas])
+        for f in range(30):
+            self.anim._update_anim(f)
+            for i, sim in enumerate(self.anim.sims):
+                rep._replay_until(sim.time)
+                ids, target = rep.layouts[i].targets()
+                ids_vivo, target_vivo = self.anim.layouts[i].targets()
+                np.testing.assert_array_equal(ids, ids_vivo)
+                np.testing.assert_allclose(target, target_vivo)
+        # Retroceder y volver a avanzar reconstruye el mismo estado
+        rep.seek(20.0)
+        antes = [layout.targets()[0] for layout in rep.layouts]
+        rep.seek(5.0)
+        rep.seek(20.0)
+        for layout, ids in zip(rep.layouts, antes):
+            np.testing.assert_array_equal(layout.targets()[0], ids)
+        self.assertEqual(rep.clock, 20.0)
+    
+    def test_teclas_de_reproduccion(self):
+        """←/→ recorren la traza sin mover el historial de vistas de la barra"""
+        from matplotlib.backend_bases import KeyEvent, NavigationToolbar2
+        from sim_colas_animado import AnimatedComparison
+        trazas = AnimatedComparison(self.specs, horizon=30.0, seed=1).simulate_traces()
+        rep = AnimatedComparison(self.specs, horizon=30.0, traces=trazas)
+        canvas = rep.fig.canvas
+        usadas = []
+        barra = NavigationToolbar2(canvas)
+        barra.back = lambda *a: usadas.append('back')
+        barra.forward = lambda *a: usadas.append('forward')
+        rep._add_scrub_controls()
+        x, y = rep.axes[0].bbox.corners().mean(axis=0)
+        for key in ('right', 'right', 'left'):
+            canvas.callbacks.process('key_press_event', KeyEvent('key_press_event', canvas, key, x, y))
+        self.assertAlmostEqual(rep.clock, 10 * rep.dt)
+        self.assertEqual(usadas, [])
+        # El resto de los atajos por defecto sigue activo ('c' también es atrás)
+        canvas.callbacks.process('key_press_event', KeyEvent('key_press_event', canvas, 'c', x, y))
+        self.assertEqual(usadas, ['back'])
+
+    def test_paso_adaptativo(self):
+        """El paso adaptativo respeta sus límites y saltar tramos inactivos ahorra frames"""
+        self.anim.set_timing(0.5, adaptive=True, dt_bounds=(0.1, 2.0))
+        for f in range(40):
+            antes = self.anim.clock
+            self.anim._update_anim(f)
+            self.assertTrue(0.1 - 1e-12 <= self.anim.clock - antes <= 2.0 + 1e-12)
+        
+        def frames_hasta_horizonte(**timing):
+            from sim_colas_animado import AnimatedComparison
+            anim = AnimatedComparison(self.specs, horizon=30.0, seed=1)
+            anim.set_timing(0.5, **timing)
+            n = 0
+            while anim.clock < anim.horizon:
+                anim._update_anim(n)
+                n += 1
+            return n
+        
+        fijo = frames_hasta_horizonte()
+        self.assertLess(frames_hasta_horizonte(adaptive=True, skip_idle=True), fijo)
+        with self.assertRaises(ValueError):
+            self.anim.set_timing(0.5, adaptive=True, dt_bounds=(1.0, 0.1))
+    
+    def test_grilla_n_paneles(self):
+        """N modelos en una grilla automática con colores y colecciones compartidas"""
+        from sim_colas_animado import AnimatedComparison, panel_grid
+        self.assertEqual(panel_grid(1), (1, 1))
+        self.assertEqual(panel_grid(4), (2, 2))
+        self.assertEqual(panel_grid(7), (3, 3))
+        self.assertEqual(panel_grid(30), (5, 6))
+        with self.assertRaises(ValueError):
+            panel_grid(0)
+        specs = (self.specs * 4)[:14]
+        anim = AnimatedComparison(specs, horizon=10.0, seed=2)
+        self.assertEqual(len(anim.axes), 14)
+        self.assertEqual(sum(ax.get_visible() for ax in anim.fig.axes), 14)
+        self.assertEqual(len(set(anim.colors)), 14)
+        # Los artistas de topología no crecen con la cantidad de servidores
+        for ax, (nodos, _, _), posiciones in zip(anim.axes, anim.server_artists, anim.server_positions):
+            self.assertEqual(len(ax.patches), 2)
+            self.assertEqual(len(ax.collections), 4)
+            self.assertEqual(len(nodos.get_paths()), len(posiciones))
+        anim.dt = 0.5
+        for f in range(10):
+            anim._update_anim(f)
+        self.assertNotIn('\n', anim.texts[0].get_text())
+    
+    def test_texto_sin_state(self):
+        """El texto por frame sale de los acumuladores, sin state() ni percentiles"""
+        for f in range(10):
+            self.anim._update_anim(f)
+        for sim in self.anim.sims:
+            sim.state = sim.window_metrics = None
+        for f in range(10, 40):
+            self.anim._update_anim(f)
+        for i, sim in enumerate(self.anim.sims):
+            del sim.state, sim.window_metrics
+            esperado = f"Wq prom: {sim.state()['wq_avg']:.2f}"
+            self.assertEqual(self.anim.texts[i].get_text().split('\n')[0], esperado)
+
+    def test_frames_sin_cambios(self):
+        """Un frame sin cambios con blit no dibuja nada y conserva clientes y textos"""
+        import numpy as np
+        fig = self.anim.fig
+        self.anim._blit, self.anim._frames = True, 200
+        ani = self.anim.anim = self.anim._new_animation(200)
+        # El primer draw inicia la animación y cachea el fondo sin artistas animados
+        fig.canvas.draw()
+        fondo = np.asarray(fig.canvas.buffer_rgba()).copy()
+        # Pasado el horizonte no hay eventos y los clientes terminan quietos
+        parciales = 0
+        for f in range(200):
+            antes = self.anim.profile_summary()['skipped']
+            previo = np.asarray(fig.canvas.buffer_rgba()).copy()
+            ani._draw_next_frame(f, blit=True)
+            # Solo se devuelven los artistas de los paneles con cambios
+            paneles = {a.axes for a in ani._drawn_artists}
+            parciales += 0 < len(paneles) < len(self.anim.axes)
+            if self.anim.profile_summary()['skipped'] > antes:
+                self.assertEqual(list(ani._drawn_artists), [])
+                if f > 100:
+                    break
+        self.assertGreater(self.anim.profile_summary()['skipped'], 0)
+        self.assertGreater(parciales, 0)
+        buf = np.asarray(fig.canvas.buffer_rgba())
+        np.testing.assert_array_equal(buf, previo)
+        for ax in self.anim.axes:
+            # Textos (y clientes, si quedan) siguen sobre el fondo de cada panel
+            x0, y0, x1, y1 = (int(v) for v in ax.bbox.extents)
+            h = buf.shape[0]
+            region = (slice(h - y1, h - y0), slice(x0, x1))
+            self.assertTrue((buf[region] != fondo[region]).any())
+        self.assertTrue(any(len(sc.get_offsets()) for sc in self.anim.client_scatter))
+
+    def test_reconfigurar_en_vivo(self):
+        """Cambiar c/k en vivo conserva el layout y retira servidores al terminar"""
+        from sim_colas_animado import AnimatedComparison
+
+        def revisar():
+            self._verificar_layout()
+            for sim in self.anim.sims:
+                self.assertEqual([s.index for s in sim.server_list], list(range(len(sim.server_list))))
+
+        for f in range(20):
+            self.anim._update_anim(f)
+        self.anim.reconfigure(0, lam=1.5, mu=1.0)
+        self.anim.reconfigure(1, c=1)
+        self.anim.reconfigure(2, k=1)
+        self.anim.reconfigure(3, k=1, c=1)
+        self.assertEqual(self.anim.specs[3].params['k'], 1)
+        for f in range(20, 60):
+            self.anim._update_anim(f)
+            revisar()
+        # Los servidores sobrantes se retiran al terminar su cliente
+        self.assertEqual([len(s.server_list) for s in self.anim.sims], [1, 1, 1, 1])
+        self.anim.reconfigure(1, c=4)
+        self.anim.reconfigure(3, k=2, c=3)
+        self.assertEqual([len(p) for p in self.anim.server_positions], [1, 4, 1, 6])
+        for f in range(60, 80):
+            self.anim._update_anim(f)
+            revisar()
+
+        with self.assertRaises(ValueError):
+            self.anim.reconfigure(0, c=2)
+        trazas = AnimatedComparison(self.specs, horizon=30.0, seed=1).simulate_traces()
+        rep = AnimatedComparison(self.specs, horizon=30.0, traces=trazas)
+        with self.assertRaises(ValueError):
+            rep.reconfigure(0, lam=1.0)
+
+    def test_controles_en_vivo(self):
+        """Elegir un panel no reconfigura y un cambio de topología reinicia el blit"""
+        from matplotlib.backend_bases import MouseEvent
+        fig = self.anim.fig
+        self.anim._blit, self.anim._frames = True, 100
+        self.anim.anim = self.anim._new_animation(100)
+        self.anim._add_reconfigure_controls()
+        fig.canvas.draw()
+        for f in range(5):
+            self.anim.anim._draw_next_frame(f, blit=True)
+
+        llamadas = []
+        self.anim.reconfigure = lambda *a, **k: llamadas.append((a, k))
+        for i in (2, 1, 3):
+            x, y = self.anim.axes[i].bbox.corners().mean(axis=0)
+            fig.canvas.callbacks.process('button_press_event',
+                                         MouseEvent('button_press_event', fig.canvas, x, y, button=1))
+            self.assertEqual(self.anim.selected_panel, i)
+            self.assertEqual(self.anim.mu_slider.val, self.specs[i].params['mu'])
+        self.assertEqual(llamadas, [])
+        del self.anim.reconfigure
+
+        previa = self.anim.anim
+        self.anim.reconfigure(1, c=5)
+        self.assertIsNot(self.anim.anim, previa)
+        self.assertEqual(previa.event_source.callbacks, [])
+        fig.canvas.draw()
+        self.anim.anim._draw_next_frame(5, blit=True)
+        self.assertEqual(len(self.anim.server_positions[1]), 5)
+
+
+class TestSubmuestreo(unittest.TestCase):
+    """Pruebas del submuestreo que preserva la forma de las series"""
+    
+    def setUp(self):
+        import numpy as np
+        rng = np.random.default_rng(3)
+        self.x = np.cumsum(rng.exponential(1.0, 200_000))
+        self.y = rng.integers(0, 10, len(self.x)).astype(float)
+        # Picos aislados que el muestreo [::n] perdería
+        self.y[12_345] = 80.0
+        self.y[150_001] = -30.0
+    
+    def test_envolvente_conserva_extremos(self):
+        """Cada columna conserva su mínimo y su máximo, y los extremos de la serie"""
+        import numpy as np
+        xs, ys = minmax_envelope(self.x, self.y, 100)
+        self.assertLessEqual(len(xs), 2 * 100 + 2)
+        self.assertTrue(np.all(np.diff(xs) >= 0))
+        self.assertEqual((xs[0], xs[-1]), (self.x[0], self.x[-1]))
+        self.assertEqual(ys.max(), 80.0)
+        self.assertEqual(ys.min(), -30.0)
+        edges = np.linspace(self.x[0], self.x[-1], 101)
+        col = np.minimum(np.searchsorted(edges, self.x, side='right') - 1, 99)
+        col_s = np.minimum(np.searchsorted(edges, xs, side='right') - 1, 99)
+        for j in range(100):
+            self.assertEqual(ys[col_s == j].max(), self.y[col == j].max())
+            self.assertEqual(ys[col_s == j].min(), self.y[col == j].min())
+    
+    def test_lttb(self):
+        """LTTB devuelve n_out puntos, conserva los extremos y los picos aislados"""
+        xs, ys = lttb(self.x, self.y, 500)
+        self.assertEqual(len(xs), 500)
+        self.assertEqual((xs[0], xs[-1]), (self.x[0], self.x[-1]))
+        self.assertIn(80.0, ys)
+        self.assertIn(-30.0, ys)
+    
+    def test_series_cortas_y_errores(self):
+        """Las series cortas pasan sin cambios y los parámetros se validan"""
+        xs, ys = downsample([0.0, 1.0, 2.0], [1, 3, 2], n_out=100)
+        self.assertEqual(list(ys), [1.0, 3.0, 2.0])
+        with self.assertRaises(ValueError):
+            downsample([0.0, 1.0], [1.0], n_out=100)
+        with self.assertRaises(ValueError):
+            downsample(self.x, self.y, method='cada_n')
+        with self.assertRaises(ValueError):
+            lttb(self.x, self.y, 2)
+    
+    def test_grafico_conserva_picos(self):
+        """La serie de espera graficada conserva el máximo de la simulación"""
+        import matplotlib.pyplot as plt
+        from sim_colas_animado import AnimatedComparison, ModelSpec
+        anim = AnimatedComparison([ModelSpec('M/M/c', 'mmc', {'lam': 2.8, 'mu': 1.0, 'c': 3})],
+                                  horizon=3000.0, seed=2)
+        sim = anim.sims[0]
+        while sim.time < sim.horizon:
+            sim.step()
+        anim._plot_time_series()
+        w_line = plt.gcf().axes[0].lines[0]
+        self.assertLess(len(w_line.get_xdata()), len(sim.wait_times))
+        self.assertEqual(max(w_line.get_ydata()), max(sim.wait_times))
+        plt.close('all')
+
+
 def run_tests():
     """Ejecutar todas las pruebas"""
     # Crear suite de pruebas
@@ -332,6 +1417,23 @@ def run_tests():
     suite.addTests(loader.loadTestsFromTestCase(TestMMK1))
     suite.addTests(loader.loadTestsFromTestCase(TestMMKC))
     suite.addTests(loader.loadTestsFromTestCase(TestExportacion))
+    suite.addTests(loader.loadTestsFromTestCase(TestCapacidadMaxima))
+    suite.addTests(loader.loadTestsFromTestCase(TestCacheAnalitica))
+    suite.addTests(loader.loadTestsFromTestCase(TestCadenaJSQ))
+    suite.addTests(loader.loadTestsFromTestCase(TestMatrizGeometrica))
+    suite.addTests(loader.loadTestsFromTestCase(TestTransitorio))
+    suite.addTests(loader.loadTestsFromTestCase(TestCuantiles))
+    suite.addTests(loader.loadTestsFromTestCase(TestHistogramaOnline))
+    suite.addTests(loader.loadTestsFromTestCase(TestDistribucionEstados))
+    suite.addTests(loader.loadTestsFromTestCase(TestUtilizacionServidores))
+    suite.addTests(loader.loadTestsFromTestCase(TestVentanas))
+    suite.addTests(loader.loadTestsFromTestCase(TestCheckpoints))
+    suite.addTests(loader.loadTestsFromTestCase(TestHistorialCompacto))
+    suite.addTests(loader.loadTestsFromTestCase(TestDivergencia))
+    suite.addTests(loader.loadTestsFromTestCase(TestEstadoInicial))
+    suite.addTests(loader.loadTestsFromTestCase(TestRegenerativo))
+    suite.addTests(loader.loadTestsFromTestCase(TestAnimacion))
+    suite.addTests(loader.loadTestsFromTestCase(TestSubmuestreo))
     
     # Ejecutar
     runner = unittest.TextTestRunner(verbosity=2)
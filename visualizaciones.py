@@ -13,8 +13,9 @@ import matplotlib.pyplot as plt
 import matplotlib.gridspec as gridspec
 import numpy as np
 from typing import List, Dict, Optional
-from sim_colas_animado import EventSim, MM1, MMC, MMK1, MMKC
+from sim_colas_animado import EventSim, MM1, MMC, MMK1, MMKC, panel_colors
 from teoria_colas import analytical_mm1, analytical_mmc, compare_simulation_vs_theory
+from submuestreo import downsample_for_axes
 
 
 class VisualizadorColas:
@@ -35,16 +36,22 @@ class VisualizadorColas:
         """
         Generar histogramas de tiempos de espera en cola y en sistema
         
+        Usa los histogramas en línea de la simulación (hist_wq, hist_w), por
+        lo que funciona aunque no se hayan guardado los tiempos individuales.
+        
         Parámetros:
-            bins: Número de bins para el histograma
+            bins: Número máximo de bins para el histograma
             figsize: Tamaño de la figura
         """
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=figsize)
         
         # Histograma de tiempos en cola
-        if self.sim.wait_times_q:
-            ax1.hist(self.sim.wait_times_q, bins=bins, alpha=0.7, color='#FF6B6B', edgecolor='black')
-            media_wq = np.mean(self.sim.wait_times_q)
+        hist_wq = self.sim.hist_wq
+        if hist_wq.count > 0:
+            counts, edges = hist_wq.coarsen(bins)
+            ax1.stairs(counts, edges, fill=True, alpha=0.7, color='#FF6B6B')
+            ax1.stairs(counts, edges, color='black')
+            media_wq = hist_wq.mean()
             ax1.axvline(media_wq, color='darkred', linestyle='--', linewidth=2, label=f'Media: {media_wq:.2f}')
             ax1.set_xlabel('Tiempo en cola (Wq)', fontsize=11, fontweight='bold')
             ax1.set_ylabel('Frecuencia', fontsize=11, fontweight='bold')
@@ -55,9 +62,12 @@ class VisualizadorColas:
             ax1.text(0.5, 0.5, 'Sin datos', ha='center', va='center', transform=ax1.transAxes)
         
         # Histograma de tiempos en sistema
-        if self.sim.wait_times:
-            ax2.hist(self.sim.wait_times, bins=bins, alpha=0.7, color='#4ECDC4', edgecolor='black')
-            media_w = np.mean(self.sim.wait_times)
+        hist_w = self.sim.hist_w
+        if hist_w.count > 0:
+            counts, edges = hist_w.coarsen(bins)
+            ax2.stairs(counts, edges, fill=True, alpha=0.7, color='#4ECDC4')
+            ax2.stairs(counts, edges, color='black')
+            media_w = hist_w.mean()
             ax2.axvline(media_w, color='darkblue', linestyle='--', linewidth=2, label=f'Media: {media_w:.2f}')
             ax2.set_xlabel('Tiempo en sistema (W)', fontsize=11, fontweight='bold')
             ax2.set_ylabel('Frecuencia', fontsize=11, fontweight='bold')
@@ -77,16 +87,22 @@ class VisualizadorColas:
         Parámetros:
             figsize: Tamaño de la figura
         """
-        if not self.sim.time_series:
+        if len(self.sim.time_series) == 0:
             print("⚠ No hay datos de series temporales")
             return
         
         fig = plt.figure(figsize=figsize)
         gs = gridspec.GridSpec(3, 1, height_ratios=[1, 1, 1], hspace=0.3)
         
+        # Series completas como arreglos; cada eje recibe solo la envolvente
+        # mín/máx por píxel para que los picos se conserven
+        t = np.asarray(self.sim.time_series, dtype=float)
+        L = np.asarray(self.sim.system_series, dtype=float)
+        Lq = np.asarray(self.sim.queue_series, dtype=float)
+        
         # Gráfico 1: Clientes en sistema (L)
         ax1 = plt.subplot(gs[0])
-        ax1.plot(self.sim.time_series, self.sim.system_series, 'b-', linewidth=1.5, alpha=0.7)
+        ax1.plot(*downsample_for_axes(ax1, t, L), 'b-', linewidth=1.5, alpha=0.7)
         media_l = self.sim.state()['l_avg']
         ax1.axhline(media_l, color='red', linestyle='--', linewidth=2, label=f'L̄ = {media_l:.2f}')
         ax1.set_ylabel('Clientes en sistema (L)', fontsize=11, fontweight='bold')
@@ -96,29 +112,21 @@ class VisualizadorColas:
         
         # Gráfico 2: Clientes en cola (Lq)
         ax2 = plt.subplot(gs[1])
-        ax2.plot(self.sim.time_series, self.sim.queue_series, 'g-', linewidth=1.5, alpha=0.7)
+        ax2.plot(*downsample_for_axes(ax2, t, Lq), 'g-', linewidth=1.5, alpha=0.7)
         media_lq = self.sim.state()['lq_avg']
         ax2.axhline(media_lq, color='darkgreen', linestyle='--', linewidth=2, label=f'L̄q = {media_lq:.2f}')
         ax2.set_ylabel('Clientes en cola (Lq)', fontsize=11, fontweight='bold')
         ax2.legend(loc='upper right')
         ax2.grid(True, alpha=0.3)
         
-        # Gráfico 3: Utilización instantánea (aproximada)
+        # Gráfico 3: Utilización instantánea (fracción de servidores ocupados)
         ax3 = plt.subplot(gs[2])
-        if isinstance(self.sim, MM1):
-            # Para MM1, utilización es 1 si servidor ocupado, 0 si no
-            util_series = [1 if L > 0 else 0 for L in self.sim.system_series]
-        elif isinstance(self.sim, MMC):
-            # Para MMC, utilización es proporción de servidores ocupados
-            c = len(self.sim.servers)
-            util_series = [min(L / c, 1.0) for L in self.sim.system_series]
-        else:
-            # Para otros modelos, aproximar
-            util_series = [min(L / 5.0, 1.0) for L in self.sim.system_series]
+        n_servers = self.sim.n_servers
+        util_series = (L - Lq) / n_servers
         
-        ax3.plot(self.sim.time_series, util_series, 'orange', linewidth=1.5, alpha=0.7)
-        rho = self.sim.state()['rho']
-        ax3.axhline(rho, color='red', linestyle='--', linewidth=2, label=f'ρ = {rho:.3f}')
+        ax3.plot(*downsample_for_axes(ax3, t, util_series), 'orange', linewidth=1.5, alpha=0.7)
+        rho = self.sim.state()['rho_measured']
+        ax3.axhline(rho, color='red', linestyle='--', linewidth=2, label=f'ρ medida = {rho:.3f}')
         ax3.set_xlabel('Tiempo de simulación', fontsize=11, fontweight='bold')
         ax3.set_ylabel('Utilización (ρ)', fontsize=11, fontweight='bold')
         ax3.set_ylim(0, 1.1)
@@ -139,49 +147,36 @@ class VisualizadorColas:
             print("⚠ Este gráfico solo está disponible para modelos con múltiples servidores")
             return
         
-        # Calcular utilización por servidor basada en tiempo ocupado
-        # Nota: Esta es una aproximación simplificada
+        # Utilización medida por servidor (tiempo ocupado / tiempo efectivo)
         fig, ax = plt.subplots(figsize=figsize)
+        utilizaciones = self.sim.server_utilization()
+        num_servers = len(utilizaciones)
+        if isinstance(self.sim, MMKC):
+            etiquetas = [f'Q{q+1}·S{j+1}' for q in range(self.sim.k) for j in range(self.sim.c)]
+        elif isinstance(self.sim, MMK1):
+            etiquetas = [f'Q{i+1}' for i in range(num_servers)]
+        else:
+            etiquetas = [f'S{i+1}' for i in range(num_servers)]
         
-        if isinstance(self.sim, MMC):
-            # Para MMC
-            num_servers = len(self.sim.servers)
-            utilizaciones = []
-            for i, server in enumerate(self.sim.servers):
-                # Tiempo ocupado / tiempo total
-                tiempo_ocupado = server.busy_until if server.current_job else 0
-                util = min(1.0, tiempo_ocupado / self.sim.time) if self.sim.time > 0 else 0
-                utilizaciones.append(util)
-            
-            colores = plt.cm.viridis(np.linspace(0.2, 0.8, num_servers))
-            bars = ax.bar(range(num_servers), utilizaciones, color=colores, edgecolor='black', linewidth=1.5)
-            ax.set_xlabel('Servidor', fontsize=11, fontweight='bold')
-            ax.set_ylabel('Utilización (ρ)', fontsize=11, fontweight='bold')
-            ax.set_title(f'{self.nombre_modelo}: Utilización por Servidor', fontsize=13, fontweight='bold')
-            ax.set_xticks(range(num_servers))
-            ax.set_xticklabels([f'S{i+1}' for i in range(num_servers)])
-            ax.set_ylim(0, 1.1)
-            ax.grid(True, alpha=0.3, axis='y')
-            
-            # Añadir valores en las barras
-            for i, (bar, util) in enumerate(zip(bars, utilizaciones)):
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height,
-                       f'{util:.2f}',
-                       ha='center', va='bottom', fontweight='bold')
+        colores = plt.cm.viridis(np.linspace(0.2, 0.8, num_servers))
+        bars = ax.bar(range(num_servers), utilizaciones, color=colores, edgecolor='black', linewidth=1.5)
+        rho = self.sim.state()['rho_measured']
+        ax.axhline(rho, color='red', linestyle='--', linewidth=2, label=f'ρ agregada = {rho:.3f}')
+        ax.set_xlabel('Servidor', fontsize=11, fontweight='bold')
+        ax.set_ylabel('Utilización (ρ)', fontsize=11, fontweight='bold')
+        ax.set_title(f'{self.nombre_modelo}: Utilización por Servidor', fontsize=13, fontweight='bold')
+        ax.set_xticks(range(num_servers))
+        ax.set_xticklabels(etiquetas)
+        ax.set_ylim(0, 1.1)
+        ax.legend(loc='upper right')
+        ax.grid(True, alpha=0.3, axis='y')
         
-        elif isinstance(self.sim, (MMK1, MMKC)):
-            print("ℹ Visualización de utilización para modelos M/M/k/1 y M/M/k/c")
-            print("  (Implementación simplificada - utilización global)")
-            rho = self.sim.state()['rho']
-            ax.bar([0], [rho], color='#4ECDC4', edgecolor='black', linewidth=1.5)
-            ax.set_ylabel('Utilización promedio (ρ)', fontsize=11, fontweight='bold')
-            ax.set_title(f'{self.nombre_modelo}: Utilización Global', fontsize=13, fontweight='bold')
-            ax.set_xticks([0])
-            ax.set_xticklabels(['Sistema'])
-            ax.set_ylim(0, 1.1)
-            ax.grid(True, alpha=0.3, axis='y')
-            ax.text(0, rho, f'{rho:.3f}', ha='center', va='bottom', fontweight='bold')
+        # Añadir valores en las barras
+        for bar, util in zip(bars, utilizaciones):
+            height = bar.get_height()
+            ax.text(bar.get_x() + bar.get_width()/2., height,
+                   f'{util:.2f}',
+                   ha='center', va='bottom', fontweight='bold')
         
         plt.tight_layout()
         plt.show()
@@ -207,10 +202,13 @@ class VisualizadorColas:
         
         print(f"\nMÉTRICAS DE DESEMPEÑO:")
         print(f"  ρ (utilización)      = {st['rho']:.4f}")
+        print(f"  ρ medida             = {st['rho_measured']:.4f}")
         print(f"  L (clientes sistema) = {st['l_avg']:.4f}")
         print(f"  Lq (clientes cola)   = {st['lq_avg']:.4f}")
         print(f"  W (tiempo sistema)   = {st['w_avg']:.4f}")
         print(f"  Wq (tiempo cola)     = {st['wq_avg']:.4f}")
+        print(f"  P0 (sistema vacío)   = {st['p0']:.4f}")
+        print(f"  P(espera)            = {st['p_wait']:.4f}")
         print(f"  Clientes atendidos   = {st['served']}")
         
         # Comparación con teoría
@@ -262,52 +260,30 @@ def comparar_modelos(sims: List[EventSim], nombres: List[str], figsize: tuple =
     fig, axes = plt.subplots(2, 2, figsize=figsize)
     axes = axes.flatten()
     
-    colores = ['#FF6B6B', '#4ECDC4', '#95E1D3', '#F38181']
-    
-    # Gráfico 1: Comparación de L (clientes en sistema)
-    ax1 = axes[0]
-    for i, (sim, nombre) in enumerate(zip(sims, nombres)):
-        st = sim.state()
-        ax1.bar(i, st['l_avg'], color=colores[i % len(colores)], edgecolor='black', linewidth=1.5, label=nombre)
-    ax1.set_ylabel('L̄ (Clientes promedio en sistema)', fontsize=11, fontweight='bold')
-    ax1.set_title('Comparación: Clientes en Sistema', fontsize=12, fontweight='bold')
-    ax1.set_xticks(range(len(nombres)))
-    ax1.set_xticklabels(nombres, rotation=15, ha='right')
-    ax1.grid(True, alpha=0.3, axis='y')
+    # Un color por modelo, para cualquier cantidad de modelos
+    colores = panel_colors(len(sims))
+    estados = [sim.state() for sim in sims]
+    x = np.arange(len(nombres))
+    # Con muchos modelos se inclinan y achican las etiquetas
+    rotacion = 15 if len(nombres) <= 6 else 60
+    tam_etiqueta = 10 if len(nombres) <= 10 else max(6, 12 - len(nombres) // 4)
     
-    # Gráfico 2: Comparación de W (tiempo en sistema)
-    ax2 = axes[1]
-    for i, (sim, nombre) in enumerate(zip(sims, nombres)):
-        st = sim.state()
-        ax2.bar(i, st['w_avg'], color=colores[i % len(colores)], edgecolor='black', linewidth=1.5, label=nombre)
-    ax2.set_ylabel('W̄ (Tiempo promedio en sistema)', fontsize=11, fontweight='bold')
-    ax2.set_title('Comparación: Tiempo en Sistema', fontsize=12, fontweight='bold')
-    ax2.set_xticks(range(len(nombres)))
-    ax2.set_xticklabels(nombres, rotation=15, ha='right')
-    ax2.grid(True, alpha=0.3, axis='y')
-    
-    # Gráfico 3: Comparación de ρ (utilización)
-    ax3 = axes[2]
-    for i, (sim, nombre) in enumerate(zip(sims, nombres)):
-        st = sim.state()
-        ax3.bar(i, st['rho'], color=colores[i % len(colores)], edgecolor='black', linewidth=1.5, label=nombre)
-    ax3.set_ylabel('ρ (Utilización)', fontsize=11, fontweight='bold')
-    ax3.set_title('Comparación: Utilización del Sistema', fontsize=12, fontweight='bold')
-    ax3.set_xticks(range(len(nombres)))
-    ax3.set_xticklabels(nombres, rotation=15, ha='right')
-    ax3.set_ylim(0, 1.1)
-    ax3.grid(True, alpha=0.3, axis='y')
-    
-    # Gráfico 4: Comparación de Wq (tiempo en cola)
-    ax4 = axes[3]
-    for i, (sim, nombre) in enumerate(zip(sims, nombres)):
-        st = sim.state()
-        ax4.bar(i, st['wq_avg'], color=colores[i % len(colores)], edgecolor='black', linewidth=1.5, label=nombre)
-    ax4.set_ylabel('W̄q (Tiempo promedio en cola)', fontsize=11, fontweight='bold')
-    ax4.set_title('Comparación: Tiempo en Cola', fontsize=12, fontweight='bold')
-    ax4.set_xticks(range(len(nombres)))
-    ax4.set_xticklabels(nombres, rotation=15, ha='right')
-    ax4.grid(True, alpha=0.3, axis='y')
+    metricas = [
+        ('l_avg', 'L̄ (Clientes promedio en sistema)', 'Comparación: Clientes en Sistema'),
+        ('w_avg', 'W̄ (Tiempo promedio en sistema)', 'Comparación: Tiempo en Sistema'),
+        ('rho_measured', 'ρ (Utilización)', 'Comparación: Utilización del Sistema'),
+        ('wq_avg', 'W̄q (Tiempo promedio en cola)', 'Comparación: Tiempo en Cola'),
+    ]
+    for ax, (clave, etiqueta, titulo) in zip(axes, metricas):
+        # Una sola llamada por gráfico: todas las barras en un mismo contenedor
+        ax.bar(x, [st[clave] for st in estados], color=colores, edgecolor='black', linewidth=1.5)
+        ax.set_ylabel(etiqueta, fontsize=11, fontweight='bold')
+        ax.set_title(titulo, fontsize=12, fontweight='bold')
+        ax.set_xticks(x)
+        ax.set_xticklabels(nombres, rotation=rotacion, ha='right', fontsize=tam_etiqueta)
+        ax.grid(True, alpha=0.3, axis='y')
+        if clave == 'rho_measured':
+            ax.set_ylim(0, 1.1)
     
     plt.suptitle('Comparación de Modelos de Colas', fontsize=15, fontweight='bold', y=0.995)
     plt.tight_layout()